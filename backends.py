@@ -0,0 +1,269 @@
+"""Backends module.
+
+Pluggable kernel backends for the simulation engine. A backend supplies the hot
+kernels of a step: force accumulation, velocity and position integration,
+collision detection and merging. The NumPy backend is always available; the Numba
+backend compiles the kernels with parallel loops and caches the machine code on
+disk so the compilation is only paid once. get_backend warms the Numba kernels up
+the first time the backend is requested, so compilation is never timed as part of
+a step.
+
+The default backend is read from the GALAXY_BACKEND environment variable
+('numpy', 'numba' or 'auto'). Asking for Numba when it is not installed falls back
+to NumPy with a warning.
+
+Classes:
+    NumpyBackend
+    NumbaBackend
+
+Methods:
+    get_backend: returns a backend by name.
+"""
+
+import os
+import warnings
+import numpy as np
+import barnes_hut
+import collisions
+import kernels
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+DEFAULT_BACKEND = os.environ.get('GALAXY_BACKEND', 'numpy')
+# the Numba backend tests every pair for collisions below this many active galaxies
+# and switches to the spatial hash above it
+NUMBA_GRID_THRESHOLD = 4096
+
+class NumpyBackend:
+    """Vectorized NumPy kernels.
+
+    Methods:
+        accelerations: accelerations on every active galaxy.
+        kick: updates velocities from accelerations.
+        drift: updates positions from velocities.
+        find_collisions: pairs of active galaxies close enough to merge.
+        merge: merges colliding pairs.
+    """
+
+    name = 'numpy'
+
+    def accelerations(self, pos, mass, active, solver='direct', theta=barnes_hut.THETA,
+                      targets=None, period=None, kernel=kernels.NEWTONIAN, accumulate=None):
+        """Accelerations on every active galaxy.
+
+        Args:
+            pos (np.ndarray): (N, 2) array of positions.
+            mass (np.ndarray): (N,) array of masses.
+            active (np.ndarray): (N,) boolean mask of galaxies taking part.
+            solver (string): 'direct' or 'barnes_hut'.
+            theta (float): Barnes-Hut opening angle.
+            targets (np.ndarray): (N,) boolean mask of galaxies to compute accelerations
+                for. Defaults to active.
+            period (float): side of a periodic box for minimum-image forces, or None.
+                Direct solver only.
+            kernel (kernels.ForceKernel): force law.
+            accumulate (np.dtype): dtype the pulls are summed in. Defaults to the
+                dtype of pos.
+
+        Returns:
+            np.ndarray: (N, 2) array of accelerations. Zero for inactive galaxies.
+        """
+        import engine
+
+        if solver == 'barnes_hut':
+            return barnes_hut.accelerations(pos, mass, active, theta, targets=targets,
+                                            kernel=kernel, accumulate=accumulate)
+        return engine.pairwise_accelerations(pos, mass, active, targets=targets, period=period,
+                                             kernel=kernel, accumulate=accumulate)
+
+    def kick(self, vel, acc, active, time_step):
+        """Updates velocities of active galaxies in place: vel += acc * time_step."""
+        vel += np.where(active[:, np.newaxis], acc * time_step, 0)
+
+    def drift(self, pos, vel, active, time_step):
+        """Updates positions of active galaxies in place: pos += vel * time_step."""
+        pos += np.where(active[:, np.newaxis], vel * time_step, 0)
+
+    def find_collisions(self, pos, mass, active, period=None):
+        """Pairs of active galaxies closer than their capture radius.
+
+        See collisions.find_collisions.
+        """
+        return collisions.find_collisions(pos, mass, active, period=period)
+
+    def merge(self, pairs, pos, vel, mass, active, ids, period=None, events=None):
+        """Merges colliding pairs in place. See collisions.resolve_mergers."""
+        return collisions.resolve_mergers(pairs, pos, vel, mass, active, ids, period, events)
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _numba_wrap(delta, period):
+        if period > 0:
+            # round half to even, as boundaries.minimum_image, so a pair exactly half a
+            # box apart is wrapped to opposite separations and forces stay equal and opposite
+            delta -= period * np.rint(delta / period)
+        return delta
+
+    @numba.njit(cache=True)
+    def _numba_weight(dist_sq, code, softening):
+        # kernels.ForceKernel.weight without G, for one pair; code indexes KERNELS
+        if code == 1:
+            soft_sq = dist_sq + softening * softening
+            return 1.0 / (soft_sq * np.sqrt(soft_sq))
+        if dist_sq == 0:
+            return 0.0
+        if code == 2:
+            support = kernels.SPLINE_RATIO * softening
+            u = np.sqrt(dist_sq) / support
+            if u < 0.5:
+                return (32 / 3 + u * u * (32 * u - 38.4)) / support**3
+            if u < 1:
+                return (64 / 3 - 48 * u + 38.4 * u * u - 32 / 3 * u**3
+                        - 1 / 15 / u**3) / support**3
+        return 1.0 / (dist_sq * np.sqrt(dist_sq))
+
+    @numba.njit(parallel=True, cache=True)
+    def _numba_accelerations(pos, mass, active, targets, period, code, softening, G):
+        acc = np.zeros_like(pos)
+        for i in numba.prange(len(pos)):
+            if not (active[i] and targets[i]):
+                continue
+            a_x = 0.0
+            a_y = 0.0
+            for j in range(len(pos)):
+                if not active[j]:
+                    continue
+                d_x = _numba_wrap(pos[j, 0] - pos[i, 0], period)
+                d_y = _numba_wrap(pos[j, 1] - pos[i, 1], period)
+                weight = mass[j] * _numba_weight(d_x * d_x + d_y * d_y, code, softening)
+                a_x += weight * d_x
+                a_y += weight * d_y
+            acc[i, 0] = G * a_x
+            acc[i, 1] = G * a_y
+        return acc
+
+    @numba.njit(parallel=True, cache=True)
+    def _numba_advance(values, rates, active, time_step):
+        for i in numba.prange(len(values)):
+            if active[i]:
+                values[i, 0] += rates[i, 0] * time_step
+                values[i, 1] += rates[i, 1] * time_step
+
+    @numba.njit(cache=True)
+    def _numba_collides(pos, mass, i, j, period):
+        d_x = _numba_wrap(pos[j, 0] - pos[i, 0], period)
+        d_y = _numba_wrap(pos[j, 1] - pos[i, 1], period)
+        radius = max(mass[i], mass[j]) / min(mass[i], mass[j])
+        return d_x * d_x + d_y * d_y < radius * radius
+
+    @numba.njit(parallel=True, cache=True)
+    def _numba_collision_pairs(pos, mass, active, period):
+        count = len(pos)
+        hits = np.zeros(count, dtype=np.int64)
+        for i in numba.prange(count):
+            if active[i]:
+                for j in range(i + 1, count):
+                    if active[j] and _numba_collides(pos, mass, i, j, period):
+                        hits[i] += 1
+        starts = np.cumsum(hits) - hits
+        pairs = np.empty((hits.sum(), 2), dtype=np.int64)
+        for i in numba.prange(count):
+            slot = starts[i]
+            if active[i] and hits[i]:
+                for j in range(i + 1, count):
+                    if active[j] and _numba_collides(pos, mass, i, j, period):
+                        pairs[slot, 0] = i
+                        pairs[slot, 1] = j
+                        slot += 1
+        return pairs
+
+class NumbaBackend(NumpyBackend):
+    """Numba-compiled kernels with parallel loops over galaxies.
+
+    Kernels are compiled on first use and cached on disk (numba cache=True), so later
+    runs load the machine code instead of recompiling. Barnes-Hut forces and merging
+    use the NumPy implementations.
+
+    Methods:
+        __init__: checks that Numba is installed.
+        warm_up: compiles (or loads) every kernel ahead of the run.
+    """
+
+    name = 'numba'
+    # set once the kernels are compiled in this process
+    warm = False
+
+    def __init__(self):
+        """Initializes NumbaBackend object.
+
+        Raises:
+            ImportError: if Numba is not installed.
+        """
+        if numba is None:
+            raise ImportError('the numba backend requires the numba package')
+
+    def warm_up(self):
+        """Compiles (or loads from the cache) every kernel on a tiny problem, once."""
+        if NumbaBackend.warm:
+            return
+        pos = np.array([[0.0, 0.0], [1.0, 1.0]])
+        mass = np.ones(2)
+        active = np.ones(2, dtype=bool)
+        self.accelerations(pos, mass, active)
+        self.kick(pos.copy(), pos, active, 0.0)
+        _numba_collision_pairs(pos, mass, active, 0.0)
+        NumbaBackend.warm = True
+
+    def accelerations(self, pos, mass, active, solver='direct', theta=barnes_hut.THETA,
+                      targets=None, period=None, kernel=kernels.NEWTONIAN, accumulate=None):
+        if solver == 'barnes_hut':
+            return super().accelerations(pos, mass, active, solver, theta, targets,
+                                         kernel=kernel, accumulate=accumulate)
+        # the compiled kernel sums in float64 registers whatever the dtype of pos
+        acc = _numba_accelerations(pos, mass, active, active if targets is None else targets,
+                                   period or 0.0, kernel.code, kernel.softening, kernel.G)
+        return acc.astype(accumulate or pos.dtype, copy=False)
+
+    def kick(self, vel, acc, active, time_step):
+        _numba_advance(vel, acc, active, time_step)
+
+    def drift(self, pos, vel, active, time_step):
+        _numba_advance(pos, vel, active, time_step)
+
+    def find_collisions(self, pos, mass, active, period=None):
+        if np.count_nonzero(active) >= NUMBA_GRID_THRESHOLD:
+            return super().find_collisions(pos, mass, active, period)
+        return _numba_collision_pairs(pos, mass, active, period or 0.0)
+
+BACKENDS = {'numpy': NumpyBackend, 'numba': NumbaBackend}
+
+def get_backend(name=None):
+    """Returns a backend by name, falling back to NumPy when Numba is unavailable.
+
+    Args:
+        name (string): 'numpy', 'numba' or 'auto' (Numba if installed). Defaults to
+            DEFAULT_BACKEND, read from the GALAXY_BACKEND environment variable.
+
+    Returns:
+        NumpyBackend: backend instance, with its kernels compiled.
+
+    Raises:
+        ValueError: if name is not a known backend.
+    """
+    if name is None:
+        name = DEFAULT_BACKEND
+    if name == 'auto':
+        name = 'numpy' if numba is None else 'numba'
+    if name not in BACKENDS:
+        raise ValueError(f'unknown backend {name!r}, expected one of {tuple(BACKENDS)} or auto')
+    if name == 'numba' and numba is None:
+        warnings.warn('numba is not installed, falling back to the numpy backend')
+        name = 'numpy'
+    backend = BACKENDS[name]()
+    if name == 'numba':
+        backend.warm_up()
+    return backend
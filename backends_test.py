@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+import numpy as np
+import backends
+import engine
+
+class BackendsTests(unittest.TestCase):
+    """Tests for backends.py module."""
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.pos = rng.uniform(0, 300, (150, 2))
+        self.mass = rng.integers(1, 100, 150).astype(np.float64)
+        self.active = rng.random(150) < 0.9
+
+    def test_get_backend(self):
+        """Backends are chosen by name and unknown names are rejected."""
+        self.assertEqual(backends.get_backend('numpy').name, 'numpy')
+        with self.assertRaises(ValueError):
+            backends.get_backend('cuda')
+
+    def test_numba_falls_back_without_numba(self):
+        """Asking for Numba without it installed falls back to NumPy."""
+        with mock.patch.object(backends, 'numba', None):
+            with self.assertWarns(UserWarning):
+                backend = backends.get_backend('numba')
+            self.assertEqual(backend.name, 'numpy')
+            self.assertEqual(backends.get_backend('auto').name, 'numpy')
+
+    @unittest.skipIf(backends.numba is None, 'numba not installed')
+    def test_get_backend_warms_numba_up(self):
+        """Asking for the Numba backend compiles its kernels before the first step."""
+        with mock.patch.object(backends.NumbaBackend, 'warm', False):
+            backends.get_backend('numba')
+
+            self.assertTrue(backends.NumbaBackend.warm)
+        self.assertTrue(backends._numba_accelerations.signatures)
+        self.assertTrue(backends._numba_advance.signatures)
+        self.assertTrue(backends._numba_collision_pairs.signatures)
+
+    @unittest.skipIf(backends.numba is None, 'numba not installed')
+    def test_numba_matches_numpy(self):
+        """Compiled kernels agree with the NumPy kernels."""
+        numpy_backend = backends.get_backend('numpy')
+        numba_backend = backends.get_backend('numba')
+
+        np.testing.assert_allclose(
+            numba_backend.accelerations(self.pos, self.mass, self.active),
+            numpy_backend.accelerations(self.pos, self.mass, self.active))
+        self.assertEqual(
+            set(map(tuple, numba_backend.find_collisions(self.pos, self.mass, self.active))),
+            set(map(tuple, numpy_backend.find_collisions(self.pos, self.mass, self.active))))
+
+    @unittest.skipIf(backends.numba is None, 'numba not installed')
+    def test_numba_universe_run(self):
+        """A universe evolves the same on both backends."""
+        numpy_run = engine.Universe(300, self.pos, self.mass, np.zeros(150), backend='numpy')
+        numba_run = engine.Universe(300, self.pos, self.mass, np.zeros(150), backend='numba')
+        for _ in range(5):
+            numpy_run.step(0.05)
+            numba_run.step(0.05)
+
+        np.testing.assert_array_equal(numba_run.active, numpy_run.active)
+        np.testing.assert_allclose(numba_run.pos, numpy_run.pos)
+
+if __name__ == '__main__':
+    unittest.main()
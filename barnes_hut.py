@@ -0,0 +1,238 @@
+"""Barnes-Hut module.
+
+Approximate O(N log N) gravity solver. Each step builds a quadtree over the
+galaxies (linear quadtree from sorted Morton codes) and walks it for all target
+galaxies at once, replacing any cell that looks small enough from the target,
+size / distance < theta, by its total mass at its centre of mass.
+
+Classes:
+    QuadTree
+
+Methods:
+    morton_codes: interleaves integer grid coordinates into Morton codes.
+    accelerations: Barnes-Hut accelerations on every active galaxy.
+    accuracy_report: compares Barnes-Hut against direct summation.
+"""
+
+import time
+import numpy as np
+import kernels
+
+MAX_DEPTH = 20
+THETA = 0.5
+
+def _spread_bits(values):
+    """Spreads the low 32 bits of values so bit k moves to bit 2k."""
+    values = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF),
+                        (4, 0x0F0F0F0F0F0F0F0F), (2, 0x3333333333333333),
+                        (1, 0x5555555555555555)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+def morton_codes(grid_x, grid_y):
+    """Interleaves integer grid coordinates into Morton (Z-order) codes.
+
+    Args:
+        grid_x (np.ndarray): integer x cell coordinates.
+        grid_y (np.ndarray): integer y cell coordinates.
+
+    Returns:
+        np.ndarray: uint64 Morton codes.
+    """
+    return _spread_bits(grid_x) | (_spread_bits(grid_y) << np.uint64(1))
+
+class QuadTree:
+    """Linear quadtree over a set of galaxies, stored as flat node arrays.
+
+    Parameters:
+        order (np.ndarray): galaxy indices sorted along the Morton curve.
+        rank (np.ndarray): position of each galaxy in order (-1 if not in the tree).
+        node_mass (np.ndarray): total mass of each node.
+        node_com (np.ndarray): (M, 2) centre of mass of each node.
+        node_size (np.ndarray): side length of each node's cell.
+        node_start (np.ndarray): first slot in order covered by each node.
+        node_stop (np.ndarray): one past the last slot in order covered by each node.
+        child_start (np.ndarray): index of each node's first child node.
+        child_count (np.ndarray): number of children of each node (0 for leaves).
+
+    Methods:
+        __init__: builds the quadtree.
+    """
+
+    def __init__(self, pos, mass, active, max_depth=MAX_DEPTH):
+        """Builds the quadtree.
+
+        Args:
+            pos (np.ndarray): (N, 2) array of positions.
+            mass (np.ndarray): (N,) array of masses.
+            active (np.ndarray): (N,) boolean mask of galaxies in the tree.
+            max_depth (int): deepest level; galaxies sharing a cell there form one leaf.
+        """
+        idx = np.flatnonzero(active)
+        origin = pos[idx].min(axis=0)
+        box = max(float((pos[idx].max(axis=0) - origin).max()), 1e-12)
+        cells = 2**max_depth
+        grid = np.clip(((pos[idx] - origin) / box * cells).astype(np.int64), 0, cells - 1)
+        codes = morton_codes(grid[:, 0], grid[:, 1])
+        sort = np.argsort(codes, kind='stable')
+        codes = codes[sort]
+        self.order = idx[sort]
+        self.rank = np.full(len(pos), -1)
+        self.rank[self.order] = np.arange(len(idx))
+
+        sorted_mass = mass[self.order]
+        sorted_moment = sorted_mass[:, np.newaxis] * pos[self.order]
+        slots = np.arange(len(idx))
+        levels = []
+        parent_keys = None
+        for level in range(max_depth + 1):
+            keys = codes[slots] >> np.uint64(2 * (max_depth - level))
+            first = np.concatenate(([True], keys[1:] != keys[:-1]))
+            starts = np.flatnonzero(first)
+            counts = np.diff(np.append(starts, len(slots)))
+            node_mass = np.add.reduceat(sorted_mass[slots], starts)
+            node_com = np.add.reduceat(sorted_moment[slots], starts) / node_mass[:, np.newaxis]
+            parents = None
+            if parent_keys is not None:
+                parents = np.searchsorted(parent_keys, keys[starts] >> np.uint64(2))
+            levels.append((node_mass, node_com, slots[starts], slots[starts] + counts,
+                           np.full(len(starts), box / 2**level), parents))
+            if level == max_depth:
+                break
+            # nodes holding a single galaxy are leaves; only split the others
+            split = np.repeat(counts > 1, counts)
+            slots = slots[split]
+            parent_keys = keys[starts][counts > 1]
+            if not len(slots):
+                break
+
+        self.node_mass = np.concatenate([level[0] for level in levels])
+        self.node_com = np.concatenate([level[1] for level in levels])
+        self.node_start = np.concatenate([level[2] for level in levels])
+        self.node_stop = np.concatenate([level[3] for level in levels])
+        self.node_size = np.concatenate([level[4] for level in levels])
+        self.child_start = np.zeros(len(self.node_mass), dtype=np.int64)
+        self.child_count = np.zeros(len(self.node_mass), dtype=np.int64)
+        offset = 0
+        for depth, level in enumerate(levels[:-1]):
+            offset_next = offset + len(level[0])
+            # parent indices of the next level point into this level's split nodes
+            split_nodes = offset + np.flatnonzero(level[3] - level[2] > 1)
+            parents = split_nodes[levels[depth + 1][5]]
+            counts = np.bincount(parents - offset, minlength=len(level[0]))
+            self.child_count[offset:offset_next] = counts
+            self.child_start[offset:offset_next] = offset_next + np.cumsum(counts) - counts
+            offset = offset_next
+
+def _accumulate(acc, targets, source_pos, source_mass, pos, kernel):
+    """Adds the pull of point masses at source_pos on galaxies targets into acc."""
+    delta = source_pos - pos[targets]
+    dist_sq = np.einsum('ij,ij->i', delta, delta)
+    weight = source_mass * kernel.weight(dist_sq)
+    for axis in range(2):
+        acc[:, axis] += np.bincount(targets, weights=weight * delta[:, axis], minlength=len(acc))
+
+def accelerations(pos, mass, active, theta=THETA, max_depth=MAX_DEPTH, targets=None,
+                  kernel=kernels.NEWTONIAN, accumulate=None):
+    """Accelerations on all active galaxies using the Barnes-Hut approximation.
+
+    All targets walk the tree together: every pass tests a batch of (galaxy, node)
+    pairs, accumulates the accepted ones and replaces the rest by their children.
+    Cells are only accepted when they do not contain the target, so self-interaction
+    is excluded exactly.
+
+    Args:
+        pos (np.ndarray): (N, 2) array of positions.
+        mass (np.ndarray): (N,) array of masses.
+        active (np.ndarray): (N,) boolean mask of galaxies taking part.
+        theta (float): opening angle. 0 reduces to direct summation.
+        max_depth (int): deepest level of the quadtree.
+        targets (np.ndarray): (N,) boolean mask of galaxies to compute accelerations
+            for. Defaults to active; the others are left at zero.
+        kernel (kernels.ForceKernel): force law, applied to cells as point masses.
+        accumulate (np.dtype): dtype of the result. Defaults to the dtype of pos.
+
+    Returns:
+        np.ndarray: (N, 2) array of accelerations. Zero for inactive galaxies.
+    """
+    acc = np.zeros(pos.shape, accumulate or pos.dtype)
+    if np.count_nonzero(active) < 2:
+        return acc
+    tree = QuadTree(pos, mass, active, max_depth)
+    if targets is None:
+        targets = tree.order
+    else:
+        targets = tree.order[targets[tree.order]]
+    nodes = np.zeros(len(targets), dtype=np.int64)
+    while len(targets):
+        rank = tree.rank[targets]
+        inside = (tree.node_start[nodes] <= rank) & (rank < tree.node_stop[nodes])
+        delta = tree.node_com[nodes] - pos[targets]
+        dist_sq = np.einsum('ij,ij->i', delta, delta)
+        members = tree.node_stop[nodes] - tree.node_start[nodes]
+        leaf = tree.child_count[nodes] == 0
+        accept = leaf | (~inside & (tree.node_size[nodes]**2 < theta**2 * dist_sq))
+
+        # leaves left at max_depth hold several galaxies: sum those directly
+        shared = accept & leaf & (members > 1)
+        if shared.any():
+            counts = members[shared]
+            slots = (np.repeat(tree.node_start[nodes[shared]], counts)
+                     + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+            _accumulate(acc, np.repeat(targets[shared], counts), pos[tree.order[slots]],
+                        mass[tree.order[slots]], pos, kernel)
+        # an accepted cell containing the target is the target's own leaf: skip it
+        use = accept & ~shared & ~inside
+        _accumulate(acc, targets[use], tree.node_com[nodes[use]], tree.node_mass[nodes[use]], pos,
+                    kernel)
+
+        opened = ~accept
+        counts = tree.child_count[nodes[opened]]
+        firsts = tree.child_start[nodes[opened]]
+        targets = np.repeat(targets[opened], counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        nodes = np.repeat(firsts, counts) + offsets
+    return acc
+
+def accuracy_report(galaxy_number, thetas=(0.3, 0.5, 0.7, 1.0), universe_size=1000, seed=0):
+    """Compares Barnes-Hut accelerations and run time against direct summation.
+
+    Args:
+        galaxy_number (int): number of galaxies to place uniformly in the universe.
+        thetas (tuple): opening angles to test.
+        universe_size (int): size of observable universe.
+        seed (int): seed for the random galaxy positions and masses.
+
+    Returns:
+        list: one dict per theta with keys theta, seconds, direct_seconds,
+            median_error and max_error (relative acceleration errors).
+    """
+    import engine
+
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(0, universe_size, (galaxy_number, 2))
+    mass = rng.integers(1, 100, galaxy_number).astype(np.float64)
+    active = np.ones(galaxy_number, dtype=bool)
+
+    start = time.perf_counter()
+    exact = engine.pairwise_accelerations(pos, mass, active)
+    direct_seconds = time.perf_counter() - start
+    exact_norm = np.linalg.norm(exact, axis=1)
+
+    rows = []
+    for theta in thetas:
+        start = time.perf_counter()
+        approx = accelerations(pos, mass, active, theta)
+        seconds = time.perf_counter() - start
+        error = np.linalg.norm(approx - exact, axis=1) / exact_norm
+        rows.append({'theta': theta, 'seconds': seconds, 'direct_seconds': direct_seconds,
+                     'median_error': float(np.median(error)), 'max_error': float(error.max())})
+    return rows
+
+if __name__ == '__main__':
+    for n in (1000, 5000, 20000):
+        for row in accuracy_report(n):
+            print(f"N={n:>6} theta={row['theta']:.1f} "
+                  f"barnes_hut={row['seconds']:.3f}s direct={row['direct_seconds']:.3f}s "
+                  f"median_err={row['median_error']:.2e} max_err={row['max_error']:.2e}")
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import barnes_hut as bh
+import engine
+
+class BarnesHutTests(unittest.TestCase):
+    """Tests for barnes_hut.py module."""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.pos = rng.uniform(0, 1000, (200, 2))
+        self.mass = rng.uniform(1, 100, 200)
+        self.active = rng.random(200) < 0.9
+
+    def test_theta_zero_is_direct_sum(self):
+        """Opening every node reproduces direct summation."""
+        exact = engine.pairwise_accelerations(self.pos, self.mass, self.active)
+        approx = bh.accelerations(self.pos, self.mass, self.active, theta=0)
+
+        np.testing.assert_allclose(approx, exact, rtol=1e-9, atol=1e-12)
+
+    def test_coincident_galaxies(self):
+        """Galaxies sharing a deepest-level cell do not act on themselves."""
+        self.pos[1] = self.pos[0]
+        self.active[:2] = True
+        exact = engine.pairwise_accelerations(self.pos, self.mass, self.active)
+        approx = bh.accelerations(self.pos, self.mass, self.active, theta=0)
+
+        np.testing.assert_allclose(approx, exact, rtol=1e-9, atol=1e-12)
+
+    def test_opening_angle_accuracy(self):
+        """Typical error at the default opening angle stays around a percent."""
+        exact = engine.pairwise_accelerations(self.pos, self.mass, self.active)
+        approx = bh.accelerations(self.pos, self.mass, self.active)
+        error = (np.linalg.norm(approx - exact, axis=1)[self.active]
+                 / np.linalg.norm(exact, axis=1)[self.active])
+
+        self.assertLess(np.median(error), 0.02)
+        self.assertTrue(np.all(approx[~self.active] == 0))
+
+    def test_universe_solver_selection(self):
+        """Universe accepts the barnes_hut solver and rejects unknown ones."""
+        universe = engine.Universe(1000, self.pos, self.mass, np.zeros(200), solver='barnes_hut')
+        universe.step(0.05)
+
+        self.assertTrue(np.all(np.isfinite(universe.pos)))
+        with self.assertRaises(ValueError):
+            engine.Universe(1000, self.pos, self.mass, np.zeros(200), solver='tree')
+
+if __name__ == '__main__':
+    unittest.main()
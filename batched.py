@@ -0,0 +1,217 @@
+"""Batched module.
+
+Advances many small, independent universes together. B universes of N galaxies
+are stacked into (B, N) arrays and stepped in one array pass, with absorbed
+galaxies masked out, so per-simulation Python overhead is paid once per batch.
+
+Classes:
+    BatchedUniverse
+
+Methods:
+    batched_accelerations: accelerations in every universe of a batch.
+"""
+
+import numpy as np
+import collisions
+import initial_conditions
+import instrumentation
+from engine import ELLIPTICAL
+
+# largest number of (galaxy, galaxy) entries held in memory at once
+BLOCK_ENTRIES = 2**22
+
+def batched_accelerations(pos, mass, active, block_entries=BLOCK_ENTRIES):
+    """Accelerations on all active galaxies of a batch by direct summation. Dimensionless.
+
+    Args:
+        pos (np.ndarray): (B, N, 2) positions.
+        mass (np.ndarray): (B, N) masses.
+        active (np.ndarray): (B, N) boolean mask of galaxies taking part.
+        block_entries (int): bound on pairs per block, universes are processed in
+            blocks so memory stays bounded.
+
+    Returns:
+        np.ndarray: (B, N, 2) accelerations. Zero for inactive galaxies.
+    """
+    acc = np.zeros_like(pos)
+    count = pos.shape[1]
+    block = max(1, block_entries // max(count * count, 1))
+    source_mass = np.where(active, mass, 0)
+    for start in range(0, len(pos), block):
+        part = slice(start, start + block)
+        delta = pos[part, np.newaxis, :, :] - pos[part, :, np.newaxis, :]
+        dist_sq = np.einsum('bijk,bijk->bij', delta, delta)
+        with np.errstate(divide='ignore'):
+            inv_cube = np.where(dist_sq > 0, dist_sq**-1.5, 0)
+        weight = source_mass[part, np.newaxis, :] * inv_cube
+        acc[part] = np.einsum('bij,bijk->bik', weight, delta)
+    acc[~active] = 0
+    return acc
+
+class BatchedUniverse:
+    """Batch of independent universes of equal galaxy count, stepped together.
+
+    Parameters:
+        universe_size (int): size of observable universe, shared by the batch.
+        pos (np.ndarray): (B, N, 2) positions.
+        vel (np.ndarray): (B, N, 2) velocities.
+        mass (np.ndarray): (B, N) masses.
+        gal_type (np.ndarray): (B, N) galaxy types, SPIRAL or ELLIPTICAL.
+        active (np.ndarray): (B, N) whether each galaxy has not been absorbed.
+        visible (np.ndarray): (B, N) whether each galaxy is within bounds of universe.
+        ids (np.ndarray): (B, N) galaxy IDs within each universe.
+        time (float): elapsed simulation time.
+
+    Methods:
+        __init__: initializes BatchedUniverse object.
+        random: builds a batch of randomly initialized universes.
+        update_visible: recomputes the visible mask.
+        collide: merges every colliding pair in every universe.
+        step: evolves all universes by one time step.
+        run: evolves all universes up to a given time.
+        elliptical_ratio: ratio of elliptical to visible galaxies per universe.
+    """
+
+    def __init__(self, universe_size, pos, mass, gal_type, vel=None):
+        """Initializes BatchedUniverse object.
+
+        Args:
+            universe_size (int): size of observable universe.
+            pos (array_like): (B, N, 2) positions.
+            mass (array_like): (B, N) masses.
+            gal_type (array_like): (B, N) galaxy types, SPIRAL or ELLIPTICAL.
+            vel (array_like): (B, N, 2) velocities. Defaults to zero.
+        """
+        self.universe_size = universe_size
+        self.pos = np.array(pos, dtype=np.float64)
+        batch, count = self.pos.shape[:2]
+        self.mass = np.array(mass, dtype=np.float64)
+        self.gal_type = np.array(gal_type, dtype=np.int8)
+        if vel is None:
+            self.vel = np.zeros((batch, count, 2))
+        else:
+            self.vel = np.array(vel, dtype=np.float64)
+        self.ids = np.tile(np.arange(count), (batch, 1))
+        self.active = np.ones((batch, count), dtype=bool)
+        self.visible = np.ones((batch, count), dtype=bool)
+        self.time = 0.0
+        self.update_visible()
+
+    @classmethod
+    def random(cls, universe_size, galaxy_number, initial_type_ratios, seeds=None,
+               positions='uniform', masses='uniform'):
+        """Builds one randomly initialized universe per initial ratio.
+
+        Each universe is drawn exactly as simulate_initialize draws it, so a universe
+        seeded with s starts from the same galaxies as Universe.random with seed s.
+
+        Args:
+            universe_size (int): size of observable universe.
+            galaxy_number (int): number of galaxies per universe.
+            initial_type_ratios (array_like): initial ratio of each universe.
+            seeds (list): seed (int or np.random.SeedSequence) of each universe.
+                Defaults to the global random state.
+            positions (string or callable): position distribution, see initial_conditions.
+            masses (string or callable): mass distribution, see initial_conditions.
+
+        Returns:
+            BatchedUniverse: newly generated batch.
+        """
+        batch = len(initial_type_ratios)
+        if seeds is None:
+            seeds = [None] * batch
+        pos = np.empty((batch, galaxy_number, 2))
+        mass = np.empty((batch, galaxy_number))
+        gal_type = np.empty((batch, galaxy_number), dtype=np.int8)
+        for b, (ratio, seed) in enumerate(zip(initial_type_ratios, seeds)):
+            pos[b], mass[b], gal_type[b] = initial_conditions.sample(
+                universe_size, galaxy_number, ratio, seed, positions, masses)
+        return cls(universe_size, pos, mass, gal_type)
+
+    def update_visible(self):
+        """Recomputes which galaxies are within bounds of the observable universe."""
+        with instrumentation.phase('visibility'):
+            inside = (self.pos >= 0) & (self.pos <= self.universe_size)
+            self.visible = inside.all(axis=2)
+
+    def collide(self):
+        """Merges every colliding pair in every universe, as Universe.collide does.
+
+        Galaxies are flattened to one index space, universe b owning indices
+        b * N to (b + 1) * N - 1, so collisions.resolve_mergers merges the whole batch
+        at once while only ever pairing galaxies of the same universe.
+
+        Returns:
+            tuple of np.ndarray: flat indices of absorbing and of absorbed galaxies.
+        """
+        with instrumentation.phase('collision_detection'):
+            pairs = self._collision_pairs()
+        instrumentation.count('collision_pairs', len(pairs))
+
+        count = self.pos.shape[1]
+        flat_ids = (self.ids + np.arange(len(self.pos))[:, np.newaxis] * count).ravel()
+        flat_active = self.active.reshape(-1)
+        with instrumentation.phase('merging'):
+            keep, lose = collisions.resolve_mergers(pairs, self.pos.reshape(-1, 2),
+                                                    self.vel.reshape(-1, 2),
+                                                    self.mass.reshape(-1), flat_active, flat_ids)
+            self.gal_type.reshape(-1)[keep] = ELLIPTICAL
+        instrumentation.count('mergers', len(lose))
+        return keep, lose
+
+    def _collision_pairs(self):
+        count = self.pos.shape[1]
+        block = max(1, BLOCK_ENTRIES // max(count * count, 1))
+        pairs = []
+        for start in range(0, len(self.pos), block):
+            part = slice(start, start + block)
+            delta = self.pos[part, np.newaxis, :, :] - self.pos[part, :, np.newaxis, :]
+            dist = np.sqrt(np.einsum('bijk,bijk->bij', delta, delta))
+            radius = collisions.capture_radius(self.mass[part, :, np.newaxis],
+                                               self.mass[part, np.newaxis, :])
+            both = self.active[part, :, np.newaxis] & self.active[part, np.newaxis, :]
+            universe, first, second = np.nonzero(np.triu(dist < radius, k=1) & both)
+            universe += start
+            pairs.append(np.column_stack((universe * count + first, universe * count + second)))
+        return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.intp)
+
+    def step(self, time_step):
+        """Evolves all universes by one time step (semi-implicit Euler).
+
+        Args:
+            time_step (float): size of time step in simulation.
+        """
+        with instrumentation.step():
+            if instrumentation.enabled():
+                per_universe = np.count_nonzero(self.active, axis=1)
+                instrumentation.count('pair_interactions', int(np.sum(per_universe**2)))
+            with instrumentation.phase('forces'):
+                acc = batched_accelerations(self.pos, self.mass, self.active)
+            active = self.active[:, :, np.newaxis]
+            self.vel += np.where(active, acc * time_step, 0)
+            self.pos += np.where(active, self.vel * time_step, 0)
+            self.collide()
+            self.update_visible()
+            self.time += time_step
+
+    def run(self, time_max, time_step):
+        """Evolves all universes until time exceeds time_max.
+
+        Args:
+            time_max (float): time at which to stop.
+            time_step (float): size of time step in simulation.
+        """
+        while self.time <= time_max:
+            self.step(time_step)
+
+    def elliptical_ratio(self):
+        """Finds ratio of elliptical galaxies to total visible galaxies in each universe.
+
+        Returns:
+            np.ndarray: (B,) ratios, nan for universes with no visible galaxy left.
+        """
+        counted = self.visible & self.active
+        elliptical_galaxies = np.count_nonzero(counted & (self.gal_type == ELLIPTICAL), axis=1)
+        total_visible_galaxies = np.count_nonzero(counted, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.round(elliptical_galaxies / total_visible_galaxies, 4)
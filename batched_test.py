@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import batched
+import engine
+
+class BatchedTests(unittest.TestCase):
+    """Tests for batched.py module."""
+
+    def test_matches_independent_universes(self):
+        """A batch evolves exactly like the same universes stepped one by one."""
+        seeds = [11, 12, 13]
+        ratios = [0.0, 0.3, 0.6]
+        batch = batched.BatchedUniverse.random(300, 15, ratios, seeds)
+        universes = [engine.Universe.random(300, 15, ratio, np.random.default_rng(seed))
+                     for ratio, seed in zip(ratios, seeds)]
+
+        for _ in range(40):
+            batch.step(0.1)
+            for universe in universes:
+                universe.step(0.1)
+
+        for i, universe in enumerate(universes):
+            np.testing.assert_allclose(batch.pos[i], universe.pos)
+            np.testing.assert_array_equal(batch.active[i], universe.active)
+            self.assertEqual(batch.elliptical_ratio()[i], universe.elliptical_ratio())
+
+    def test_masked_galaxies_exert_no_force(self):
+        """Absorbed galaxies are masked out of the force sum."""
+        pos = [[(0, 0), (10, 0), (20, 0)]]
+        mass = [[1, 1, 1]]
+        batch = batched.BatchedUniverse(100, pos, mass, [[0, 0, 0]])
+        batch.active[0, 2] = False
+
+        acc = batched.batched_accelerations(batch.pos, batch.mass, batch.active)
+
+        np.testing.assert_allclose(acc[0], [(0.01, 0), (-0.01, 0), (0, 0)])
+
+    def test_empty_universe_ratio(self):
+        """Universes with no visible galaxy left report nan."""
+        batch = batched.BatchedUniverse(100, [[(500, 500)], [(50, 50)]], [[1], [1]], [[1], [1]])
+
+        np.testing.assert_array_equal(batch.elliptical_ratio(), [np.nan, 1.0])
+
+    def test_no_visible_galaxy_matches_engine(self):
+        """With every galaxy outside the box both engines report nan after stepping."""
+        pos = [(-50, -50), (150, 150), (-20, 120)]
+        universe = engine.Universe(100, pos, [1, 2, 3], [0, 1, 1])
+        batch = batched.BatchedUniverse(100, [pos], [[1, 2, 3]], [[0, 1, 1]])
+        universe.step(0.1)
+        batch.step(0.1)
+
+        self.assertTrue(np.isnan(universe.elliptical_ratio()))
+        np.testing.assert_array_equal(batch.elliptical_ratio(), [universe.elliptical_ratio()])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,432 @@
+"""Benchmarks module.
+
+Times the hot paths of the simulation across galaxy counts and fits their scaling
+exponents. Results are plain JSON tagged with the commit, Python and NumPy version,
+so two runs can be compared and slowdowns beyond a threshold reported:
+
+    python benchmarks.py run --output before.json
+    python benchmarks.py run --output after.json --plot scaling.png
+    python benchmarks.py compare before.json after.json
+
+Benchmarks:
+    gravity_force: one galaxy against N others with galaxy.gravity_force.
+    time_update: Galaxy.time_update of one galaxy against N others.
+    simulate_initialize: galaxy.simulate_initialize of N galaxies.
+    collisions: engine collision detection and merging of N galaxies.
+    step_direct: one engine step with direct summation.
+    step_barnes_hut: one engine step with the Barnes-Hut solver.
+    simulate_ratio: a short full simulate_ratio run.
+
+Classes:
+    DictGalaxy
+
+Methods:
+    time_call: best time per call of a function.
+    run_benchmarks: times benchmarks over a range of galaxy counts.
+    scaling_exponents: log-log slope of time against N per benchmark.
+    compare: slowdowns between two benchmark runs.
+    save_results: writes results as JSON.
+    load_results: reads results written by save_results.
+    plot_scaling: log-log plot of the scaling curves.
+    galaxy_footprint: memory and attribute access time of Galaxy objects.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import collisions
+import engine
+import galaxy as g
+import initial_conditions
+
+UNIVERSE_SIZE = 1000
+SIZES = (10, 100, 1000, 10000, 100000)
+# time steps of the simulate_ratio benchmark
+RATIO_STEPS = 10
+TIME_STEP = 0.05
+# slowdown factor above which compare reports a regression
+THRESHOLD = 1.25
+
+def _galaxies(n, rng):
+    return g.simulate_initialize(UNIVERSE_SIZE, n, 0.5, rng)
+
+def _universe(n, rng, **options):
+    return engine.Universe.random(UNIVERSE_SIZE, n, 0.5, rng, **options)
+
+def _gravity_force(n, rng):
+    galaxies = _galaxies(n + 1, rng)
+    target, others = galaxies[0], galaxies[1:]
+    return lambda: [g.gravity_force(target, other) for other in others]
+
+def _time_update(n, rng):
+    galaxies = _galaxies(n, rng)
+    # a light galaxy off the integer grid never collides, so the other galaxies stay
+    # active, and restoring its state makes every call do the same work
+    target = g.Galaxy(n, UNIVERSE_SIZE / 2 + 0.5, UNIVERSE_SIZE / 2 + 0.5, 1e-3, 'spiral')
+    galaxies.append(target)
+    state = {name: getattr(target, name) for name in g.Galaxy.__slots__}
+
+    def restore():
+        for name, value in state.items():
+            setattr(target, name, value)
+        return target
+    return lambda galaxy: galaxy.time_update(galaxies, UNIVERSE_SIZE, TIME_STEP), restore
+
+def _simulate_initialize(n, rng):
+    return lambda: g.simulate_initialize(UNIVERSE_SIZE, n, 0.5, rng)
+
+def _collisions(n, rng):
+    universe = _universe(n, rng)
+
+    def copy():
+        return (universe.pos.copy(), universe.vel.copy(), universe.mass.copy(),
+                universe.active.copy())
+
+    def collide(state):
+        pos, vel, mass, active = state
+        pairs = collisions.find_collisions(pos, mass, active)
+        collisions.resolve_mergers(pairs, pos, vel, mass, active, universe.ids)
+    return collide, copy
+
+def _step(solver):
+    def setup(n, rng):
+        start = _universe(n, rng)
+
+        # mergers shrink the active set, so each call steps a fresh copy of the
+        # starting state and every timing is measured at N galaxies
+        def copy():
+            return engine.Universe(UNIVERSE_SIZE, start.pos, start.mass, start.gal_type,
+                                   vel=start.vel, solver=solver)
+        return lambda universe: universe.step(TIME_STEP), copy
+    return setup
+
+def _simulate_ratio(n, rng):
+    from galaxy_collision_statistics import simulate_ratio
+
+    seed = int(rng.integers(2**32))
+    return lambda: simulate_ratio(UNIVERSE_SIZE, n, 0.5, TIME_STEP, TIME_STEP * RATIO_STEPS, seed)
+
+# name: (setup, largest N timed by default). setup(n, rng) returns the timed function,
+# or a (function, prepare) pair for benchmarks that change their inputs: each call is
+# then handed a fresh prepare() built outside the timing
+BENCHMARKS = {
+    'gravity_force': (_gravity_force, 100000),
+    'time_update': (_time_update, 100000),
+    'simulate_initialize': (_simulate_initialize, 100000),
+    'collisions': (_collisions, 100000),
+    'step_direct': (_step('direct'), 10000),
+    'step_barnes_hut': (_step('barnes_hut'), 100000),
+    'simulate_ratio': (_simulate_ratio, 1000),
+}
+
+def _timing(func, loops, prepare):
+    if prepare is None:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - start
+    states = [prepare() for _ in range(loops)]
+    start = time.perf_counter()
+    for state in states:
+        func(state)
+    return time.perf_counter() - start
+
+def time_call(func, repeat=5, min_time=0.2, prepare=None):
+    """Best time per call of func, as timeit does.
+
+    The call is looped until one timing lasts at least min_time, then repeated.
+
+    Args:
+        func (callable): function to time, called without arguments, or with the
+            result of prepare if given.
+        repeat (int): number of timings.
+        min_time (float): least duration in seconds of one timing.
+        prepare (callable): builds the argument of one call. Every call of a timing
+            gets its own, built before the timing starts.
+
+    Returns:
+        tuple: best and median seconds per call, and calls per timing.
+    """
+    loops = 1
+    while True:
+        elapsed = _timing(func, loops, prepare)
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        timings.append(_timing(func, loops, prepare) / loops)
+    return min(timings), float(np.median(timings)), loops
+
+def run_benchmarks(names=None, sizes=SIZES, repeat=5, min_time=0.2, seed=0, full=False):
+    """Times benchmarks over a range of galaxy counts.
+
+    Args:
+        names (list): benchmarks to run. Defaults to all of BENCHMARKS.
+        sizes (tuple): galaxy counts.
+        repeat (int): number of timings per point.
+        min_time (float): least duration in seconds of one timing.
+        seed (int): seed of the random galaxies.
+        full (bool): time every size, ignoring each benchmark's default largest N.
+
+    Returns:
+        list: one dict per (benchmark, n) with keys benchmark, n, seconds (best per
+            call), median and loops.
+    """
+    rows = []
+    for name in names or BENCHMARKS:
+        setup, max_n = BENCHMARKS[name]
+        for n in sizes:
+            if n > max_n and not full:
+                continue
+            func = setup(n, np.random.default_rng([seed, n]))
+            func, prepare = func if isinstance(func, tuple) else (func, None)
+            seconds, median, loops = time_call(func, repeat, min_time, prepare)
+            rows.append({'benchmark': name, 'n': n, 'seconds': seconds, 'median': median,
+                         'loops': loops})
+    return rows
+
+def scaling_exponents(results):
+    """Log-log slope of time against N per benchmark, e.g. 2 for O(N**2).
+
+    Args:
+        results (list): rows from run_benchmarks.
+
+    Returns:
+        dict: benchmark name to fitted exponent, for benchmarks timed at two or more N.
+    """
+    exponents = {}
+    for name in dict.fromkeys(row['benchmark'] for row in results):
+        rows = [row for row in results if row['benchmark'] == name]
+        if len(rows) > 1:
+            n = np.log([row['n'] for row in rows])
+            seconds = np.log([row['seconds'] for row in rows])
+            exponents[name] = float(np.polyfit(n, seconds, 1)[0])
+    return exponents
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Slowdowns between two benchmark runs.
+
+    Args:
+        baseline (list): rows of the reference run.
+        current (list): rows of the run to check.
+        threshold (float): ratio of current to baseline time counted as a regression.
+
+    Returns:
+        list: one dict per (benchmark, n) timed in both runs, with keys benchmark, n,
+            baseline, current, ratio and regression, slowest ratio first.
+    """
+    reference = {(row['benchmark'], row['n']): row['seconds'] for row in baseline}
+    rows = []
+    for row in current:
+        key = (row['benchmark'], row['n'])
+        if key in reference:
+            ratio = row['seconds'] / reference[key]
+            rows.append({'benchmark': key[0], 'n': key[1], 'baseline': reference[key],
+                         'current': row['seconds'], 'ratio': ratio,
+                         'regression': ratio > threshold})
+    return sorted(rows, key=lambda row: row['ratio'], reverse=True)
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(results, path):
+    """Writes results as JSON, with the commit and environment they were measured on.
+
+    Args:
+        results (list): rows from run_benchmarks.
+        path (string): destination file.
+    """
+    document = {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'results': results,
+        'scaling': scaling_exponents(results),
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=1)
+
+def load_results(path):
+    """Reads results written by save_results.
+
+    Args:
+        path (string): file written by save_results.
+
+    Returns:
+        list: rows as returned by run_benchmarks.
+    """
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+def plot_scaling(results, path=None):
+    """Log-log plot of time per call against N, one curve per benchmark.
+
+    Args:
+        results (list): rows from run_benchmarks.
+        path (string): file to save the plot to. Shows it in a window if None.
+    """
+    import matplotlib.pyplot as plt
+
+    exponents = scaling_exponents(results)
+    fig, ax = plt.subplots()
+    for name in dict.fromkeys(row['benchmark'] for row in results):
+        rows = [row for row in results if row['benchmark'] == name]
+        label = f'{name} (N^{exponents[name]:.2f})' if name in exponents else name
+        ax.loglog([row['n'] for row in rows], [row['seconds'] for row in rows], 'o-',
+                  label=label)
+    ax.set_xlabel('Number of galaxies')
+    ax.set_ylabel('Seconds per call')
+    ax.legend()
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+    plt.close(fig)
+
+class DictGalaxy:
+    """Reference galaxy with a per-instance __dict__ and the type kept as a string.
+
+    Mirrors the attributes of Galaxy before it gained __slots__, so galaxy_footprint
+    can compare the two layouts.
+
+    Methods:
+        __init__: initializes DictGalaxy object.
+    """
+
+    def __init__(self, id_, x_pos, y_pos, mass, gal_type):
+        """Initializes DictGalaxy object.
+
+        Args:
+            id_ (int): convenient way to ID a specific galaxy.
+            x_pos (float): x component of position.
+            y_pos (float): y component of position.
+            mass (int): mass of galaxy.
+            gal_type (string): either spiral or elliptical.
+        """
+        self.id_ = id_
+        self.x_pos = x_pos
+        self.y_pos = y_pos
+        self.v_x = 0
+        self.v_y = 0
+        self.mass = mass
+        self.gal_type = gal_type
+        self.active = True
+        self.in_visible_universe = True
+        self.color = 'r' if gal_type == 'elliptical' else 'b'
+
+def _object_footprint(cls, galaxy_number, seed):
+    """Bytes per object and nanoseconds per x_pos and gal_type read of a galaxy class."""
+    pos, mass, gal_type = initial_conditions.sample(UNIVERSE_SIZE, galaxy_number, 0.5,
+                                                    np.random.default_rng(seed))
+    rows = list(zip(pos.tolist(), mass.tolist(), gal_type.tolist()))
+    tracemalloc.start()
+    galaxies = [cls(i, x_pos, y_pos, galaxy_mass, g.GAL_TYPES[code])
+                for i, ((x_pos, y_pos), galaxy_mass, code) in enumerate(rows)]
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for galaxy in galaxies:
+        galaxy.x_pos  # pylint: disable=pointless-statement
+    position_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for galaxy in galaxies:
+        galaxy.gal_type  # pylint: disable=pointless-statement
+    type_seconds = time.perf_counter() - start
+    return (object_bytes / galaxy_number, 1e9 * position_seconds / galaxy_number,
+            1e9 * type_seconds / galaxy_number, galaxies)
+
+def galaxy_footprint(galaxy_number=10**6, seed=0):
+    """Memory and attribute access time of Galaxy objects against engine arrays.
+
+    Both Galaxy and the dict-backed DictGalaxy are built from the same draws.
+
+    Args:
+        galaxy_number (int): number of galaxies to create.
+        seed (int): seed of the random galaxies.
+
+    Returns:
+        dict: bytes per galaxy of a list of DictGalaxy objects, of a list of Galaxy
+            objects and of a Universe's arrays, and nanoseconds per read of x_pos
+            and gal_type of both classes and of Galaxy.type_code.
+    """
+    dict_bytes, dict_position_ns, dict_type_ns, _ = _object_footprint(DictGalaxy,
+                                                                       galaxy_number, seed)
+    galaxy_bytes, position_ns, type_ns, galaxies = _object_footprint(g.Galaxy, galaxy_number,
+                                                                     seed)
+    start = time.perf_counter()
+    for galaxy in galaxies:
+        galaxy.type_code  # pylint: disable=pointless-statement
+    code_seconds = time.perf_counter() - start
+
+    universe = engine.Universe.from_galaxies(galaxies, UNIVERSE_SIZE)
+    array_bytes = sum(getattr(universe, name).nbytes
+                      for name in ('ids', 'pos', 'vel', 'mass', 'gal_type', 'active', 'visible'))
+    return {'dict_bytes': dict_bytes,
+            'galaxy_bytes': galaxy_bytes,
+            'array_bytes': array_bytes / galaxy_number,
+            'dict_x_pos_ns': dict_position_ns,
+            'x_pos_ns': position_ns,
+            'dict_gal_type_ns': dict_type_ns,
+            'gal_type_ns': type_ns,
+            'type_code_ns': 1e9 * code_seconds / galaxy_number}
+
+def main(argv=None):
+    """Command line entry point. Returns 1 if compare finds a regression."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='time the benchmarks')
+    run.add_argument('--benchmarks', nargs='+', choices=tuple(BENCHMARKS))
+    run.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    run.add_argument('--repeat', type=int, default=5)
+    run.add_argument('--min-time', type=float, default=0.2)
+    run.add_argument('--full', action='store_true',
+                     help='time every size, even past a benchmark\'s default largest N')
+    run.add_argument('--output', help='JSON file to write the results to')
+    run.add_argument('--plot', help='image file to save the scaling curves to')
+    footprint = commands.add_parser('footprint', help='memory per Galaxy object')
+    footprint.add_argument('--galaxies', type=int, default=10**6)
+    check = commands.add_parser('compare', help='report slowdowns between two runs')
+    check.add_argument('baseline')
+    check.add_argument('current')
+    check.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(args.benchmarks, args.sizes, args.repeat, args.min_time,
+                                 full=args.full)
+        for row in results:
+            print(f"{row['benchmark']:>20} N={row['n']:>6} {row['seconds']:.3e}s")
+        for name, exponent in scaling_exponents(results).items():
+            print(f'{name:>20} scales as N^{exponent:.2f}')
+        if args.output:
+            save_results(results, args.output)
+        if args.plot:
+            plot_scaling(results, args.plot)
+        return 0
+
+    if args.command == 'footprint':
+        for name, value in galaxy_footprint(args.galaxies).items():
+            print(f'{name:>16} {value:.1f}')
+        return 0
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['benchmark']:>20} N={row['n']:>6} {row['baseline']:.3e}s -> "
+              f"{row['current']:.3e}s x{row['ratio']:.2f} {flag}")
+    return int(any(row['regression'] for row in rows))
+
+if __name__ == '__main__':
+    sys.exit(main())
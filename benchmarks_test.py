@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import benchmarks
+import engine
+
+class BenchmarksTests(unittest.TestCase):
+    """Tests for benchmarks.py module."""
+
+    def test_run_and_scaling(self):
+        """Every benchmark runs at small N and yields one row per size and an exponent."""
+        results = benchmarks.run_benchmarks(sizes=(10, 20), repeat=2, min_time=0)
+
+        self.assertEqual(len(results), 2 * len(benchmarks.BENCHMARKS))
+        self.assertTrue(all(row['seconds'] > 0 for row in results))
+        self.assertEqual(set(benchmarks.scaling_exponents(results)), set(benchmarks.BENCHMARKS))
+
+    def test_step_timed_at_n(self):
+        """Every timed step starts from N active galaxies, however many merged before."""
+        counts = []
+        step = engine.Universe.step
+
+        def counting_step(universe, time_step):
+            counts.append(universe.active_count)
+            step(universe, time_step)
+
+        func, prepare = benchmarks.BENCHMARKS['step_direct'][0](500, np.random.default_rng(0))
+        with mock.patch.object(engine.Universe, 'step', counting_step):
+            for _ in range(3):
+                func(prepare())
+
+        self.assertEqual(counts, [500] * 3)
+
+    def test_prepare_runs_outside_timing(self):
+        """Work done by prepare is not counted in the time per call."""
+        seconds, _, loops = benchmarks.time_call(lambda state: None, repeat=2, min_time=0,
+                                                 prepare=lambda: time.sleep(0.01))
+
+        self.assertEqual(loops, 1)
+        self.assertLess(seconds, 0.005)
+
+    def test_scaling_exponent_of_synthetic_curve(self):
+        """A quadratic cost curve fits an exponent of 2."""
+        results = [{'benchmark': 'square', 'n': n, 'seconds': 1e-9 * n**2} for n in (10, 100, 1000)]
+
+        self.assertAlmostEqual(benchmarks.scaling_exponents(results)['square'], 2)
+
+    def test_footprint_reports_both_layouts(self):
+        """The dict-backed reference takes more memory per galaxy than the slots class."""
+        footprint = benchmarks.galaxy_footprint(5000)
+
+        self.assertGreater(footprint['dict_bytes'], footprint['galaxy_bytes'])
+        self.assertGreater(footprint['galaxy_bytes'], footprint['array_bytes'])
+        self.assertTrue(all(footprint[key] > 0 for key in ('dict_x_pos_ns', 'x_pos_ns',
+                                                           'dict_gal_type_ns', 'gal_type_ns')))
+
+    def test_compare_round_trip(self):
+        """Saved results load back and slowdowns past the threshold are flagged."""
+        baseline = [{'benchmark': 'step', 'n': 10, 'seconds': 1.0},
+                    {'benchmark': 'step', 'n': 100, 'seconds': 2.0}]
+        current = [{'benchmark': 'step', 'n': 10, 'seconds': 1.1},
+                   {'benchmark': 'step', 'n': 100, 'seconds': 3.0},
+                   {'benchmark': 'new', 'n': 10, 'seconds': 1.0}]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            benchmarks.save_results(baseline, path)
+            rows = benchmarks.compare(benchmarks.load_results(path), current, threshold=1.25)
+
+        self.assertEqual([(row['n'], row['regression']) for row in rows], [(100, True), (10, False)])
+
+if __name__ == '__main__':
+    unittest.main()
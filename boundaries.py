@@ -0,0 +1,70 @@
+"""Boundaries module.
+
+Boundary conditions of the observable universe, the square [0, universe_size]**2.
+Each mode is applied to all galaxies at once with vectorized masks.
+
+    open: galaxies leave the box and keep interacting, as in the original model.
+    cull: open, but galaxies further than a margin outside the box are retired:
+        they stop exerting and feeling forces and cannot collide, so the active set
+        shrinks over long runs and steps get cheaper.
+    periodic: the box wraps around. Positions are kept inside it and forces and
+        collisions use the nearest periodic image of every other galaxy.
+    reflective: galaxies bounce off the walls.
+
+Methods:
+    minimum_image: wraps separations to the nearest periodic image.
+    apply_boundary: applies a boundary mode to positions and velocities in place.
+"""
+
+import numpy as np
+
+BOUNDARIES = ('open', 'cull', 'periodic', 'reflective')
+
+def minimum_image(delta, period):
+    """Wraps separations to the nearest periodic image, in place.
+
+    Args:
+        delta (np.ndarray): separations, any shape.
+        period (float): side of the periodic box, or None for no wrapping.
+
+    Returns:
+        np.ndarray: delta.
+    """
+    if period is not None:
+        delta -= period * np.round(delta / period)
+    return delta
+
+def apply_boundary(boundary, pos, vel, active, universe_size, margin):
+    """Applies a boundary mode to the active galaxies, modifying arrays in place.
+
+    Args:
+        boundary (string): one of BOUNDARIES.
+        pos (np.ndarray): (N, 2) array of positions.
+        vel (np.ndarray): (N, 2) array of velocities.
+        active (np.ndarray): (N,) boolean mask of galaxies taking part.
+        universe_size (float): side of the box.
+        margin (float): distance outside the box beyond which the cull mode retires
+            a galaxy.
+
+    Returns:
+        tuple: indices of galaxies that escaped the cull margin (empty for the other
+            modes), which the caller retires, and whether any galaxy was reflected.
+    """
+    escaped = np.empty(0, dtype=np.intp)
+    reflected = False
+    if boundary == 'cull':
+        outside = (pos < -margin) | (pos > universe_size + margin)
+        escaped = np.flatnonzero(active & outside.any(axis=1))
+    elif boundary == 'periodic':
+        moving = active[:, np.newaxis]
+        np.copyto(pos, np.mod(pos, universe_size), where=moving)
+    elif boundary == 'reflective':
+        moving = active[:, np.newaxis]
+        low = moving & (pos < 0)
+        high = moving & (pos > universe_size)
+        np.copyto(pos, -pos, where=low)
+        np.copyto(pos, 2 * universe_size - pos, where=high)
+        bounced = low | high
+        np.copyto(vel, -vel, where=bounced)
+        reflected = bool(bounced.any())
+    return escaped, reflected
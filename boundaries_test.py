@@ -0,0 +1,132 @@
+import unittest
+import numpy as np
+import backends
+import boundaries
+import collisions
+import engine
+
+class BoundariesTests(unittest.TestCase):
+    """Tests for boundaries.py module and the engine's boundary modes."""
+
+    def test_minimum_image(self):
+        """Separations wrap to the nearest image, and half a box apart to opposite signs."""
+        delta = np.array([[30.0, -70.0], [50.0, -50.0], [150.0, -250.0]])
+        wrapped = boundaries.minimum_image(delta, 100)
+
+        self.assertIs(wrapped, delta)
+        np.testing.assert_array_equal(wrapped, [[30, 30], [50, -50], [-50, -50]])
+        np.testing.assert_array_equal(boundaries.minimum_image(np.array([70.0]), None), [70])
+
+    def test_apply_boundary_modes(self):
+        """Each mode moves only active galaxies, and only cull reports escapes."""
+        start = np.array([[-30.0, 50.0], [105.0, 50.0], [50.0, 50.0], [-30.0, 50.0]])
+        active = np.array([True, True, True, False])
+        expected = {
+            'open': (start, [], False),
+            'cull': (start, [0], False),
+            'periodic': ([[70, 50], [5, 50], [50, 50], [-30, 50]], [], False),
+            'reflective': ([[30, 50], [95, 50], [50, 50], [-30, 50]], [], True),
+        }
+        for boundary, (pos, escaped, reflected) in expected.items():
+            with self.subTest(boundary=boundary):
+                state_pos = start.copy()
+                state_vel = np.ones((4, 2))
+                result = boundaries.apply_boundary(boundary, state_pos, state_vel, active,
+                                                   100, 20)
+
+                np.testing.assert_allclose(state_pos, pos)
+                np.testing.assert_array_equal(result[0], escaped)
+                self.assertEqual(result[1], reflected)
+                if reflected:
+                    np.testing.assert_array_equal(state_vel[:, 0], [-1, -1, 1, 1])
+
+    def test_cull_retires_escaped_galaxies(self):
+        """Galaxies beyond the margin stop taking part and are counted as escaped."""
+        universe = engine.Universe(100, [(50, 50), (60, 50), (95, 50)], [1, 1, 1], [0, 0, 1],
+                                   vel=[(0, 0), (0, 0), (150, 0)], boundary='cull', margin=20)
+        universe.step(0.1)
+        self.assertTrue(universe.active[2])
+        universe.step(0.1)
+
+        self.assertFalse(universe.active[2])
+        self.assertTrue(universe.escaped[2])
+        self.assertEqual(universe.population().escaped, 1)
+        self.assertEqual(universe.population().mergers, 0)
+        self.assertEqual(universe.active_count, 2)
+        np.testing.assert_array_equal(universe.accelerations()[2], 0)
+
+    def test_periodic_forces_and_collisions_use_nearest_image(self):
+        """Galaxies on opposite edges attract and merge across the boundary."""
+        universe = engine.Universe(100, [(1, 50), (98, 50)], [10, 2], [0, 0],
+                                   boundary='periodic')
+        acc = universe.accelerations()
+
+        self.assertLess(acc[0, 0], 0)
+        self.assertGreater(acc[1, 0], 0)
+        keep, lose = universe.collide()
+        self.assertEqual((len(keep), len(lose)), (1, 1))
+
+    def test_periodic_wraps_positions(self):
+        """Positions stay inside the box, so every galaxy stays visible."""
+        universe = engine.Universe(100, [(99, 99)], [1], [0], vel=[(30, 30)],
+                                   boundary='periodic')
+        universe.step(0.1)
+
+        np.testing.assert_allclose(universe.pos[0], [2, 2])
+        self.assertEqual(universe.visible_count, 1)
+
+    def test_reflective_bounces(self):
+        """A galaxy crossing a wall is mirrored back with its velocity reversed."""
+        universe = engine.Universe(100, [(99, 50)], [1], [0], vel=[(20, 0)],
+                                   boundary='reflective')
+        universe.step(0.1)
+
+        np.testing.assert_allclose(universe.pos[0], [99, 50])
+        np.testing.assert_allclose(universe.vel[0], [-20, 0])
+
+    def test_periodic_grid_matches_brute_force(self):
+        """The wrapped grid broad phase finds the same collisions as testing all pairs."""
+        rng = np.random.default_rng(3)
+        pos = rng.uniform(0, 200, (400, 2))
+        mass = rng.uniform(1, 5, 400)
+        active = np.ones(400, dtype=bool)
+        grid = collisions.find_collisions(pos, mass, active, 'grid', period=200)
+        brute = collisions.find_collisions(pos, mass, active, 'brute', period=200)
+
+        self.assertGreater(len(brute), 0)
+        self.assertEqual(set(map(tuple, grid)), set(map(tuple, brute)))
+
+    @unittest.skipIf(backends.numba is None, 'numba is not installed')
+    def test_numba_periodic_matches_numpy(self):
+        """The Numba kernels apply the minimum image like the NumPy ones."""
+        rng = np.random.default_rng(4)
+        pos = rng.uniform(0, 100, (50, 2))
+        mass = rng.uniform(1, 10, 50)
+        active = np.ones(50, dtype=bool)
+        numpy_backend = backends.NumpyBackend()
+        numba_backend = backends.NumbaBackend()
+
+        np.testing.assert_allclose(numba_backend.accelerations(pos, mass, active, period=100),
+                                   numpy_backend.accelerations(pos, mass, active, period=100))
+        self.assertEqual(set(map(tuple, numba_backend.find_collisions(pos, mass, active, 100))),
+                         set(map(tuple, numpy_backend.find_collisions(pos, mass, active, 100))))
+
+    @unittest.skipIf(backends.numba is None, 'numba is not installed')
+    def test_numba_half_box_forces_opposite(self):
+        """A pair exactly half a box apart pulls each galaxy the opposite way."""
+        pos = np.array([[100.0, 50.0], [600.0, 50.0]])
+        mass = np.ones(2)
+        active = np.ones(2, dtype=bool)
+        acc = backends.NumbaBackend().accelerations(pos, mass, active, period=1000)
+
+        np.testing.assert_allclose(acc[0], -acc[1])
+        np.testing.assert_allclose(acc, backends.NumpyBackend().accelerations(pos, mass, active,
+                                                                              period=1000))
+
+    def test_periodic_barnes_hut_rejected(self):
+        """Periodic boundaries are refused with the Barnes-Hut solver."""
+        with self.assertRaises(ValueError):
+            engine.Universe(100, [(1, 1)], [1], [0], solver='barnes_hut', boundary='periodic')
+
+if __name__ == '__main__':
+    unittest.main()
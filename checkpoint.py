@@ -0,0 +1,127 @@
+"""Checkpoint module.
+
+Saves and restores the full state of a Universe as a compact .npz snapshot:
+the galaxy arrays, time, engine settings and, optionally, the state of a random
+number generator. Restoring a snapshot and carrying on gives bit-for-bit the same
+run as never stopping, so long jobs can be preempted and resumed.
+
+Methods:
+    save_checkpoint: writes a snapshot of a universe.
+    load_checkpoint: restores a universe from a snapshot.
+    run_with_checkpoints: runs a universe, writing periodic snapshots.
+"""
+
+import json
+import os
+import numpy as np
+import engine
+import integrators
+import kernels
+
+CHECKPOINT_VERSION = 1
+ARRAYS = ('ids', 'pos', 'vel', 'mass', 'gal_type', 'active', 'visible', 'escaped')
+
+def save_checkpoint(universe, path, rng=None, compress=True):
+    """Writes a snapshot of a universe.
+
+    The file is written next to path and moved into place, so an interrupted save
+    never leaves a truncated checkpoint behind.
+
+    Args:
+        universe (engine.Universe): universe to save.
+        path (string): destination .npz file.
+        rng (np.random.Generator): generator whose state is saved with the universe.
+        compress (bool): whether to zip-compress the arrays.
+    """
+    integrator = universe.integrator
+    settings = {
+        'version': CHECKPOINT_VERSION,
+        'universe_size': np.asarray(universe.universe_size).item(),
+        'time': universe.time.hex(),
+        'mergers': universe.merger_count,
+        'boundary': universe.boundary,
+        'margin': universe.margin,
+        'kernel': universe.kernel.settings(),
+        'precision': universe.precision,
+        'solver': universe.solver,
+        'theta': universe.theta,
+        'backend': universe.backend.name,
+        'integrator': integrator.name,
+        'integrator_params': vars(integrator),
+        'rng': None if rng is None else rng.bit_generator.state,
+    }
+    arrays = {name: getattr(universe, name) for name in ARRAYS}
+    if universe.acc is not None:
+        arrays['acc'] = universe.acc
+    temporary = f'{path}.tmp.npz'
+    save = np.savez_compressed if compress else np.savez
+    save(temporary, settings=np.array(json.dumps(settings)), **arrays)
+    os.replace(temporary, path)
+
+def load_checkpoint(path):
+    """Restores a universe from a snapshot.
+
+    Args:
+        path (string): .npz file written by save_checkpoint.
+
+    Returns:
+        tuple: the restored engine.Universe and the restored np.random.Generator
+            (None if no generator was saved).
+
+    Raises:
+        ValueError: if the file was written by an unsupported checkpoint version.
+    """
+    with np.load(path) as snapshot:
+        settings = json.loads(str(snapshot['settings']))
+        if settings['version'] != CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported checkpoint version {settings['version']}")
+        integrator = integrators.INTEGRATORS[settings['integrator']](
+            **settings['integrator_params'])
+        universe = engine.Universe(settings['universe_size'], snapshot['pos'], snapshot['mass'],
+                                   snapshot['gal_type'], vel=snapshot['vel'],
+                                   ids=snapshot['ids'], solver=settings['solver'],
+                                   theta=settings['theta'], backend=settings['backend'],
+                                   integrator=integrator,
+                                   boundary=settings.get('boundary', 'open'),
+                                   margin=settings.get('margin'),
+                                   kernel=kernels.ForceKernel(**settings.get('kernel', {})),
+                                   precision=settings.get('precision', 'double'))
+        universe.active = snapshot['active'].copy()
+        universe.visible = snapshot['visible'].copy()
+        if 'escaped' in snapshot:
+            universe.escaped = snapshot['escaped'].copy()
+        universe.recount()
+        if 'acc' in snapshot:
+            universe.acc = snapshot['acc'].copy()
+    universe.time = float.fromhex(settings['time'])
+    universe.merger_count = settings['mergers']
+    universe.escaped_count = int(np.count_nonzero(universe.escaped))
+
+    rng = None
+    if settings['rng'] is not None:
+        bit_generator = getattr(np.random, settings['rng']['bit_generator'])()
+        bit_generator.state = settings['rng']
+        rng = np.random.Generator(bit_generator)
+    return universe, rng
+
+def run_with_checkpoints(universe, time_max, time_step, path, interval=100, rng=None):
+    """Runs a universe like Universe.run, saving a snapshot every interval steps.
+
+    A final snapshot is written when the run ends. To resume a preempted run, load
+    the snapshot with load_checkpoint and call this again with the same arguments.
+
+    Args:
+        universe (engine.Universe): universe to run.
+        time_max (float): time at which to stop.
+        time_step (float): size of time step in simulation.
+        path (string): destination .npz file, overwritten at each snapshot.
+        interval (int): number of steps between snapshots.
+        rng (np.random.Generator): generator whose state is saved with the universe.
+    """
+    steps = 0
+    while universe.time <= time_max:
+        universe.step(time_step)
+        steps += 1
+        if steps % interval == 0:
+            save_checkpoint(universe, path, rng)
+    save_checkpoint(universe, path, rng)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import checkpoint
+import engine
+
+class CheckpointTests(unittest.TestCase):
+    """Tests for checkpoint.py module."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'run.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_restart_is_bit_for_bit(self):
+        """Stopping, saving, loading and carrying on matches an uninterrupted run."""
+        for integrator in ('euler', 'block'):
+            straight = engine.Universe.random(300, 30, 0.3, np.random.default_rng(2),
+                                              integrator=integrator)
+            resumed = engine.Universe.random(300, 30, 0.3, np.random.default_rng(2),
+                                             integrator=integrator)
+            for _ in range(30):
+                straight.step(0.1)
+                resumed.step(0.1)
+            checkpoint.save_checkpoint(resumed, self.path)
+            resumed, _ = checkpoint.load_checkpoint(self.path)
+            for _ in range(30):
+                straight.step(0.1)
+                resumed.step(0.1)
+
+            for name in checkpoint.ARRAYS:
+                np.testing.assert_array_equal(getattr(resumed, name), getattr(straight, name))
+            self.assertEqual(resumed.time, straight.time)
+            self.assertEqual(resumed.integrator.name, integrator)
+
+    def test_rng_state_restored(self):
+        """The generator continues the same stream after a restart."""
+        rng = np.random.default_rng(5)
+        rng.random(3)
+        checkpoint.save_checkpoint(engine.Universe(100, [(1, 1)], [1], [0]), self.path, rng)
+        expected = rng.random(3)
+
+        _, restored = checkpoint.load_checkpoint(self.path)
+
+        np.testing.assert_array_equal(restored.random(3), expected)
+
+    def test_run_with_checkpoints(self):
+        """Periodic checkpoints end with the final state of the run."""
+        universe = engine.Universe.random(300, 10, 0.5, np.random.default_rng(1))
+        checkpoint.run_with_checkpoints(universe, 1.0, 0.1, self.path, interval=3)
+
+        restored, rng = checkpoint.load_checkpoint(self.path)
+
+        self.assertIsNone(rng)
+        self.assertEqual(restored.time, universe.time)
+        np.testing.assert_array_equal(restored.pos, universe.pos)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,274 @@
+"""Command line module.
+
+Headless entry point for batch runs. Every option can be given on the command
+line or in a JSON or TOML config file, with the command line taking precedence:
+
+    python cli.py sweep --config study.toml --workers 16 --output results.csv
+    python cli.py run --galaxies 500 --kernel plummer --softening 5 --mergers run.mergers
+
+where study.toml holds e.g.
+
+    galaxies = 50
+    ratios = [0.0, 0.1, 0.2, 0.3]
+    replicates = 10
+    time_max = 120
+
+Nothing opens a window unless --show is given; plots and videos are written with
+the Agg backend, and matplotlib is only imported when something is drawn, so
+workers on batch nodes start quickly.
+
+    sweep: runs simulate_ratio over a grid of initial ratios, see sweep.
+    run: runs one universe, writing any of a trajectory, merger log, population
+        series, checkpoint, video or trace.
+
+Methods:
+    load_config: reads a JSON or TOML config file.
+    build_parser: the argument parser.
+    parse_args: parses arguments, with defaults from a config file.
+    main: command line entry point.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import numpy as np
+import galaxy_collision_statistics as statistics
+import galaxy_collisions as collisions_driver
+import instrumentation
+import sweep
+
+# engine options forwarded to engine.Universe when given
+ENGINE_OPTIONS = ('solver', 'theta', 'backend', 'integrator', 'boundary', 'kernel', 'softening',
+                  'units', 'precision', 'positions', 'masses')
+
+def load_config(path):
+    """Reads a config file of option names (with underscores) and values.
+
+    Args:
+        path (string): .json or .toml file.
+
+    Returns:
+        dict: the options.
+
+    Raises:
+        ValueError: if the file type is not supported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    if extension == '.toml':
+        import tomllib
+        with open(path, 'rb') as file:
+            return tomllib.load(file)
+    raise ValueError(f'unsupported config file {path!r}, expected .json or .toml')
+
+def _units(value):
+    """A name in kernels.UNITS, or a number taken as the value of G."""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def _add_engine_options(parser):
+    engine_options = parser.add_argument_group('engine')
+    engine_options.add_argument('--solver', choices=('direct', 'barnes_hut'))
+    engine_options.add_argument('--theta', type=float, help='Barnes-Hut opening angle')
+    engine_options.add_argument('--backend', choices=('numpy', 'numba', 'auto'))
+    engine_options.add_argument('--integrator',
+                                choices=('euler', 'leapfrog', 'adaptive', 'block'))
+    engine_options.add_argument('--boundary', choices=('open', 'cull', 'periodic', 'reflective'))
+    engine_options.add_argument('--kernel', choices=('newtonian', 'plummer', 'spline'))
+    engine_options.add_argument('--softening', type=float)
+    engine_options.add_argument('--units', type=_units,
+                                help='units of G, e.g. galactic (see kernels), or the value of G')
+    engine_options.add_argument('--precision', choices=('double', 'single', 'mixed'))
+    engine_options.add_argument('--positions', help='initial position distribution')
+    engine_options.add_argument('--masses', help='initial mass distribution')
+
+def build_parser():
+    """The argument parser of the command line.
+
+    Returns:
+        tuple: the argparse.ArgumentParser and a dict of its command parsers by name.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', help='JSON or TOML file of default option values')
+    common.add_argument('--universe-size', type=int)
+    common.add_argument('--time-step', type=float)
+    common.add_argument('--time-max', type=float)
+    common.add_argument('--seed', type=int)
+    common.add_argument('--profile', help='file to write a Chrome trace of the run to')
+    common.add_argument('--show', action='store_true', help='open a window')
+
+    run_sweep = commands.add_parser('sweep', parents=[common], help='sweep initial ratios')
+    run_sweep.add_argument('--galaxies', type=int)
+    run_sweep.add_argument('--ratios', nargs='+', type=float, help='initial ratios')
+    run_sweep.add_argument('--replicates', type=int, default=1)
+    run_sweep.add_argument('--workers', type=int, help='worker processes, default every core')
+    run_sweep.add_argument('--batch-size', type=int,
+                           help='universes stepped together per worker, default engine only')
+    run_sweep.add_argument('--cache', help='result cache directory')
+    run_sweep.add_argument('--no-cache', action='store_true')
+    run_sweep.add_argument('--output', help='.csv or .json file to write the results to')
+    run_sweep.add_argument('--plot', help='image file to save the plot to')
+    _add_engine_options(run_sweep)
+    run_sweep.set_defaults(universe_size=statistics.UNIVERSE_SIZE,
+                           galaxies=statistics.GALAXY_NUMBER,
+                           ratios=statistics.initial_type_ratios.tolist(),
+                           time_step=statistics.TIME_STEP, time_max=statistics.TIME_MAX,
+                           seed=statistics.SEED, cache=statistics.CACHE_PATH)
+
+    run = commands.add_parser('run', parents=[common], help='run one universe')
+    run.add_argument('--galaxies', type=int)
+    run.add_argument('--ratio', type=float, help='initial ratio of elliptical galaxies')
+    run.add_argument('--trajectory', help='directory to record the trajectory to')
+    run.add_argument('--mergers', help='directory to record the merger log to')
+    run.add_argument('--series', help='.csv file to write the population every step to')
+    run.add_argument('--checkpoint', help='.npz file to save the final state to')
+    run.add_argument('--video', help='file to encode the run to, e.g. run.mp4')
+    _add_engine_options(run)
+    run.set_defaults(universe_size=collisions_driver.UNIVERSE_SIZE,
+                     galaxies=collisions_driver.GALAXY_NUMBER,
+                     ratio=collisions_driver.INITIAL_TYPE_RATIO,
+                     time_step=collisions_driver.TIME_STEP, time_max=collisions_driver.TIME_MAX)
+    return parser, {'sweep': run_sweep, 'run': run}
+
+def parse_args(argv=None):
+    """Parses arguments, taking defaults from the --config file if one is given.
+
+    Args:
+        argv (list): arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: the options.
+    """
+    parser, commands = build_parser()
+    args = parser.parse_args(argv)
+    if args.config is None:
+        return args
+    config = load_config(args.config)
+    command = commands[args.command]
+    known = set(vars(command.parse_args([])))
+    unknown = sorted(set(config) - known)
+    if unknown:
+        parser.error(f'unknown options in {args.config}: {", ".join(unknown)}')
+    command.set_defaults(**config)
+    return parser.parse_args(argv)
+
+def _engine_options(args):
+    return {name: getattr(args, name) for name in ENGINE_OPTIONS
+            if getattr(args, name) is not None}
+
+def _write_rows(path, fields, rows):
+    if path.endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump([dict(zip(fields, row)) for row in rows], file, indent=1)
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        writer.writerows(rows)
+
+def _sweep(args):
+    import result_cache
+
+    options = _engine_options(args)
+    if args.batch_size is not None and options:
+        raise SystemExit('--batch-size runs the batched engine, which takes no engine options')
+    cache = None
+    if args.cache is not None and not args.no_cache:
+        cache = result_cache.ResultCache(args.cache)
+    # profiling runs the sweep in this process, as worker processes are not instrumented
+    workers = 1 if args.profile else args.workers
+    results = sorted(sweep.run_sweep(args.ratios, args.universe_size, args.galaxies,
+                                     args.time_step, args.time_max,
+                                     replicates=args.replicates, seed=args.seed,
+                                     workers=workers, batch_size=args.batch_size, cache=cache,
+                                     **options))
+    if args.output:
+        _write_rows(args.output, sweep.SweepResult._fields, results)
+    else:
+        for result in results:
+            print(f'{result.initial_type_ratio:.4f} {result.replicate:>4} '
+                  f'{result.elliptical_ratio:.4f}')
+    if args.plot or args.show:
+        statistics.plot_ratios(results, args.time_step, args.time_max, args.plot)
+
+def _run(args):
+    import engine
+    import mergers
+    import trajectory
+
+    options = _engine_options(args)
+    rng = None if args.seed is None else np.random.default_rng(args.seed)
+    universe = engine.Universe.random(args.universe_size, args.galaxies, args.ratio, rng,
+                                      **options)
+    frame_count = int(args.time_max / args.time_step)
+    if args.video or args.show:
+        if args.mergers or args.series or args.checkpoint:
+            raise SystemExit('--video and --show only record a trajectory; '
+                             'run without them for the other outputs')
+        import render
+
+        writer = None
+        if args.trajectory:
+            writer = trajectory.TrajectoryWriter(args.trajectory, args.galaxies,
+                                                 float_dtype=universe.dtype)
+        try:
+            if args.video:
+                render.encode_video(universe, args.video, args.time_step, frame_count,
+                                    recorder=writer)
+            else:
+                collisions_driver.animate(universe, args.time_step, frame_count, writer=writer)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    writer = None
+    if args.trajectory:
+        writer = trajectory.TrajectoryWriter(args.trajectory, args.galaxies,
+                                             float_dtype=universe.dtype)
+    log = mergers.MergerLog(args.mergers) if args.mergers else None
+    series = engine.PopulationSeries() if args.series else None
+    try:
+        universe.run(args.time_max, args.time_step, trajectory=writer, series=series,
+                     mergers=log)
+    finally:
+        for output in (writer, log):
+            if output is not None:
+                output.close()
+    if series is not None:
+        _write_rows(args.series, series.data.dtype.names, series.data.tolist())
+    if args.checkpoint:
+        import checkpoint
+
+        checkpoint.save_checkpoint(universe, args.checkpoint, rng)
+    population = universe.population()
+    for name, value in population._asdict().items():
+        print(f'{name:>12} {value}')
+
+def main(argv=None):
+    """Command line entry point."""
+    args = parse_args(argv)
+    recorder = instrumentation.enable() if args.profile else None
+    try:
+        if args.command == 'sweep':
+            _sweep(args)
+        else:
+            _run(args)
+    finally:
+        if recorder is not None:
+            instrumentation.disable()
+            recorder.dump_trace(args.profile)
+            print(recorder.summary(), file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
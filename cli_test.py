@@ -0,0 +1,88 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import cli
+import mergers
+
+class CliTests(unittest.TestCase):
+    """Tests for cli.py module."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return path
+
+    def test_config_defaults(self):
+        """Config files set defaults that the command line overrides."""
+        config = self.write('study.toml', 'galaxies = 12\nratios = [0.1, 0.2]\n'
+                                          'kernel = "plummer"\nsoftening = 2.0\n')
+        args = cli.parse_args(['sweep', '--config', config, '--galaxies', '30'])
+
+        self.assertEqual(args.galaxies, 30)
+        self.assertEqual(args.ratios, [0.1, 0.2])
+        self.assertEqual(cli._engine_options(args), {'kernel': 'plummer', 'softening': 2.0})
+
+    def test_units_name_or_value(self):
+        """--units takes a named unit system or a number used as G, also from config files."""
+        self.assertEqual(cli.parse_args(['run', '--units', 'galactic']).units, 'galactic')
+        self.assertEqual(cli.parse_args(['run', '--units', '4.3e-6']).units, 4.3e-6)
+        config = self.write('run.json', json.dumps({'units': '2.5'}))
+        args = cli.parse_args(['run', '--config', config])
+
+        self.assertEqual(cli._engine_options(args), {'units': 2.5})
+
+    def test_unknown_config_option(self):
+        """Misspelt config options are reported instead of ignored."""
+        config = self.write('run.json', json.dumps({'galaxys': 12}))
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            cli.parse_args(['run', '--config', config])
+
+    def test_sweep_output(self):
+        """A sweep writes one row per task."""
+        output = os.path.join(self.directory, 'results.csv')
+        cli.main(['sweep', '--galaxies', '12', '--ratios', '0', '0.3', '--replicates', '2',
+                  '--time-max', '2', '--time-step', '0.5', '--workers', '1', '--no-cache',
+                  '--output', output])
+        with open(output, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row['initial_type_ratio'] for row in rows}, {'0.0', '0.3'})
+
+    def test_run_outputs(self):
+        """A headless run writes its series and merger log."""
+        series = os.path.join(self.directory, 'series.csv')
+        log = os.path.join(self.directory, 'run.mergers')
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            cli.main(['run', '--galaxies', '60', '--universe-size', '200', '--time-max', '3',
+                      '--time-step', '0.5', '--seed', '4', '--series', series,
+                      '--mergers', log])
+        with open(series, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+
+        self.assertEqual(int(rows[-1]['mergers']), len(mergers.open_mergers(log)))
+        self.assertIn(f"mergers {rows[-1]['mergers']}", printed.getvalue())
+
+    def test_no_matplotlib_import(self):
+        """The entry point and drivers import without matplotlib."""
+        code = ('import sys, cli, galaxy_collisions, galaxy_collision_statistics; '
+                "print('matplotlib' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(cli.__file__)))
+
+        self.assertEqual(output.stdout.strip(), 'False')
+
+if __name__ == '__main__':
+    unittest.main()
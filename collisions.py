@@ -0,0 +1,266 @@
+"""Collisions module.
+
+Collision detection and merging for the structure-of-arrays engine. A uniform grid
+(spatial hash) broad phase only tests galaxies in neighbouring cells, and mergers
+are resolved in deterministic batches that do not depend on array order.
+Given a period, distances use the nearest periodic image (see boundaries).
+
+Methods:
+    capture_radius: collision distance for pairs of galaxies.
+    brute_force_pairs: candidate pairs by testing every pair.
+    grid_pairs: candidate pairs from a uniform grid broad phase.
+    separation: distances between pairs of galaxies.
+    find_collisions: pairs of active galaxies close enough to merge.
+    resolve_mergers: merges colliding pairs in deterministic batches.
+"""
+
+import numpy as np
+from boundaries import minimum_image
+
+# 3 x 3 block of neighbouring cells, including the cell itself
+NEIGHBOUR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+# below this many active galaxies testing every pair is cheaper than hashing
+GRID_THRESHOLD = 128
+# candidate pairs the grid broad phase builds and tests at once
+MAX_CANDIDATES = 2**20
+
+def capture_radius(mass_one, mass_two):
+    """Collision distance for pairs of galaxies: heavier mass / lighter mass.
+
+    Matches Galaxy.time_update, where each galaxy captures others within
+    self.mass / galaxy.mass, whichever galaxy of the pair reaches further.
+
+    Args:
+        mass_one (np.ndarray): masses of first galaxies.
+        mass_two (np.ndarray): masses of second galaxies.
+
+    Returns:
+        np.ndarray: capture radius of each pair.
+    """
+    return np.maximum(mass_one, mass_two) / np.minimum(mass_one, mass_two)
+
+def brute_force_pairs(pos, active):
+    """Candidate pairs from every pair of active galaxies. O(N**2), for reference.
+
+    Args:
+        pos (np.ndarray): (N, 2) array of positions.
+        active (np.ndarray): (N,) boolean mask of galaxies taking part.
+
+    Returns:
+        np.ndarray: (P, 2) array of index pairs (i, j) with i < j.
+    """
+    idx = np.flatnonzero(active)
+    first, second = np.triu_indices(len(idx), k=1)
+    return np.column_stack((idx[first], idx[second]))
+
+def _grid_candidates(pos, sources, targets, cell_size, period=None):
+    """Blocks of (source, target) index pairs in the same or neighbouring grid cells.
+
+    Targets are hashed into square cells of side cell_size and sorted by cell, so
+    each source only looks up the 9 cells around it. Blocks hold at most
+    MAX_CANDIDATES pairs, or the candidates of a single lookup.
+    """
+    if period is None:
+        origin = np.floor(np.minimum(pos[sources].min(axis=0), pos[targets].min(axis=0))
+                          / cell_size) - 1
+        source_cells = (np.floor(pos[sources] / cell_size) - origin).astype(np.int64)
+        target_cells = (np.floor(pos[targets] / cell_size) - origin).astype(np.int64)
+        width = max(source_cells[:, 1].max(), target_cells[:, 1].max()) + 2
+        keys = target_cells[:, 0] * width + target_cells[:, 1]
+        offsets = np.array([d_x * width + d_y for d_x, d_y in NEIGHBOUR_OFFSETS])
+        lookup = ((source_cells[:, 0] * width + source_cells[:, 1])[:, np.newaxis]
+                  + offsets).ravel()
+    else:
+        # a whole number of cells of side >= cell_size tiles the box
+        width = max(int(period // cell_size), 1)
+
+        def cells_of(members):
+            return np.floor(np.mod(pos[members], period) / period * width).astype(np.int64) \
+                % width
+
+        target_cells = cells_of(targets)
+        keys = target_cells[:, 0] * width + target_cells[:, 1]
+        # below 3 cells across, neighbours wrap onto the same cell, which is looked up once
+        offsets = np.unique(np.array(NEIGHBOUR_OFFSETS) % width, axis=0)
+        neighbours = (cells_of(sources)[:, np.newaxis, :] + offsets) % width
+        lookup = (neighbours[:, :, 0] * width + neighbours[:, :, 1]).ravel()
+    sort = np.argsort(keys, kind='stable')
+    sorted_keys = keys[sort]
+    sorted_targets = targets[sort]
+
+    owner = np.repeat(sources, len(offsets))
+    low = np.searchsorted(sorted_keys, lookup, side='left')
+    counts = np.searchsorted(sorted_keys, lookup, side='right') - low
+    after = np.cumsum(counts)
+    before = after - counts
+    row = 0
+    while row < len(lookup):
+        stop = max(int(np.searchsorted(after, before[row] + MAX_CANDIDATES, side='right')),
+                   row + 1)
+        block_counts = counts[row:stop]
+        first = np.repeat(owner[row:stop], block_counts)
+        slots = np.repeat(low[row:stop] - (before[row:stop] - before[row]), block_counts) \
+            + np.arange(len(first))
+        yield first, sorted_targets[slots]
+        row = stop
+
+def grid_pairs(pos, active, cell_size, period=None):
+    """Candidate pairs of active galaxies in the same or neighbouring grid cells.
+
+    Galaxies are hashed into square cells of side cell_size and sorted by cell,
+    so each galaxy only looks up the 9 cells around it. Any pair closer than
+    cell_size is guaranteed to be returned.
+
+    Args:
+        pos (np.ndarray): (N, 2) array of positions.
+        active (np.ndarray): (N,) boolean mask of galaxies taking part.
+        cell_size (float): side length of grid cells.
+        period (float): side of a periodic box; the grid then wraps around it.
+
+    Returns:
+        np.ndarray: (P, 2) array of index pairs (i, j) with i < j.
+    """
+    idx = np.flatnonzero(active)
+    if len(idx) < 2:
+        return np.empty((0, 2), dtype=np.intp)
+    blocks = [np.column_stack((first[first < second], second[first < second]))
+              for first, second in _grid_candidates(pos, idx, idx, cell_size, period)]
+    return np.concatenate(blocks)
+
+def _grid_collisions(pos, mass, active, period=None):
+    """Colliding pairs from a grid broad phase with galaxies bucketed by mass.
+
+    A pair's capture radius is at most the heaviest mass over the lighter galaxy's
+    mass, so galaxies are bucketed by mass in powers of two and each bucket looks
+    for heavier partners on a grid of cells that size for its lightest member.
+    Heavy galaxies then search small neighbourhoods instead of the one the
+    lightest galaxy needs. Candidates are narrowed to collisions block by block,
+    so memory stays bounded however crowded the cells are.
+    """
+    idx = np.flatnonzero(active)
+    heaviest = mass[idx].max()
+    buckets = np.floor(np.log2(mass[idx] / mass[idx].min())).astype(np.int64)
+    blocks = [np.empty((0, 2), dtype=np.intp)]
+    for bucket in np.unique(buckets):
+        sources = idx[buckets == bucket]
+        targets = idx[buckets >= bucket]
+        cell_size = heaviest / mass[sources].min()
+        for first, second in _grid_candidates(pos, sources, targets, cell_size, period):
+            # each pair is found from its lighter galaxy, the lower index on a tie
+            lighter = (mass[first] < mass[second]) \
+                | ((mass[first] == mass[second]) & (first < second))
+            first, second = first[lighter], second[lighter]
+            close = separation(pos, first, second, period) \
+                < capture_radius(mass[first], mass[second])
+            first, second = first[close], second[close]
+            blocks.append(np.column_stack((np.minimum(first, second),
+                                           np.maximum(first, second))))
+    return np.concatenate(blocks)
+
+def separation(pos, first, second, period=None):
+    """Distances between pairs of galaxies.
+
+    Args:
+        pos (np.ndarray): (N, 2) array of positions.
+        first (np.ndarray): indices of first galaxies.
+        second (np.ndarray): indices of second galaxies.
+        period (float): side of a periodic box, or None.
+
+    Returns:
+        np.ndarray: distance of each pair, to the nearest image if periodic.
+    """
+    return np.linalg.norm(minimum_image(pos[first] - pos[second], period), axis=1)
+
+def find_collisions(pos, mass, active, broad_phase='auto', period=None):
+    """Finds every pair of active galaxies closer than their capture radius.
+
+    The grid cell size adapts to the largest capture radius of each mass bucket,
+    heaviest active mass / lightest mass of the bucket.
+
+    Args:
+        pos (np.ndarray): (N, 2) array of positions.
+        mass (np.ndarray): (N,) array of masses.
+        active (np.ndarray): (N,) boolean mask of galaxies taking part.
+        broad_phase (string): 'grid' for the spatial hash, 'brute' for all pairs or
+            'auto' to use the grid from GRID_THRESHOLD active galaxies upwards.
+        period (float): side of a periodic box, or None.
+
+    Returns:
+        np.ndarray: (P, 2) array of colliding index pairs (i, j) with i < j.
+    """
+    count = np.count_nonzero(active)
+    if count < 2:
+        return np.empty((0, 2), dtype=np.intp)
+    if broad_phase == 'auto':
+        broad_phase = 'grid' if count >= GRID_THRESHOLD else 'brute'
+    if broad_phase == 'grid':
+        return _grid_collisions(pos, mass, active, period)
+    pairs = brute_force_pairs(pos, active)
+    first, second = pairs[:, 0], pairs[:, 1]
+    dist = separation(pos, first, second, period)
+    return pairs[dist < capture_radius(mass[first], mass[second])]
+
+def resolve_mergers(pairs, pos, vel, mass, active, ids, period=None, events=None):
+    """Merges colliding pairs in deterministic batches, modifying arrays in place.
+
+    Pairs are ranked by separation, then by galaxy IDs. Each batch merges every pair
+    that is the best-ranked remaining pair of both its galaxies, so no galaxy takes
+    part in two merges of one batch and the outcome does not depend on array order.
+    The heavier galaxy (lower ID on a tie) absorbs the lighter one with conservation
+    of momentum, as in Galaxy.collide. Pairs that lost a galaxy are dropped and the
+    rest are re-checked against the updated masses before the next batch.
+
+    Args:
+        pairs (np.ndarray): (P, 2) array of colliding index pairs.
+        pos (np.ndarray): (N, 2) array of positions.
+        vel (np.ndarray): (N, 2) array of velocities, updated in place.
+        mass (np.ndarray): (N,) array of masses, updated in place.
+        active (np.ndarray): (N,) boolean mask, absorbed galaxies set to False.
+        ids (np.ndarray): (N,) galaxy IDs used to break ties.
+        period (float): side of a periodic box, or None.
+        events (list): if given, one tuple per batch is appended to it with the
+            masses and velocities of the absorbing and absorbed galaxies just
+            before they merged: (mass kept, mass lost, vel kept, vel lost).
+
+    Returns:
+        tuple of np.ndarray: indices of absorbing galaxies and of absorbed galaxies,
+            one entry per merger, in the order the mergers happened.
+    """
+    kept, lost = [], []
+    while len(pairs):
+        first, second = pairs[:, 0], pairs[:, 1]
+        dist = separation(pos, first, second, period)
+        low_id = np.minimum(ids[first], ids[second])
+        high_id = np.maximum(ids[first], ids[second])
+        order = np.lexsort((high_id, low_id, dist))
+        pairs = pairs[order]
+        first, second = pairs[:, 0], pairs[:, 1]
+
+        rank = np.arange(len(pairs))
+        best = np.full(len(mass), len(pairs))
+        np.minimum.at(best, first, rank)
+        np.minimum.at(best, second, rank)
+        batch = (best[first] == rank) & (best[second] == rank)
+
+        one, two = first[batch], second[batch]
+        one_keeps = (mass[one] > mass[two]) | ((mass[one] == mass[two]) & (ids[one] < ids[two]))
+        keep = np.where(one_keeps, one, two)
+        lose = np.where(one_keeps, two, one)
+        if events is not None:
+            events.append((mass[keep], mass[lose], vel[keep], vel[lose]))
+        total_mass = mass[keep] + mass[lose]
+        vel[keep] = (mass[keep, np.newaxis] * vel[keep]
+                     + mass[lose, np.newaxis] * vel[lose]) / total_mass[:, np.newaxis]
+        mass[keep] = total_mass
+        active[lose] = False
+        kept.append(keep)
+        lost.append(lose)
+
+        pairs = pairs[~batch]
+        pairs = pairs[active[pairs[:, 0]] & active[pairs[:, 1]]]
+        if len(pairs):
+            dist = separation(pos, pairs[:, 0], pairs[:, 1], period)
+            pairs = pairs[dist < capture_radius(mass[pairs[:, 0]], mass[pairs[:, 1]])]
+    if not kept:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(kept), np.concatenate(lost)
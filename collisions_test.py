@@ -0,0 +1,92 @@
+import unittest
+import numpy as np
+import collisions
+
+class CollisionsTests(unittest.TestCase):
+    """Tests for collisions.py module."""
+
+    def random_state(self, count, seed=0):
+        """Crowded random galaxies so that many pairs collide."""
+        rng = np.random.default_rng(seed)
+        pos = rng.uniform(0, 200, (count, 2))
+        mass = rng.integers(1, 100, count).astype(np.float64)
+        vel = rng.normal(0, 1, (count, 2))
+        return pos, vel, mass, np.ones(count, dtype=bool), np.arange(count)
+
+    def test_grid_matches_brute_force(self):
+        """Spatial hash finds exactly the same colliding pairs as testing every pair."""
+        pos, _, mass, active, _ = self.random_state(300)
+        active[::7] = False
+
+        grid = collisions.find_collisions(pos, mass, active, broad_phase='grid')
+        brute = collisions.find_collisions(pos, mass, active, broad_phase='brute')
+
+        self.assertGreater(len(brute), 0)
+        self.assertEqual(set(map(tuple, grid)), set(map(tuple, brute)))
+
+    def test_grid_in_small_blocks(self):
+        """Candidates tested in many small blocks give the same pairs, each once."""
+        pos, _, mass, active, _ = self.random_state(300, seed=1)
+        brute = collisions.find_collisions(pos, mass, active, broad_phase='brute')
+        limit = collisions.MAX_CANDIDATES
+        collisions.MAX_CANDIDATES = 64
+        try:
+            grid = collisions.find_collisions(pos, mass, active, broad_phase='grid')
+        finally:
+            collisions.MAX_CANDIDATES = limit
+
+        self.assertEqual(len(grid), len(brute))
+        self.assertEqual(set(map(tuple, grid)), set(map(tuple, brute)))
+
+    def test_grid_pairs_negative_positions(self):
+        """Galaxies that left the universe are still hashed correctly."""
+        pos = np.array([[-10.0, -10.0], [-9.5, -10.2], [500.0, 500.0]])
+        pairs = collisions.grid_pairs(pos, np.ones(3, dtype=bool), 1.0)
+
+        self.assertEqual([tuple(pair) for pair in pairs], [(0, 1)])
+
+    def test_merge_conserves_mass_and_momentum(self):
+        """Batched merging conserves total mass and momentum."""
+        pos, vel, mass, active, ids = self.random_state(200)
+        momentum = (mass[:, np.newaxis] * vel).sum(axis=0)
+        total_mass = mass.sum()
+
+        pairs = collisions.find_collisions(pos, mass, active)
+        keep, lose = collisions.resolve_mergers(pairs, pos, vel, mass, active, ids)
+
+        self.assertEqual(len(keep), len(lose))
+        self.assertFalse(active[lose].any())
+        self.assertAlmostEqual(mass[active].sum(), total_mass)
+        np.testing.assert_allclose((mass[active, np.newaxis] * vel[active]).sum(axis=0),
+                                   momentum, atol=1e-9)
+
+    def test_merge_independent_of_order(self):
+        """Shuffling the arrays does not change which galaxies survive."""
+        pos, vel, mass, active, ids = self.random_state(200)
+        shuffle = np.random.default_rng(1).permutation(200)
+        s_pos, s_vel, s_mass, s_active, s_ids = [array[shuffle].copy()
+                                                 for array in (pos, vel, mass, active, ids)]
+
+        collisions.resolve_mergers(collisions.find_collisions(pos, mass, active),
+                                   pos, vel, mass, active, ids)
+        collisions.resolve_mergers(collisions.find_collisions(s_pos, s_mass, s_active),
+                                   s_pos, s_vel, s_mass, s_active, s_ids)
+
+        self.assertEqual(sorted(ids[active]), sorted(s_ids[s_active]))
+        np.testing.assert_allclose(mass[np.argsort(ids)], s_mass[np.argsort(s_ids)])
+
+    def test_heavier_absorbs(self):
+        """Heavier galaxy survives regardless of pair order."""
+        pos = np.array([[0.0, 0.0], [1.0, 0.0]])
+        vel = np.zeros((2, 2))
+        mass = np.array([5.0, 1.0])
+        active = np.ones(2, dtype=bool)
+
+        keep, lose = collisions.resolve_mergers(np.array([[1, 0]]), pos, vel, mass, active,
+                                                np.arange(2))
+
+        self.assertEqual((keep[0], lose[0]), (0, 1))
+        self.assertEqual(mass[0], 6)
+
+if __name__ == '__main__':
+    unittest.main()
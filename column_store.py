@@ -0,0 +1,155 @@
+"""Column store module.
+
+Append-only columnar files shared by trajectories and merger logs. A store is a
+directory holding one raw binary file per column plus a small JSON header with
+the row count, the column dtypes and any metadata of the writer. Rows are
+buffered in memory and appended in chunks, and the header is only rewritten,
+atomically, after the columns have been appended. Reopening a store truncates the
+columns to the row count of the header, so rows half-written by a crashed run
+are dropped and appending carries on from the last complete chunk. Reading back
+maps the columns with np.memmap.
+
+Classes:
+    ColumnWriter
+
+Methods:
+    read_header: header of a store, if it exists.
+    open_columns: memory-maps every column of a store.
+"""
+
+import json
+import os
+import numpy as np
+
+def read_header(path, header):
+    """Header of a store, if it exists.
+
+    Args:
+        path (string): directory of the store.
+        header (string): file name of the header.
+
+    Returns:
+        dict: the header, or None if the store has none yet.
+    """
+    try:
+        with open(os.path.join(path, header), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+def open_columns(path, fields, rows):
+    """Memory-maps every column of a store.
+
+    Args:
+        path (string): directory of the store.
+        fields (dict): column name to (dtype, shape of one row).
+        rows (int): row count, from the header.
+
+    Returns:
+        dict: column name to a read-only (rows, ...) np.memmap, or an empty array
+            if no rows were written.
+    """
+    columns = {}
+    for name, (dtype, shape) in fields.items():
+        if rows:
+            columns[name] = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r',
+                                      shape=(rows,) + shape)
+        else:
+            columns[name] = np.empty((rows,) + shape, dtype)
+    return columns
+
+class ColumnWriter:
+    """Buffers rows and appends them to the column files of a store in chunks.
+
+    Parameters:
+        path (string): directory of the store.
+        chunk_rows (int): rows buffered in memory before they are appended.
+        rows (int): number of rows written so far.
+
+    Methods:
+        __init__: creates (or appends to) a store.
+        append: buffers rows, flushing whenever the buffer fills.
+        flush: appends buffered rows to disk.
+        close: flushes any buffered rows.
+    """
+
+    def __init__(self, path, header, fields, count_key, chunk_rows, metadata=None):
+        """Creates a store directory, or appends to an existing one.
+
+        Args:
+            path (string): directory of the store.
+            header (string): file name of the header.
+            fields (dict): column name to (dtype, shape of one row).
+            count_key (string): header key of the row count.
+            chunk_rows (int): rows buffered in memory before they are appended.
+            metadata (dict): extra JSON serializable header entries.
+        """
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._header = header
+        self._fields = fields
+        self._count_key = count_key
+        self._metadata = metadata or {}
+        os.makedirs(path, exist_ok=True)
+        existing = read_header(path, header)
+        if existing is not None:
+            self.rows = existing[count_key]
+            # drop rows appended after the last header update, e.g. by a crashed run
+            for name, (dtype, shape) in fields.items():
+                column = os.path.join(path, f'{name}.bin')
+                if os.path.exists(column):
+                    row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+                    os.truncate(column, self.rows * row_bytes)
+        self._buffers = {name: np.empty((chunk_rows,) + shape, dtype)
+                         for name, (dtype, shape) in fields.items()}
+        self._buffered = 0
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, count, **columns):
+        """Buffers rows, flushing whenever the buffer fills.
+
+        Args:
+            count (int): number of rows.
+            **columns: one array of shape (count, ...) per column.
+        """
+        done = 0
+        while done < count:
+            rows = min(count - done, self.chunk_rows - self._buffered)
+            slots = slice(self._buffered, self._buffered + rows)
+            for name, values in columns.items():
+                self._buffers[name][slots] = values[done:done + rows]
+            self._buffered += rows
+            done += rows
+            if self._buffered == self.chunk_rows:
+                self.flush()
+
+    def flush(self):
+        """Appends buffered rows to the column files, then updates the header."""
+        if not self._buffered:
+            return
+        for name, buffer in self._buffers.items():
+            with open(os.path.join(self.path, f'{name}.bin'), 'ab') as file:
+                buffer[:self._buffered].tofile(file)
+        self.rows += self._buffered
+        self._buffered = 0
+        self._write_header()
+
+    def close(self):
+        """Flushes any buffered rows."""
+        self.flush()
+
+    def _write_header(self):
+        header = dict(self._metadata)
+        header[self._count_key] = self.rows
+        header['fields'] = {name: dtype for name, (dtype, _) in self._fields.items()}
+        temporary = os.path.join(self.path, f'{self._header}.tmp')
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(header, file)
+        os.replace(temporary, os.path.join(self.path, self._header))
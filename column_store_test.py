@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import column_store
+
+FIELDS = {'step': ('<i8', ()), 'pos': ('<f4', (3, 2))}
+
+class ColumnStoreTests(unittest.TestCase):
+    """Tests for column_store.py module."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'store')
+
+    def rows(self, start, stop):
+        """Rows start to stop of a synthetic store."""
+        step = np.arange(start, stop)
+        return {'step': step, 'pos': np.broadcast_to(step[:, np.newaxis, np.newaxis],
+                                                      (len(step), 3, 2))}
+
+    def test_round_trip_across_chunks(self):
+        """Rows appended in uneven blocks read back in order with the header metadata."""
+        with column_store.ColumnWriter(self.path, 'store.json', FIELDS, 'rows', 4,
+                                       {'label': 'test'}) as writer:
+            for start, stop in ((0, 3), (3, 4), (4, 13)):
+                writer.append(stop - start, **self.rows(start, stop))
+        header = column_store.read_header(self.path, 'store.json')
+        columns = column_store.open_columns(self.path, FIELDS, header['rows'])
+
+        self.assertEqual(header['label'], 'test')
+        self.assertEqual(header['fields'], {'step': '<i8', 'pos': '<f4'})
+        self.assertIsInstance(columns['pos'], np.memmap)
+        np.testing.assert_array_equal(columns['step'], np.arange(13))
+        np.testing.assert_array_equal(columns['pos'][:, 2, 1], np.arange(13))
+
+    def test_reopen_drops_partial_rows(self):
+        """Rows written after the last header update are dropped when reopening."""
+        writer = column_store.ColumnWriter(self.path, 'store.json', FIELDS, 'rows', 2)
+        writer.append(5, **self.rows(0, 5))
+        # a crash here loses the buffered fifth row; simulate a half-written one
+        with open(os.path.join(self.path, 'pos.bin'), 'ab') as file:
+            file.write(b'partial')
+
+        with column_store.ColumnWriter(self.path, 'store.json', FIELDS, 'rows', 2) as writer:
+            self.assertEqual(writer.rows, 4)
+            writer.append(2, **self.rows(4, 6))
+        columns = column_store.open_columns(self.path, FIELDS, 6)
+
+        np.testing.assert_array_equal(columns['step'], np.arange(6))
+        self.assertEqual(os.path.getsize(os.path.join(self.path, 'pos.bin')), 6 * 24)
+
+    def test_empty_store(self):
+        """A store without rows opens to empty columns."""
+        column_store.ColumnWriter(self.path, 'store.json', FIELDS, 'rows', 2).close()
+        columns = column_store.open_columns(self.path, FIELDS, 0)
+
+        self.assertEqual(columns['pos'].shape, (0, 3, 2))
+        self.assertIsNone(column_store.read_header(self.path, 'missing.json'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,675 @@
+"""Engine module.
+
+Structure-of-arrays simulation engine. Positions, velocities, masses, types and
+active/visible flags live in contiguous NumPy arrays and every step computes all
+pairwise accelerations in one batched pass, without any trigonometry.
+
+Population counters (active, visible and elliptical galaxies, mergers, total mass
+and a log-binned mass function) are kept up to date incrementally, so population
+statistics cost O(1) per query and can be recorded every step.
+
+Classes:
+    Universe
+    GalaxyView
+    Population
+    PopulationSeries
+
+Methods:
+    pairwise_accelerations: accelerations on every active galaxy from every other one.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+import numpy as np
+import galaxy as g
+import backends
+import barnes_hut
+import boundaries
+import initial_conditions
+import instrumentation
+import integrators
+import kernels
+
+SPIRAL = g.SPIRAL
+ELLIPTICAL = g.ELLIPTICAL
+GAL_TYPES = g.GAL_TYPES
+COLORS = g.COLORS
+
+# bump whenever a change alters simulation results, so cached results are recomputed
+ENGINE_VERSION = 1
+CHUNK_SIZE = 512
+SOLVERS = ('direct', 'barnes_hut')
+# precision: (dtype of positions, velocities and masses, dtype forces are summed in)
+PRECISIONS = {'double': (np.float64, np.float64), 'single': (np.float32, np.float32),
+              'mixed': (np.float32, np.float64)}
+# bin k of the mass function counts active galaxies with 2**k <= mass < 2**(k + 1);
+# the first and last bins are open-ended
+MASS_BINS = 32
+
+Population = namedtuple('Population', ['time', 'active', 'visible', 'elliptical', 'ratio',
+                                       'mergers', 'total_mass', 'escaped'])
+Population.__doc__ = """Population statistics of a Universe at one time. visible and elliptical
+count active galaxies only; ratio is elliptical / visible (nan if none are visible);
+escaped counts galaxies retired by the cull boundary."""
+
+def pairwise_accelerations(pos, mass, active, chunk_size=CHUNK_SIZE, targets=None, period=None,
+                           kernel=kernels.NEWTONIAN, accumulate=None):
+    """Accelerations on all active galaxies by direct summation.
+
+    Works on tiles of chunk_size target galaxies at a time so memory stays
+    bounded at O(chunk_size * N) instead of O(N**2).
+
+    Args:
+        pos (np.ndarray): (N, 2) array of positions.
+        mass (np.ndarray): (N,) array of masses.
+        active (np.ndarray): (N,) boolean mask of galaxies taking part.
+        chunk_size (int): number of target galaxies per tile.
+        targets (np.ndarray): (N,) boolean mask of galaxies to compute accelerations
+            for. Defaults to active; the others are left at zero.
+        period (float): side of a periodic box; each galaxy is then pulled by the
+            nearest image of every other one. None for open space.
+        kernel (kernels.ForceKernel): force law. Defaults to the unsoftened,
+            dimensionless one.
+        accumulate (np.dtype): dtype the pulls are summed in, e.g. float64 for
+            float32 positions. Defaults to the dtype of pos.
+
+    Returns:
+        np.ndarray: (N, 2) array of accelerations, of dtype accumulate. Zero for
+            inactive galaxies.
+    """
+    acc = np.zeros(pos.shape, accumulate or pos.dtype)
+    idx = np.flatnonzero(active)
+    tgt_idx = idx if targets is None else np.flatnonzero(active & targets)
+    src_pos = pos[idx]
+    src_mass = mass[idx]
+    for start in range(0, len(tgt_idx), chunk_size):
+        tgt = tgt_idx[start:start + chunk_size]
+        delta = boundaries.minimum_image(src_pos[np.newaxis, :, :] - pos[tgt][:, np.newaxis, :], period)
+        dist_sq = np.einsum('ijk,ijk->ij', delta, delta)
+        # coincident galaxies (including each galaxy with itself) exert no force
+        acc[tgt] = np.einsum('ij,ijk->ik', src_mass * kernel.weight(dist_sq), delta,
+                             dtype=accumulate)
+    return acc
+
+class GalaxyView(g.Galaxy):
+    """Galaxy adapter reading and writing one row of a Universe's arrays.
+
+    Behaves like a Galaxy (same attributes and methods), so code written against
+    lists of Galaxy objects, such as elliptical_ratio, keeps working unchanged.
+
+    Parameters:
+        universe (Universe): universe holding the arrays.
+        index (int): row of this galaxy in the arrays.
+    """
+
+    __slots__ = ('_universe', '_index')
+
+    def __init__(self, universe, index):
+        """Initializes GalaxyView object.
+
+        Args:
+            universe (Universe): universe holding the arrays.
+            index (int): row of this galaxy in the arrays.
+        """
+        self._universe = universe
+        self._index = index
+
+    @property
+    def id_(self):
+        return int(self._universe.ids[self._index])
+
+    @property
+    def x_pos(self):
+        return self._universe.pos[self._index, 0]
+
+    @x_pos.setter
+    def x_pos(self, value):
+        self._universe.pos[self._index, 0] = value
+        self._universe.acc = None
+
+    @property
+    def y_pos(self):
+        return self._universe.pos[self._index, 1]
+
+    @y_pos.setter
+    def y_pos(self, value):
+        self._universe.pos[self._index, 1] = value
+        self._universe.acc = None
+
+    @property
+    def v_x(self):
+        return self._universe.vel[self._index, 0]
+
+    @v_x.setter
+    def v_x(self, value):
+        self._universe.vel[self._index, 0] = value
+        self._universe.acc = None
+
+    @property
+    def v_y(self):
+        return self._universe.vel[self._index, 1]
+
+    @v_y.setter
+    def v_y(self, value):
+        self._universe.vel[self._index, 1] = value
+        self._universe.acc = None
+
+    # setters of counted fields go through Universe.counting to keep the counters right,
+    # and setters of fields the forces depend on drop the cached accelerations
+
+    @property
+    def mass(self):
+        return self._universe.mass[self._index]
+
+    @mass.setter
+    def mass(self, value):
+        with self._universe.counting([self._index]):
+            self._universe.mass[self._index] = value
+        self._universe.acc = None
+
+    @property
+    def type_code(self):
+        return int(self._universe.gal_type[self._index])
+
+    @type_code.setter
+    def type_code(self, value):
+        with self._universe.counting([self._index]):
+            self._universe.gal_type[self._index] = value
+
+    @property
+    def gal_type(self):
+        return GAL_TYPES[self._universe.gal_type[self._index]]
+
+    @gal_type.setter
+    def gal_type(self, value):
+        with self._universe.counting([self._index]):
+            self._universe.gal_type[self._index] = GAL_TYPES.index(value)
+
+    @property
+    def color(self):
+        return COLORS[self._universe.gal_type[self._index]]
+
+    @color.setter
+    def color(self, value):
+        with self._universe.counting([self._index]):
+            self._universe.gal_type[self._index] = COLORS.index(value)
+
+    @property
+    def active(self):
+        return bool(self._universe.active[self._index])
+
+    @active.setter
+    def active(self, value):
+        with self._universe.counting([self._index]):
+            self._universe.active[self._index] = value
+        self._universe.acc = None
+
+    @property
+    def in_visible_universe(self):
+        return bool(self._universe.visible[self._index])
+
+    @in_visible_universe.setter
+    def in_visible_universe(self, value):
+        with self._universe.counting([self._index]):
+            self._universe.visible[self._index] = value
+
+    def time_update(self, other_galaxy_list, universe_size, time_step):
+        """Not supported on a view: the whole universe advances at once with Universe.step.
+
+        Raises:
+            TypeError: always.
+        """
+        raise TypeError('GalaxyView is advanced by Universe.step, not time_update')
+
+class Universe:
+    """Universe class. Holds all galaxies as structure-of-arrays state.
+
+    Parameters:
+        universe_size (int): size of observable universe.
+        ids (np.ndarray): (N,) galaxy IDs.
+        pos (np.ndarray): (N, 2) positions.
+        vel (np.ndarray): (N, 2) velocities.
+        mass (np.ndarray): (N,) masses.
+        gal_type (np.ndarray): (N,) galaxy types, SPIRAL or ELLIPTICAL.
+        active (np.ndarray): (N,) whether each galaxy has not been absorbed or retired.
+        visible (np.ndarray): (N,) whether each galaxy is within bounds of universe.
+        escaped (np.ndarray): (N,) whether each galaxy was retired by the cull boundary.
+        time (float): elapsed simulation time.
+        solver (string): force solver, either 'direct' or 'barnes_hut'.
+        theta (float): Barnes-Hut opening angle.
+        backend (backends.NumpyBackend): kernel backend running the step.
+        integrator (object): time integration scheme, see integrators.
+        boundary (string): boundary mode, see boundaries.
+        margin (float): distance outside the universe at which the cull boundary
+            retires galaxies.
+        kernel (kernels.ForceKernel): force law, with its softening and G.
+        precision (string): 'double', 'single' or 'mixed'.
+        dtype (type): dtype of positions, velocities and masses.
+        accumulate (type): dtype forces are summed in.
+        merger_log (mergers.MergerLog): log recording every merger, or None.
+        acc (np.ndarray): (N, 2) accelerations at the current positions, kept between
+            steps by the leapfrog integrators. None when out of date.
+        active_count (int): number of active galaxies.
+        visible_count (int): number of active, visible galaxies.
+        elliptical_count (int): number of active, visible elliptical galaxies.
+        merger_count (int): number of galaxies absorbed so far.
+        escaped_count (int): number of galaxies retired by the cull boundary so far.
+        total_mass (float): mass of all active galaxies.
+        mass_counts (np.ndarray): (MASS_BINS,) active galaxies per mass bin.
+
+    Methods:
+        __init__: initializes Universe object.
+        from_galaxies: builds a Universe from a list of Galaxy objects.
+        random: builds a randomly initialized Universe.
+        galaxies: list of GalaxyView adapters over the arrays.
+        update_visible: recomputes the visible mask.
+        recount: recomputes the population counters from the arrays.
+        counting: context manager keeping the counters right while rows change.
+        accelerations: accelerations on every galaxy from the selected solver.
+        current_accelerations: cached accelerations at the current positions.
+        collide: merges every colliding pair of galaxies.
+        apply_boundary: applies the boundary mode.
+        step: evolves the universe by one time step.
+        run: evolves the universe up to a given time.
+        elliptical_ratio: ratio of elliptical to visible galaxies.
+        mass_function: number of active galaxies per mass bin.
+        population: population statistics at the current time.
+    """
+
+    def __init__(self, universe_size, pos, mass, gal_type, vel=None, ids=None,
+                 solver='direct', theta=barnes_hut.THETA, backend=None, integrator='euler',
+                 boundary='open', margin=None, kernel='newtonian', softening=0.0,
+                 units='dimensionless', precision='double'):
+        """Initializes Universe object.
+
+        Args:
+            universe_size (int): size of observable universe.
+            pos (array_like): (N, 2) positions.
+            mass (array_like): (N,) masses.
+            gal_type (array_like): (N,) galaxy types, SPIRAL or ELLIPTICAL.
+            vel (array_like): (N, 2) velocities. Defaults to zero.
+            ids (array_like): (N,) galaxy IDs. Defaults to 0..N-1.
+            solver (string): 'direct' for exact O(N**2) summation or 'barnes_hut'
+                for the O(N log N) quadtree approximation.
+            theta (float): Barnes-Hut opening angle. Ignored by the direct solver.
+            backend (string): kernel backend, 'numpy', 'numba' or 'auto'. Defaults to
+                backends.DEFAULT_BACKEND.
+            integrator (string or object): 'euler' (semi-implicit Euler), 'leapfrog',
+                'adaptive', 'block' or an integrator instance, see integrators.
+            boundary (string): 'open', 'cull', 'periodic' or 'reflective', see
+                boundaries.
+            margin (float): distance outside the universe at which the cull boundary
+                retires galaxies. Defaults to universe_size.
+            kernel (string or object): force law, 'newtonian' (unsoftened), 'plummer',
+                'spline' or a kernels.ForceKernel.
+            softening (float): softening length of the plummer and spline kernels.
+            units (string or float): units of G, 'dimensionless' (G = 1), 'si', 'cgs',
+                'galactic', or the value of G. See kernels.
+            precision (string): 'double' keeps the state in float64; 'single' keeps
+                positions, velocities and masses in float32 and sums forces in float32,
+                halving memory traffic; 'mixed' keeps float32 state but sums forces in
+                float64.
+
+        Raises:
+            ValueError: if solver, boundary, kernel or precision is unknown, or periodic
+                boundaries are combined with the Barnes-Hut solver.
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f'unknown solver {solver!r}, expected one of {SOLVERS}')
+        if boundary not in boundaries.BOUNDARIES:
+            raise ValueError(f'unknown boundary {boundary!r}, '
+                             f'expected one of {boundaries.BOUNDARIES}')
+        if boundary == 'periodic' and solver == 'barnes_hut':
+            raise ValueError('periodic boundaries need the direct solver')
+        if precision not in PRECISIONS:
+            raise ValueError(f'unknown precision {precision!r}, expected one of '
+                             f'{tuple(PRECISIONS)}')
+        self.precision = precision
+        self.dtype, self.accumulate = PRECISIONS[precision]
+        self.boundary = boundary
+        self.margin = universe_size if margin is None else margin
+        self.solver = solver
+        self.theta = theta
+        self.backend = backends.get_backend(backend)
+        self.integrator = integrators.get_integrator(integrator)
+        self.kernel = kernels.get_kernel(kernel, softening, units)
+        self.merger_log = None
+        self.acc = None
+        self.universe_size = universe_size
+        self.pos = np.array(pos, dtype=self.dtype).reshape(-1, 2)
+        count = len(self.pos)
+        self.mass = np.array(mass, dtype=self.dtype)
+        self.gal_type = np.array(gal_type, dtype=np.int8)
+        if vel is None:
+            self.vel = np.zeros((count, 2), self.dtype)
+        else:
+            self.vel = np.array(vel, dtype=self.dtype).reshape(-1, 2)
+        if ids is None:
+            self.ids = np.arange(count)
+        else:
+            self.ids = np.array(ids, dtype=np.int64)
+        self.active = np.ones(count, dtype=bool)
+        self.visible = np.ones(count, dtype=bool)
+        self.escaped = np.zeros(count, dtype=bool)
+        self.time = 0.0
+        self.merger_count = 0
+        self.escaped_count = 0
+        self.recount()
+        self.update_visible()
+
+    @classmethod
+    def from_galaxies(cls, galaxy_list, universe_size, **options):
+        """Builds a Universe from a list of Galaxy objects.
+
+        Args:
+            galaxy_list (list): list of Galaxy objects.
+            universe_size (int): size of observable universe.
+            **options: engine options passed on to Universe, such as solver.
+
+        Returns:
+            Universe: universe holding a copy of the galaxies' state.
+        """
+        universe = cls(
+            universe_size,
+            pos=[(galaxy.x_pos, galaxy.y_pos) for galaxy in galaxy_list],
+            mass=[galaxy.mass for galaxy in galaxy_list],
+            gal_type=[galaxy.type_code for galaxy in galaxy_list],
+            vel=[(galaxy.v_x, galaxy.v_y) for galaxy in galaxy_list],
+            ids=[galaxy.id_ for galaxy in galaxy_list],
+            **options,
+        )
+        universe.active[:] = [galaxy.active for galaxy in galaxy_list]
+        universe.recount()
+        return universe
+
+    @classmethod
+    def random(cls, universe_size, galaxy_number, initial_type_ratio, rng=None,
+               positions='uniform', masses='uniform', **options):
+        """Builds a randomly initialized Universe, drawing the same galaxies as
+        simulate_initialize but straight into the arrays.
+
+        Args:
+            universe_size (int): size of observable universe.
+            galaxy_number (int): number of galaxies to simulate.
+            initial_type_ratio (float): decimal between 0 and 1 giving initial ratio
+                of elliptical to spiral galaxies.
+            rng (np.random.Generator): random number generator, for reproducible runs.
+            positions (string or callable): position distribution, see initial_conditions.
+            masses (string or callable): mass distribution, see initial_conditions.
+            **options: engine options passed on to Universe, such as solver.
+
+        Returns:
+            Universe: newly generated universe.
+        """
+        with instrumentation.phase('initialize'):
+            pos, mass, gal_type = initial_conditions.sample(universe_size, galaxy_number,
+                                                            initial_type_ratio, rng, positions,
+                                                            masses)
+        return cls(universe_size, pos, mass, gal_type, **options)
+
+    @property
+    def galaxies(self):
+        """list: GalaxyView adapters, one per galaxy, sharing this universe's arrays."""
+        return [GalaxyView(self, i) for i in range(len(self.pos))]
+
+    def update_visible(self):
+        """Recomputes which galaxies are within bounds of the observable universe."""
+        with instrumentation.phase('visibility'):
+            inside = (self.pos >= 0) & (self.pos <= self.universe_size)
+            visible = inside.all(axis=1)
+            with self.counting(np.flatnonzero(visible != self.visible)):
+                self.visible = visible
+
+    def recount(self):
+        """Recomputes the population counters from scratch.
+
+        Needed only after writing to active, visible, gal_type or mass directly;
+        the engine's own updates keep the counters right incrementally.
+        """
+        self.active_count = 0
+        self.visible_count = 0
+        self.elliptical_count = 0
+        self.total_mass = 0.0
+        self.mass_counts = np.zeros(MASS_BINS, dtype=np.int64)
+        self._tally(slice(None), 1)
+
+    @contextmanager
+    def counting(self, indices):
+        """Keeps the population counters right while the given rows change.
+
+        The rows' contributions are removed on entry and added back on exit, so
+        the cost is proportional to the number of rows, not to N.
+
+        Args:
+            indices (array_like): rows about to change.
+        """
+        self._tally(indices, -1)
+        try:
+            yield
+        finally:
+            self._tally(indices, 1)
+
+    def _tally(self, indices, sign):
+        active = self.active[indices]
+        counted = active & self.visible[indices]
+        mass = self.mass[indices][active]
+        self.active_count += sign * np.count_nonzero(active)
+        self.visible_count += sign * np.count_nonzero(counted)
+        self.elliptical_count += sign * np.count_nonzero(
+            counted & (self.gal_type[indices] == ELLIPTICAL))
+        self.total_mass += sign * mass.sum(dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            bins = np.clip(np.floor(np.log2(mass)), 0, MASS_BINS - 1).astype(np.int64)
+        np.add.at(self.mass_counts, bins, sign)
+
+    def accelerations(self, targets=None):
+        """Accelerations on every galaxy from the selected force solver.
+
+        Args:
+            targets (np.ndarray): (N,) boolean mask of galaxies to compute accelerations
+                for. Defaults to every active galaxy.
+
+        Returns:
+            np.ndarray: (N, 2) array of accelerations. Zero for inactive galaxies.
+        """
+        if instrumentation.enabled():
+            evaluated = self.active_count if targets is None else np.count_nonzero(
+                targets & self.active)
+            instrumentation.count('force_evaluations', evaluated)
+            if self.solver == 'direct':
+                instrumentation.count('pair_interactions', evaluated * self.active_count)
+        with instrumentation.phase('forces'):
+            return self.backend.accelerations(self.pos, self.mass, self.active, self.solver,
+                                              self.theta, targets, self.period, self.kernel,
+                                              self.accumulate)
+
+    def current_accelerations(self):
+        """Accelerations at the current positions, computed only when out of date.
+
+        Returns:
+            np.ndarray: (N, 2) array of accelerations. Zero for inactive galaxies.
+        """
+        if self.acc is None:
+            self.acc = self.accelerations()
+        return self.acc
+
+    def collide(self):
+        """Merges every colliding pair of galaxies.
+
+        Uses a spatial hash broad phase and deterministic batched merging (see
+        collisions.resolve_mergers): the heavier galaxy of each pair absorbs the
+        lighter one, becomes elliptical and takes the momentum-conserving velocity,
+        as in Galaxy.collide.
+
+        Returns:
+            tuple of np.ndarray: indices of absorbing and of absorbed galaxies.
+        """
+        with instrumentation.phase('collision_detection'):
+            pairs = self.backend.find_collisions(self.pos, self.mass, self.active, self.period)
+        instrumentation.count('collision_pairs', len(pairs))
+        events = None if self.merger_log is None or not len(pairs) else []
+        with instrumentation.phase('merging'), self.counting(np.unique(pairs)):
+            keep, lose = self.backend.merge(pairs, self.pos, self.vel, self.mass, self.active,
+                                            self.ids, self.period, events)
+            if events:
+                self._log_mergers(keep, lose, events)
+            self.gal_type[keep] = ELLIPTICAL
+        instrumentation.count('mergers', len(lose))
+        self.merger_count += len(lose)
+        if len(keep):
+            self.acc = None
+        return keep, lose
+
+    def _log_mergers(self, keep, lose, events):
+        # types before merging: a galaxy that already absorbed another in this pass
+        # has become elliptical
+        absorbers, first = np.unique(keep, return_index=True)
+        order = np.arange(len(keep))
+        slot = np.minimum(np.searchsorted(absorbers, lose), len(absorbers) - 1)
+        lost_absorbed_before = (absorbers[slot] == lose) & (first[slot] < order)
+        kept_absorbed_before = first[np.searchsorted(absorbers, keep)] < order
+        kept_mass, lost_mass, kept_vel, lost_vel = (np.concatenate(column)
+                                                    for column in zip(*events))
+        self.merger_log.record(
+            self.time, kept_id=self.ids[keep], lost_id=self.ids[lose], kept_mass=kept_mass,
+            lost_mass=lost_mass,
+            kept_type=np.where(kept_absorbed_before, ELLIPTICAL, self.gal_type[keep]),
+            lost_type=np.where(lost_absorbed_before, ELLIPTICAL, self.gal_type[lose]),
+            kept_vel=kept_vel, lost_vel=lost_vel)
+
+    @property
+    def period(self):
+        """float: side of the periodic box, None unless the boundary is periodic."""
+        return self.universe_size if self.boundary == 'periodic' else None
+
+    def apply_boundary(self):
+        """Applies the boundary mode, retiring galaxies that escaped the cull margin.
+
+        Returns:
+            np.ndarray: indices of galaxies retired by this call.
+        """
+        with instrumentation.phase('boundary'):
+            escaped, reflected = boundaries.apply_boundary(
+                self.boundary, self.pos, self.vel, self.active, self.universe_size, self.margin)
+            if len(escaped):
+                with self.counting(escaped):
+                    self.active[escaped] = False
+                self.escaped[escaped] = True
+                self.escaped_count += len(escaped)
+            # periodic wrapping leaves minimum-image forces unchanged
+            if len(escaped) or reflected:
+                self.acc = None
+        return escaped
+
+    def step(self, time_step):
+        """Evolves the universe by one time step of the selected integrator.
+
+        Args:
+            time_step (float): size of time step in simulation. The adaptive
+                integrator treats it as the largest allowed step.
+        """
+        with instrumentation.step():
+            elapsed = self.integrator.advance(self, time_step)
+            self.apply_boundary()
+            self.update_visible()
+            self.time += elapsed
+
+    def run(self, time_max, time_step, trajectory=None, series=None, mergers=None):
+        """Evolves the universe until time exceeds time_max.
+
+        Args:
+            time_max (float): time at which to stop.
+            time_step (float): size of time step in simulation.
+            trajectory (trajectory.TrajectoryWriter): if given, offered every step.
+            series (PopulationSeries): if given, records the population every step.
+            mergers (mergers.MergerLog): if given, records every merger of the run.
+                Mergers are stamped with the time at the start of their step.
+        """
+        attached = self.merger_log
+        if mergers is not None:
+            self.merger_log = mergers
+        try:
+            while self.time <= time_max:
+                self.step(time_step)
+                if trajectory is not None:
+                    trajectory.record(self)
+                if series is not None:
+                    series.record(self)
+        finally:
+            self.merger_log = attached
+
+    def elliptical_ratio(self):
+        """Finds ratio of elliptical galaxies to total visible galaxies. O(1).
+
+        Returns:
+            float: ratio of elliptical to total visible galaxies, nan if no galaxy is
+                visible, as in batched.BatchedUniverse.elliptical_ratio.
+        """
+        if not self.visible_count:
+            return float('nan')
+        return round(int(self.elliptical_count) / int(self.visible_count), 4)
+
+    def mass_function(self):
+        """Number of active galaxies per mass bin. O(MASS_BINS).
+
+        Returns:
+            np.ndarray: (MASS_BINS,) counts; bin k holds 2**k <= mass < 2**(k + 1),
+                the first and last bins are open-ended.
+        """
+        return self.mass_counts.copy()
+
+    def population(self):
+        """Population statistics at the current time. O(1).
+
+        Returns:
+            Population: counts, elliptical ratio, mergers so far and total mass.
+        """
+        visible = int(self.visible_count)
+        elliptical = int(self.elliptical_count)
+        ratio = elliptical / visible if visible else float('nan')
+        return Population(self.time, int(self.active_count), visible, elliptical, ratio,
+                          self.merger_count, float(self.total_mass), self.escaped_count)
+
+class PopulationSeries:
+    """Time series of Population statistics, recorded step by step.
+
+    Rows are written into a preallocated structured array that doubles when full,
+    so recording every step costs a few scalar writes.
+
+    Parameters:
+        frames (int): number of rows recorded.
+
+    Methods:
+        __init__: initializes PopulationSeries object.
+        record: appends the current population of a universe.
+        data: recorded rows as a structured array, one field per Population field.
+    """
+
+    dtype = np.dtype([('time', 'f8'), ('active', 'i8'), ('visible', 'i8'),
+                      ('elliptical', 'i8'), ('ratio', 'f8'), ('mergers', 'i8'),
+                      ('total_mass', 'f8'), ('escaped', 'i8')])
+
+    def __init__(self, capacity=1024):
+        """Initializes PopulationSeries object.
+
+        Args:
+            capacity (int): rows allocated up front.
+        """
+        self.frames = 0
+        self._rows = np.empty(capacity, self.dtype)
+
+    def record(self, universe):
+        """Appends the current population of a universe.
+
+        Args:
+            universe (Universe): universe to record.
+        """
+        if self.frames == len(self._rows):
+            self._rows = np.concatenate([self._rows, np.empty(max(len(self._rows), 1), self.dtype)])
+        self._rows[self.frames] = universe.population()
+        self.frames += 1
+
+    @property
+    def data(self):
+        """np.ndarray: (frames,) structured array, e.g. series.data['ratio']."""
+        return self._rows[:self.frames]
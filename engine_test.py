@@ -0,0 +1,120 @@
+import unittest
+import numpy as np
+import galaxy as g
+import engine
+
+class EngineTests(unittest.TestCase):
+    """Tests for engine.py module, including Universe and GalaxyView."""
+
+    def test_pairwise_accelerations_matches_gravity_force(self):
+        """Batched accelerations agree with gravity_force divided by mass."""
+        galaxies = [
+            g.Galaxy(0, 0, 0, 100, 'elliptical'),
+            g.Galaxy(1, 3, 4, 200, 'spiral'),
+            g.Galaxy(2, -6, 2, 50, 'spiral'),
+        ]
+        universe = engine.Universe.from_galaxies(galaxies, 1000)
+        acc = engine.pairwise_accelerations(universe.pos, universe.mass, universe.active)
+
+        for i, galaxy in enumerate(galaxies):
+            expected = np.zeros(2)
+            for other in galaxies:
+                if other is not galaxy:
+                    expected += np.array(g.gravity_force(galaxy, other)) / galaxy.mass
+            np.testing.assert_allclose(acc[i], expected)
+
+    def test_pairwise_accelerations_chunked(self):
+        """Tiling the targets does not change the result."""
+        rng = np.random.default_rng(0)
+        pos = rng.uniform(0, 1000, (50, 2))
+        mass = rng.uniform(1, 100, 50)
+        active = rng.random(50) < 0.8
+
+        whole = engine.pairwise_accelerations(pos, mass, active)
+        tiled = engine.pairwise_accelerations(pos, mass, active, chunk_size=7)
+
+        np.testing.assert_allclose(whole, tiled)
+        self.assertTrue(np.all(whole[~active] == 0))
+
+    def test_galaxy_view_elliptical_ratio(self):
+        """GalaxyView adapters work with elliptical_ratio and agree with the engine."""
+        universe = engine.Universe(1000, [(0, 0), (10, 10), (20, 20), (2000, 0)],
+                                   [10, 10, 10, 10], [1, 0, 1, 1])
+        universe.galaxies[1].active = False
+
+        self.assertEqual(g.elliptical_ratio(universe.galaxies), 1.0)
+        self.assertEqual(universe.elliptical_ratio(), 1.0)
+        self.assertEqual(universe.galaxies[3].color, 'r')
+        self.assertFalse(hasattr(universe.galaxies[0], '__dict__'))
+
+    def test_collide_heavier_absorbs(self):
+        """Heavier galaxy absorbs lighter, becomes elliptical and conserves momentum."""
+        universe = engine.Universe(1000, [(100, 100), (101, 100)], [1, 4], [0, 0],
+                                   vel=[(2, 0), (-1, 0)])
+        universe.collide()
+
+        self.assertFalse(universe.active[0])
+        self.assertTrue(universe.active[1])
+        self.assertEqual(universe.gal_type[1], engine.ELLIPTICAL)
+        self.assertEqual(universe.mass[1], 5)
+        np.testing.assert_allclose(universe.vel[1], [(1 * 2 + 4 * -1) / 5, 0])
+
+    def test_step_moves_only_active(self):
+        """Inactive galaxies are neither moved nor felt."""
+        universe = engine.Universe(1000, [(100, 100), (500, 500), (900, 900)],
+                                   [10, 10, 10], [0, 0, 0])
+        universe.active[2] = False
+        universe.step(0.1)
+
+        np.testing.assert_array_equal(universe.pos[2], [900, 900])
+        self.assertGreater(universe.pos[0, 0], 100)
+        self.assertLess(universe.pos[1, 0], 500)
+        self.assertAlmostEqual(universe.time, 0.1)
+
+    def test_population_counters_stay_incremental(self):
+        """Counters kept through steps and merges agree with a full recount."""
+        universe = engine.Universe.random(300, 60, 0.3, np.random.default_rng(4))
+        for galaxy in universe.galaxies[:3]:
+            galaxy.gal_type = 'elliptical'
+        series = engine.PopulationSeries(capacity=2)
+        universe.run(3, 0.1, series=series)
+        population = universe.population()
+        counts = universe.mass_function()
+
+        universe.recount()
+
+        self.assertGreater(universe.merger_count, 0)
+        self.assertEqual(population, universe.population())
+        np.testing.assert_array_equal(counts, universe.mass_function())
+        counted = universe.active & universe.visible
+        self.assertEqual(population.visible, np.count_nonzero(counted))
+        self.assertEqual(population.active + population.mergers, 60)
+        self.assertAlmostEqual(population.total_mass, universe.mass[universe.active].sum())
+        self.assertEqual(series.data['time'][-1], universe.time)
+        self.assertEqual(series.data['mergers'][-1], universe.merger_count)
+        self.assertTrue(np.all(np.diff(series.data['active']) <= 0))
+
+    def test_counting_restores_counters_on_error(self):
+        """Counters are added back when the body of counting raises."""
+        universe = engine.Universe(100, [(10, 10), (20, 20)], [1, 2], [0, 1])
+        before = universe.population()
+        with self.assertRaises(RuntimeError):
+            with universe.counting([1]):
+                raise RuntimeError('edit failed')
+
+        self.assertEqual(universe.population(), before)
+
+    def test_view_edits_drop_cached_accelerations(self):
+        """Moving a galaxy through a view makes leapfrog use the new forces."""
+        universe = engine.Universe(1000, [(100, 100), (200, 100)], [10, 10], [0, 0],
+                                   integrator='leapfrog')
+        universe.step(0.01)
+        universe.galaxies[1].x_pos = 50
+        universe.galaxies[0].mass = 20
+
+        np.testing.assert_array_equal(universe.current_accelerations(),
+                                      universe.accelerations())
+        self.assertLess(universe.current_accelerations()[0, 0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
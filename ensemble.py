@@ -0,0 +1,142 @@
+"""Ensemble module.
+
+Runs several seeded replicates of simulate_ratio per initial ratio and reports
+the mean and confidence interval of the final elliptical_ratio. Replicates are
+added in rounds, and a ratio stops receiving replicates once its interval is
+tight enough, so compute goes to the noisiest points.
+
+Classes:
+    EnsemblePoint
+
+Methods:
+    t_quantile: Student's t multiplier of a confidence interval.
+    confidence_interval: mean and confidence interval of a sample.
+    run_ensemble: runs an ensemble sweep with early stopping.
+"""
+
+import math
+from collections import namedtuple
+import numpy as np
+import sweep
+
+EnsemblePoint = namedtuple('EnsemblePoint', ['initial_type_ratio', 'mean', 'low', 'high',
+                                             'replicates', 'values'])
+EnsemblePoint.__doc__ = """Mean and confidence interval [low, high] of elliptical_ratio over
+replicates runs of one initial ratio; values holds the individual results."""
+
+def _t_central(value, dof):
+    """P(|T| < value) of Student's t with integer dof, Abramowitz & Stegun 26.7.3-4."""
+    theta = math.atan(value / math.sqrt(dof))
+    cos_sq = math.cos(theta)**2
+    if dof % 2:
+        term, total = math.cos(theta), 0.0
+        for k in range(1, (dof - 1) // 2 + 1):
+            total += term
+            term *= cos_sq * 2 * k / (2 * k + 1)
+        return 2 / math.pi * (theta + math.sin(theta) * total)
+    term, total = 1.0, 0.0
+    for k in range(1, dof // 2 + 1):
+        total += term
+        term *= cos_sq * (2 * k - 1) / (2 * k)
+    return math.sin(theta) * total
+
+def t_quantile(confidence, dof):
+    """Half-width multiplier of a two-sided Student's t interval.
+
+    Args:
+        confidence (float): confidence level, e.g. 0.95.
+        dof (int): degrees of freedom, the sample size minus one.
+
+    Returns:
+        float: the t value with P(|T| < t) = confidence, e.g. 2.776 for 0.95 and
+            4 degrees of freedom.
+    """
+    low, high = 0.0, 1.0
+    while _t_central(high, dof) < confidence:
+        low, high = high, 2 * high
+    for _ in range(100):
+        middle = (low + high) / 2
+        if _t_central(middle, dof) < confidence:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+def confidence_interval(values, confidence=0.95):
+    """Mean and Student's t confidence interval of a sample.
+
+    Args:
+        values (array_like): sample values.
+        confidence (float): confidence level of the interval.
+
+    Returns:
+        tuple of floats: mean, lower bound and upper bound. The bounds equal the
+            mean for fewer than two values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    if len(values) < 2:
+        return mean, mean, mean
+    half_width = t_quantile(confidence, len(values) - 1) * values.std(ddof=1) \
+        / np.sqrt(len(values))
+    return mean, mean - half_width, mean + half_width
+
+def run_ensemble(initial_type_ratios, universe_size, galaxy_number, time_step, time_max,
+                 min_replicates=5, max_replicates=50, batch=5, tolerance=0.02,
+                 confidence=0.95, seed=0, workers=None, **options):
+    """Runs replicates of simulate_ratio per initial ratio until each interval is tight.
+
+    Every ratio first gets min_replicates runs. After each round, ratios whose
+    confidence interval half-width is still above tolerance get batch more runs,
+    up to max_replicates. So do ratios whose replicates all agree: a zero-width
+    interval says nothing about the spread, so they never stop early. Replicate k
+    of a ratio always uses the same seed, so results are reproducible whatever the
+    stopping decisions.
+
+    Args:
+        initial_type_ratios (array_like): initial ratios to simulate.
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies to simulate.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps to take in simulation.
+        min_replicates (int): replicates every ratio gets, at least 2 so that the
+            interval has a width.
+        max_replicates (int): replicates after which a ratio stops regardless.
+        batch (int): replicates added per round to ratios that are not yet tight.
+        tolerance (float): target half-width of the confidence interval.
+        confidence (float): confidence level of the interval.
+        seed (int): base seed of the ensemble.
+        workers (int): number of worker processes, as in sweep.run_sweep.
+        **options: engine options passed on to simulate_ratio.
+
+    Returns:
+        list: one EnsemblePoint per initial ratio, in input order.
+
+    Raises:
+        ValueError: if min_replicates is below 2.
+    """
+    if min_replicates < 2:
+        raise ValueError(f'min_replicates must be at least 2 to estimate an interval, '
+                         f'got {min_replicates}')
+    ratios = [float(ratio) for ratio in initial_type_ratios]
+    values = [[] for _ in ratios]
+    pending = sweep.sweep_tasks(ratios, min(min_replicates, max_replicates), seed)
+    while pending:
+        for result in sweep.run_sweep(ratios, universe_size, galaxy_number, time_step, time_max,
+                                      workers=workers, tasks=pending, **options):
+            values[result.ratio_index].append((result.replicate, result.elliptical_ratio))
+        pending = []
+        for i, ratio in enumerate(ratios):
+            done = len(values[i])
+            _, low, high = confidence_interval([value for _, value in values[i]], confidence)
+            tight = low < high and (high - low) / 2 <= tolerance
+            if not tight and done < max_replicates:
+                pending.extend(sweep.SweepTask(i, ratio, replicate, seed)
+                               for replicate in range(done, min(done + batch, max_replicates)))
+
+    points = []
+    for ratio, ratio_values in zip(ratios, values):
+        ordered = [value for _, value in sorted(ratio_values)]
+        mean, low, high = confidence_interval(ordered, confidence)
+        points.append(EnsemblePoint(ratio, mean, low, high, len(ordered), ordered))
+    return points
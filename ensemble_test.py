@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import ensemble
+
+class EnsembleTests(unittest.TestCase):
+    """Tests for ensemble.py module."""
+
+    def test_confidence_interval(self):
+        """Interval is centred on the mean and shrinks with more samples."""
+        rng = np.random.default_rng(0)
+        few = rng.normal(0.5, 0.1, 10)
+        many = rng.normal(0.5, 0.1, 1000)
+
+        mean, low, high = ensemble.confidence_interval(few)
+        self.assertAlmostEqual(mean, few.mean())
+        self.assertAlmostEqual(mean - low, high - mean)
+        _, low_many, high_many = ensemble.confidence_interval(many)
+        self.assertLess(high_many - low_many, high - low)
+        self.assertEqual(ensemble.confidence_interval([0.3]), (0.3, 0.3, 0.3))
+
+    def test_t_quantile(self):
+        """Small samples widen the interval by Student's t, not the normal z value."""
+        self.assertAlmostEqual(ensemble.t_quantile(0.95, 4), 2.7764, places=4)
+        self.assertAlmostEqual(ensemble.t_quantile(0.95, 1), 12.7062, places=4)
+        self.assertAlmostEqual(ensemble.t_quantile(0.99, 9), 3.2498, places=4)
+        values = [0.1, 0.2, 0.3, 0.4, 0.5]
+        mean, low, _ = ensemble.confidence_interval(values)
+        self.assertAlmostEqual(mean - low, 2.7764 * np.std(values, ddof=1) / np.sqrt(5),
+                               places=4)
+
+    def test_min_replicates_below_two_rejected(self):
+        """One replicate cannot estimate an interval, so early stopping would never add more."""
+        with self.assertRaises(ValueError):
+            ensemble.run_ensemble([0.0], 1000, 12, 0.5, 3, min_replicates=1, workers=1)
+
+    def test_run_ensemble_early_stopping(self):
+        """Tight ratios stop at min_replicates, results are reproducible."""
+        args = ([0.0, 0.5], 1000, 12, 0.5, 3)
+        points = ensemble.run_ensemble(*args, min_replicates=3, max_replicates=6, batch=2,
+                                       tolerance=1e-9, seed=1, workers=1)
+        again = ensemble.run_ensemble(*args, min_replicates=3, max_replicates=6, batch=2,
+                                      tolerance=1e-9, seed=1, workers=1)
+        loose = ensemble.run_ensemble(*args, min_replicates=3, max_replicates=6, batch=2,
+                                      tolerance=1.0, seed=1, workers=1)
+
+        self.assertEqual(points, again)
+        for point in points:
+            self.assertLessEqual(point.low, point.mean)
+            self.assertLessEqual(point.mean, point.high)
+            self.assertEqual(point.replicates, 6)
+        self.assertEqual(loose[1].replicates, 3)
+        self.assertEqual(loose[1].values, points[1].values[:3])
+
+    def test_identical_replicates_keep_sampling(self):
+        """Replicates that all agree give a zero-width interval, which is not convergence."""
+        point, = ensemble.run_ensemble([0.0], 1000, 12, 0.5, 3, min_replicates=3,
+                                       max_replicates=6, batch=2, tolerance=1.0, seed=1,
+                                       workers=1)
+
+        self.assertEqual(point.values, [0.0] * 6)
+        self.assertEqual(point.replicates, 6)
+
+if __name__ == '__main__':
+    unittest.main()
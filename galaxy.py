@@ -12,18 +12,31 @@ Methods:
 
 import random
 import numpy as np
+import initial_conditions
+import instrumentation
 #import scipy.constants as c
 
-def rand_type(initial_type_ratio):
+# galaxy types are stored as small integers; names and plot colors are looked up
+SPIRAL = 0
+ELLIPTICAL = 1
+GAL_TYPES = ('spiral', 'elliptical')
+COLORS = ('b', 'r')
+
+def rand_type(initial_type_ratio, rng=None):
     """Returns random galaxy type based on desired initial ratio.
 
     Args:
         initial_type_ratio (float): ratio of elliptical to spiral galaxies
+        rng (np.random.Generator): random number generator. Defaults to the global
+            random module state.
 
     Returns:
         string: either 'elliptical' or 'spiral'.
     """
-    val = random.random()
+    if rng is None:
+        val = random.random()
+    else:
+        val = rng.random()
     if val < initial_type_ratio:
         return 'elliptical'
     return 'spiral'
@@ -59,7 +72,8 @@ class Galaxy:
         v_y (float): y component of velocity.
         active (bool): convenient tool to check if collided.
         in_visible_universe (bool): within bounds of universe.
-        color (string): convenient way to plot gal_type - matplotlib color.
+        color (string): convenient way to plot gal_type - matplotlib color. Derived
+            from gal_type.
 
     Methods:
         __init__: initializes Galaxy object.
@@ -74,6 +88,10 @@ class Galaxy:
         time_update: evolves the galaxy in time based on forces from other galaxies.
     """
 
+    # no per-instance __dict__; the type is kept as an index into GAL_TYPES
+    __slots__ = ('id_', 'x_pos', 'y_pos', 'v_x', 'v_y', 'mass', 'type_code', 'active',
+                 'in_visible_universe')
+
     def __init__(self, id_, x_pos, y_pos, mass, gal_type):
         """Initializes Galaxy object.
 
@@ -90,13 +108,25 @@ class Galaxy:
         self.v_x = 0
         self.v_y = 0
         self.mass = mass
-        self.gal_type = gal_type
+        self.type_code = ELLIPTICAL if gal_type == 'elliptical' else SPIRAL
         self.active = True
         self.in_visible_universe = True
-        if gal_type == 'elliptical':
-            self.color = 'r'
-        else:
-            self.color = 'b'
+
+    @property
+    def gal_type(self):
+        return GAL_TYPES[self.type_code]
+
+    @gal_type.setter
+    def gal_type(self, value):
+        self.type_code = GAL_TYPES.index(value)
+
+    @property
+    def color(self):
+        return COLORS[self.type_code]
+
+    @color.setter
+    def color(self, value):
+        self.type_code = COLORS.index(value)
 
     def __repr__(self):
         return f'Galaxy #{self.id_}:\n\t mass: {self.mass}\n\t coordinates\n\t ({self.x_pos}, \
@@ -175,9 +205,9 @@ class Galaxy:
         Args:
             other_galaxy (Galaxy): other galaxy of interest.
         """
+        instrumentation.count('mergers')
         other_galaxy.active = False
-        self.gal_type = 'elliptical'
-        self.color = 'r'
+        self.type_code = ELLIPTICAL
         total_mass = self.mass + other_galaxy.mass
         self.v_x = (self.mass * self.v_x + other_galaxy.mass * other_galaxy.v_x) / total_mass
         self.v_y = (self.mass * self.v_y + other_galaxy.mass * other_galaxy.v_y) / total_mass
@@ -192,43 +222,56 @@ class Galaxy:
             universe_size (int): size of observable universe.
             time_step (float): size of time step in simulation.
         """
-        self.in_visible_universe = self.visible(universe_size)
-        for galaxy in other_galaxy_list:
-            if (galaxy != self) and (galaxy.active):
-                collision_distance = self.mass/galaxy.mass
-                force_x, force_y = gravity_force(self, galaxy)
-                a_x, a_y = force_x/self.mass, force_y/self.mass
-                self.v_x += a_x * time_step
-                self.v_y += a_y * time_step
-                self.x_pos += self.v_x * time_step
-                self.y_pos += self.v_y * time_step
-                if self.distance(galaxy) < collision_distance:
-                    self.collide(galaxy)
-            elif (galaxy == self) and (galaxy.active):
-                self.x_pos += self.v_x * time_step
-                self.y_pos += self.v_y * time_step
-
-def simulate_initialize(universe_size, galaxy_number, initial_type_ratio):
-    """Creates 
+        with instrumentation.phase('visibility'):
+            self.in_visible_universe = self.visible(universe_size)
+        interactions = 0
+        with instrumentation.phase('interactions'):
+            for galaxy in other_galaxy_list:
+                if (galaxy != self) and (galaxy.active):
+                    interactions += 1
+                    collision_distance = self.mass/galaxy.mass
+                    force_x, force_y = gravity_force(self, galaxy)
+                    a_x, a_y = force_x/self.mass, force_y/self.mass
+                    self.v_x += a_x * time_step
+                    self.v_y += a_y * time_step
+                    self.x_pos += self.v_x * time_step
+                    self.y_pos += self.v_y * time_step
+                    if self.distance(galaxy) < collision_distance:
+                        self.collide(galaxy)
+                elif (galaxy == self) and (galaxy.active):
+                    self.x_pos += self.v_x * time_step
+                    self.y_pos += self.v_y * time_step
+        instrumentation.count('pair_interactions', interactions)
+
+def simulate_initialize(universe_size, galaxy_number, initial_type_ratio, rng=None,
+                        positions='uniform', masses='uniform'):
+    """Creates randomly placed galaxies for a simulation.
+
+    Positions, masses and types are drawn in bulk by initial_conditions.sample, so
+    a seed gives the same galaxies as Universe.random but not the galaxies of
+    earlier versions, which drew from np.random.randint and random.random.
 
     Args:
         universe_size (int): size of observable universe.
         galaxy_number (int): number of galaxies to simulate.
         initial_type_ratio (float): decimal between 0 and 1 giving initial ratio
             of elliptical to spiral galaxies.
+        rng (np.random.Generator): random number generator, for reproducible runs.
+            Defaults to one seeded from the global np.random state.
+        positions (string or callable): position distribution, see initial_conditions.
+        masses (string or callable): mass distribution, see initial_conditions.
 
     Returns:
         list: list of Galaxy objects that were generated.
     """
-    galaxies = []
-
-    x_positions = np.random.randint(0, universe_size, galaxy_number)
-    y_positions = np.random.randint(0, universe_size, galaxy_number)
-    masses = np.random.randint(1, 100, galaxy_number).astype(np.float64)
-
-    for i, x_pos in enumerate(x_positions):
-        gal_type = rand_type(initial_type_ratio)
-        galaxies.append(Galaxy(i, x_pos, y_positions[i], masses[i], gal_type))
+    with instrumentation.phase('initialize'):
+        pos, mass, gal_type = initial_conditions.sample(universe_size, galaxy_number,
+                                                        initial_type_ratio, rng, positions,
+                                                        masses)
+        # plain Python numbers: smaller than NumPy scalars and faster in arithmetic
+        galaxies = [Galaxy(i, x_pos, y_pos, galaxy_mass, GAL_TYPES[code])
+                    for i, ((x_pos, y_pos), galaxy_mass, code)
+                    in enumerate(zip(pos.tolist(), mass.tolist(), gal_type.tolist()))]
 
     return galaxies
 
@@ -247,7 +290,7 @@ def elliptical_ratio(galaxy_list):
     for galaxy in galaxy_list:
         if galaxy.in_visible_universe and galaxy.active:
             total_visible_galaxies += 1
-            if galaxy.gal_type == 'elliptical':
+            if galaxy.type_code == ELLIPTICAL:
                 elliptical_galaxies += 1
 
     return round(elliptical_galaxies/total_visible_galaxies, 4)
@@ -1,8 +1,12 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import galaxy as g
+import batched
+import engine
+import instrumentation
+import result_cache
+import sweep
 
-def simulate_ratio(universe_size, galaxy_number, initial_type_ratio, time_step, time_max):
+def simulate_ratio(universe_size, galaxy_number, initial_type_ratio, time_step, time_max,
+                   seed=None, **options):
     """Runs simulations to produce the predicted final ratio of elliptical to spiral galaxies
     given an initial ratio of elliptical to spiral.
 
@@ -13,35 +17,98 @@ def simulate_ratio(universe_size, galaxy_number, initial_type_ratio, time_step,
             of elliptical to spiral galaxies.
         time_step (float): size of time steps in simulation.
         time_max (int): how many time steps to take in simulation.
+        seed (int or np.random.SeedSequence): seed for a reproducible run. Defaults to
+            the global random state.
+        **options: engine options passed on to engine.Universe, such as solver.
 
     Returns:
         float: predicted final ratio of elliptical to spiral galaxies.
     """
-    time = 0
-    galaxies = g.simulate_initialize(universe_size, galaxy_number, initial_type_ratio)
+    rng = None if seed is None else np.random.default_rng(seed)
+    universe = engine.Universe.random(universe_size, galaxy_number, initial_type_ratio, rng,
+                                      **options)
+    universe.run(time_max, time_step)
 
-    while time <= time_max:
-        for galaxy in galaxies:
-            if galaxy.active:
-                galaxy.time_update(galaxies, universe_size, time_step)
+    with instrumentation.phase('stats'):
+        final_elliptical_ratio = universe.elliptical_ratio()
 
-        time += time_step
+    return final_elliptical_ratio
 
-    final_elliptical_ratio = g.elliptical_ratio(galaxies, universe_size)
+def simulate_ratios(universe_size, galaxy_number, initial_type_ratios, time_step, time_max,
+                    seeds=None):
+    """Runs simulate_ratio for a whole grid of initial ratios in one batched run.
 
-    return final_elliptical_ratio
+    Args:
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies to simulate per universe.
+        initial_type_ratios (array_like): initial ratios to simulate, one universe each.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps to take in simulation.
+        seeds (list): seed of each universe, as for simulate_ratio. Defaults to the
+            global random state.
+
+    Returns:
+        np.ndarray: predicted final ratio of elliptical to spiral galaxies per initial ratio.
+    """
+    universes = batched.BatchedUniverse.random(universe_size, galaxy_number,
+                                               initial_type_ratios, seeds)
+    universes.run(time_max, time_step)
+
+    with instrumentation.phase('stats'):
+        return universes.elliptical_ratio()
+
+def plot_ratios(results, time_step, time_max, path=None):
+    """Plots final against initial elliptical ratios of a sweep.
+
+    Args:
+        results (list): SweepResult list.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps were taken in simulation.
+        path (string): image file to save the plot to without opening a window. Shows
+            the plot in a window if None.
+    """
+    if path is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure()
+    else:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        fig = Figure()
+        FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.scatter([result.initial_type_ratio for result in results],
+               [result.elliptical_ratio for result in results])
+    ax.set_xlabel('Initial ratio of elliptical to spiral galaxies')
+    ax.set_ylabel('Final ratio of elliptical to spiral galaxies')
+    ax.set_title(f'Ratio of galaxy types after {time_max} time steps at step size of {time_step}')
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
 
 UNIVERSE_SIZE = 1000
 GALAXY_NUMBER = 20
 initial_type_ratios = np.arange(0, 0.5, 0.01)
 TIME_STEP = 0.05
 TIME_MAX = 120
+SEED = 0
+BATCH_SIZE = 10
+# file to write a per-phase trace of the sweep to (see instrumentation.py), or None.
+# Profiling runs the sweep in this process, as worker processes are not instrumented.
+PROFILE_PATH = None
+# directory caching sweep results, so rerunning the sweep only computes new points, or None
+CACHE_PATH = '.sweep_cache'
 
-ellip_fractions = [simulate_ratio(UNIVERSE_SIZE, GALAXY_NUMBER, i, TIME_STEP, TIME_MAX) \
-    for i in initial_type_ratios]
-
-plt.scatter(initial_type_ratios, ellip_fractions)
-plt.xlabel('Initial ratio of elliptical to spiral galaxies')
-plt.ylabel('Final ratio of elliptical to spiral galaxies')
-plt.title(f'Ratio of galaxy types after {TIME_MAX} time steps at step size of {TIME_STEP}')
-plt.show()
+if __name__ == '__main__':
+    recorder = None
+    if PROFILE_PATH is not None:
+        recorder = instrumentation.enable()
+    cache = None if CACHE_PATH is None else result_cache.ResultCache(CACHE_PATH)
+    results = sorted(sweep.run_sweep(initial_type_ratios, UNIVERSE_SIZE, GALAXY_NUMBER,
+                                     TIME_STEP, TIME_MAX, seed=SEED, batch_size=BATCH_SIZE,
+                                     cache=cache, workers=None if recorder is None else 1))
+    if recorder is not None:
+        instrumentation.disable()
+        recorder.dump_trace(PROFILE_PATH)
+        print(recorder.summary())
+    plot_ratios(results, TIME_STEP, TIME_MAX)
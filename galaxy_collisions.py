@@ -1,7 +1,7 @@
-import matplotlib.pyplot as plt
-from matplotlib import animation
-import numpy as np
-import galaxy as g
+import engine
+import instrumentation
+import render
+import trajectory
 
 UNIVERSE_SIZE = 1000
 GALAXY_NUMBER = 50
@@ -9,59 +9,79 @@ INITIAL_TYPE_RATIO = 0.0
 TIME_STEP = 0.02
 TIME_MAX = 5
 DOT_SCALE = 10
-time = 0
+# directory to record the run to (see trajectory.py), or None
+TRAJECTORY_PATH = None
+# file to encode the animation to without opening a window (e.g. 'run.mp4'), or None
+VIDEO_PATH = None
+# file to write a per-phase trace of the run to (see instrumentation.py), or None
+PROFILE_PATH = None
+FRAME_COUNT = int(TIME_MAX / TIME_STEP)
 
-galaxies = g.simulate_initialize(UNIVERSE_SIZE, GALAXY_NUMBER, INITIAL_TYPE_RATIO)
-positions = []
+def animate(universe, time_step, frame_count, dot_scale=DOT_SCALE, writer=None):
+    """Shows a simulation in a matplotlib window as it runs.
 
-fig, ax = plt.subplots()
-scatter = ax.scatter([], [], c=[], s=[])
-time_text = ax.text(0.02, 0.95, '', transform=ax.transAxes)
-fraction_text = ax.text(0.02, 0.90, '', transform=ax.transAxes)
-
-def update(frame):
-    """Updates frame in matplotlib animation.
+    The simulation runs ahead in a background thread; frames the window is too slow
+    to show are dropped rather than holding the physics back.
 
     Args:
-        frame (_type_): _description_
-
-    Returns:
-        plot: current scatter plot of galaxies.
-        string: current time in simulation.
-        string: current elliptical to visible galaxy ratio.
-    """    
-    global time
-
-    t_positions_x = []
-    t_positions_y = []
-    t_positions_c = []
-    t_positions_m = []
-
-    for galaxy in galaxies:
-        if galaxy.active:
-            galaxy.time_update(galaxies, UNIVERSE_SIZE, TIME_STEP)
-            t_positions_x.append(galaxy.x_pos)
-            t_positions_y.append(galaxy.y_pos)
-            t_positions_c.append(galaxy.color)
-            t_positions_m.append(galaxy.mass / DOT_SCALE)
-
-    elliptical_fraction = g.elliptical_ratio(galaxies)
-
-    scatter.set_offsets(np.column_stack((t_positions_x, t_positions_y)))
-    scatter.set_color(t_positions_c)
-    scatter.set_sizes(t_positions_m)
-
-    time_text.set_text(f'Time: {time:.2f}')
-    fraction_text.set_text(f'Elliptical Fraction: {elliptical_fraction:.2f}')
-
-    # Update axis limits
-    ax.set_xlim(0, UNIVERSE_SIZE)
-    ax.set_ylim(0, UNIVERSE_SIZE)
-
-    time += TIME_STEP
-
-    return scatter, time_text, fraction_text
-
-ani = animation.FuncAnimation(fig, update, frames=int(TIME_MAX / TIME_STEP), interval=50, blit=True)
-
-plt.show()
+        universe (engine.Universe): universe to simulate.
+        time_step (float): size of time steps in simulation.
+        frame_count (int): number of frames to simulate.
+        dot_scale (float): size of the galaxy markers per unit mass.
+        writer (trajectory.TrajectoryWriter): if given, records every simulated frame.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib import animation
+
+    producer = render.FrameProducer(universe, time_step, frame_count, recorder=writer)
+    fig, ax = plt.subplots()
+    renderer = render.ScatterRenderer(ax, universe.universe_size, len(universe.pos), dot_scale)
+    artists = (renderer.scatter, renderer.time_text, renderer.fraction_text)
+
+    def update(frame):
+        """Updates frame in matplotlib animation with the newest simulated frame.
+
+        Args:
+            frame (int): index of the animation frame.
+
+        Returns:
+            plot: current scatter plot of galaxies.
+            string: current time in simulation.
+            string: current elliptical to visible galaxy ratio.
+        """
+        slot = producer.latest()
+        if slot is None:
+            return artists
+        renderer.draw(producer, slot)
+        producer.release(slot)
+        return artists
+
+    producer.start()
+    # keep a reference while the window is open, or the animation is garbage collected
+    ani = animation.FuncAnimation(fig, update, interval=50, blit=True, cache_frame_data=False)
+    plt.show()
+    producer.stop()
+    producer.join()
+
+if __name__ == '__main__':
+    recorder = None
+    if PROFILE_PATH is not None:
+        recorder = instrumentation.enable()
+
+    universe = engine.Universe.random(UNIVERSE_SIZE, GALAXY_NUMBER, INITIAL_TYPE_RATIO)
+    writer = None
+    if TRAJECTORY_PATH is not None:
+        writer = trajectory.TrajectoryWriter(TRAJECTORY_PATH, GALAXY_NUMBER)
+
+    if VIDEO_PATH is not None:
+        render.encode_video(universe, VIDEO_PATH, TIME_STEP, FRAME_COUNT, recorder=writer)
+    else:
+        animate(universe, TIME_STEP, FRAME_COUNT, DOT_SCALE, writer)
+
+    if writer is not None:
+        writer.close()
+
+    if recorder is not None:
+        instrumentation.disable()
+        recorder.dump_trace(PROFILE_PATH)
+        print(recorder.summary())
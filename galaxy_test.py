@@ -36,6 +36,13 @@ class GalaxyTests(unittest.TestCase):
         galaxy_type = g.rand_type(0.5)
         self.assertIn(galaxy_type, ['elliptical', 'spiral'])
 
+    def test_simulate_initialize_rng(self):
+        """Test simulate_initialize is reproducible when given a seeded generator."""
+        first = g.simulate_initialize(1000, 10, 0.5, np.random.default_rng(7))
+        second = g.simulate_initialize(1000, 10, 0.5, np.random.default_rng(7))
+
+        self.assertEqual([str(galaxy) for galaxy in first], [str(galaxy) for galaxy in second])
+
     def test_gravity_force(self):#add more tests. add G? make dimensionless?
         """Test the gravity_force function
         Check if the returned force components are floats"""
@@ -197,6 +204,16 @@ class GalaxyTests(unittest.TestCase):
         # Check the resulting galaxy is elliptical
         self.assertEqual(galaxy1.gal_type, 'elliptical')
 
+    def test_compact_type(self):
+        """Test galaxy type is stored as an integer with color derived from it."""
+        galaxy = g.Galaxy(0, 0, 0, 1, 'spiral')
+
+        self.assertFalse(hasattr(galaxy, '__dict__'))
+        self.assertEqual((galaxy.type_code, galaxy.color), (g.SPIRAL, 'b'))
+
+        galaxy.color = 'r'
+        self.assertEqual((galaxy.type_code, galaxy.gal_type), (g.ELLIPTICAL, 'elliptical'))
+
     def test_collide_momentum(self):
         """Test collision function obeys conservation of momentum."""
         return
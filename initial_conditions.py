@@ -0,0 +1,185 @@
+"""Initial conditions module.
+
+Vectorized sampling of a starting population. Positions, masses and types are
+drawn in a few array calls from a single np.random.Generator and returned as
+arrays ready for the engine, without building Galaxy objects.
+
+Position and mass distributions are pluggable: pass a name from POSITIONS or
+MASSES, or any function with the same signature, e.g.
+functools.partial(plummer_positions, scale=50).
+
+    uniform (positions): integer coordinates uniform over the universe.
+    plummer (positions): one Plummer cluster at the centre of the universe.
+    clustered (positions): several Plummer clusters at random centres.
+    uniform (masses): integer masses uniform on [1, 100).
+    power_law (masses): masses from a power-law mass function dN/dM ~ M**-alpha.
+
+With the uniform distributions the bulk draws equal drawing x positions, y
+positions, masses and then one type per galaxy from the same Generator. They do
+not reproduce the populations of earlier versions, which drew positions and masses
+with np.random.randint and types with random.random.
+
+Methods:
+    generator: a np.random.Generator from a seed, a generator or the global state.
+    uniform_positions: integer positions uniform over the universe.
+    plummer_positions: positions of one Plummer cluster.
+    clustered_positions: positions of several Plummer clusters.
+    uniform_masses: integer masses uniform on [1, 100).
+    power_law_masses: masses from a power-law mass function.
+    sample: draws positions, masses and types of a population.
+"""
+
+import numpy as np
+
+MIN_MASS = 1
+MAX_MASS = 100
+# Plummer scale radius as a fraction of the universe size
+PLUMMER_SCALE = 0.1
+CLUSTERS = 4
+# Salpeter slope
+ALPHA = 2.35
+
+def generator(rng=None):
+    """A np.random.Generator from a seed, a generator or the global state.
+
+    Args:
+        rng (np.random.Generator, int or np.random.SeedSequence): generator, or seed
+            of a new one. Defaults to a generator seeded from the global np.random
+            state, so np.random.seed still makes runs reproducible.
+
+    Returns:
+        np.random.Generator: the generator.
+    """
+    if rng is None:
+        return np.random.default_rng(np.random.randint(2**31))
+    return np.random.default_rng(rng)
+
+def uniform_positions(rng, galaxy_number, universe_size):
+    """Integer positions uniform over the universe.
+
+    Args:
+        rng (np.random.Generator): random number generator.
+        galaxy_number (int): number of galaxies.
+        universe_size (int): size of observable universe.
+
+    Returns:
+        np.ndarray: (N, 2) positions.
+    """
+    x_pos = rng.integers(0, universe_size, galaxy_number)
+    y_pos = rng.integers(0, universe_size, galaxy_number)
+    return np.column_stack((x_pos, y_pos)).astype(np.float64)
+
+def _plummer_radii(rng, galaxy_number, scale):
+    # the projected Plummer profile encloses a fraction R**2 / (R**2 + a**2) of the mass
+    fraction = rng.random(galaxy_number)
+    radius = scale * np.sqrt(fraction / (1 - fraction))
+    angle = rng.uniform(0, 2 * np.pi, galaxy_number)
+    return radius[:, np.newaxis] * np.column_stack((np.cos(angle), np.sin(angle)))
+
+def plummer_positions(rng, galaxy_number, universe_size, scale=None):
+    """Positions of one Plummer cluster, in projection, centred on the universe.
+
+    Args:
+        rng (np.random.Generator): random number generator.
+        galaxy_number (int): number of galaxies.
+        universe_size (int): size of observable universe.
+        scale (float): Plummer radius. Defaults to PLUMMER_SCALE * universe_size.
+
+    Returns:
+        np.ndarray: (N, 2) positions. Some may lie outside the universe.
+    """
+    if scale is None:
+        scale = PLUMMER_SCALE * universe_size
+    return universe_size / 2 + _plummer_radii(rng, galaxy_number, scale)
+
+def clustered_positions(rng, galaxy_number, universe_size, clusters=CLUSTERS, scale=None):
+    """Positions of several Plummer clusters with centres uniform over the universe.
+
+    Args:
+        rng (np.random.Generator): random number generator.
+        galaxy_number (int): number of galaxies.
+        universe_size (int): size of observable universe.
+        clusters (int): number of clusters; galaxies are assigned to them uniformly.
+        scale (float): Plummer radius of each cluster. Defaults to
+            PLUMMER_SCALE * universe_size / clusters.
+
+    Returns:
+        np.ndarray: (N, 2) positions. Some may lie outside the universe.
+    """
+    if scale is None:
+        scale = PLUMMER_SCALE * universe_size / clusters
+    centres = rng.uniform(0, universe_size, (clusters, 2))
+    membership = rng.integers(0, clusters, galaxy_number)
+    return centres[membership] + _plummer_radii(rng, galaxy_number, scale)
+
+def uniform_masses(rng, galaxy_number):
+    """Integer masses uniform on [MIN_MASS, MAX_MASS).
+
+    Args:
+        rng (np.random.Generator): random number generator.
+        galaxy_number (int): number of galaxies.
+
+    Returns:
+        np.ndarray: (N,) masses.
+    """
+    return rng.integers(MIN_MASS, MAX_MASS, galaxy_number).astype(np.float64)
+
+def power_law_masses(rng, galaxy_number, alpha=ALPHA, low=MIN_MASS, high=MAX_MASS):
+    """Masses from a power-law mass function dN/dM ~ M**-alpha on [low, high).
+
+    Args:
+        rng (np.random.Generator): random number generator.
+        galaxy_number (int): number of galaxies.
+        alpha (float): slope of the mass function, 2.35 for Salpeter.
+        low (float): smallest mass.
+        high (float): largest mass.
+
+    Returns:
+        np.ndarray: (N,) masses.
+    """
+    fraction = rng.random(galaxy_number)
+    if alpha == 1:
+        return low * (high / low)**fraction
+    power = 1 - alpha
+    return (low**power + fraction * (high**power - low**power))**(1 / power)
+
+POSITIONS = {'uniform': uniform_positions, 'plummer': plummer_positions,
+             'clustered': clustered_positions}
+MASSES = {'uniform': uniform_masses, 'power_law': power_law_masses}
+
+def _lookup(distribution, registry, kind):
+    if callable(distribution):
+        return distribution
+    if distribution not in registry:
+        raise ValueError(f'unknown {kind} distribution {distribution!r}, '
+                         f'expected one of {tuple(registry)} or a function')
+    return registry[distribution]
+
+def sample(universe_size, galaxy_number, initial_type_ratio, rng=None, positions='uniform',
+           masses='uniform'):
+    """Draws positions, masses and types of a population from one generator.
+
+    Args:
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies.
+        initial_type_ratio (float): decimal between 0 and 1 giving initial ratio
+            of elliptical to spiral galaxies.
+        rng (np.random.Generator, int or np.random.SeedSequence): generator or seed,
+            see generator.
+        positions (string or callable): name in POSITIONS, or a function of
+            (rng, galaxy_number, universe_size) returning (N, 2) positions.
+        masses (string or callable): name in MASSES, or a function of
+            (rng, galaxy_number) returning (N,) masses.
+
+    Returns:
+        tuple of np.ndarray: (N, 2) positions, (N,) masses and (N,) int8 types,
+            1 (elliptical) with probability initial_type_ratio, else 0 (spiral).
+
+    Raises:
+        ValueError: if a distribution name is unknown.
+    """
+    rng = generator(rng)
+    pos = _lookup(positions, POSITIONS, 'position')(rng, galaxy_number, universe_size)
+    mass = _lookup(masses, MASSES, 'mass')(rng, galaxy_number)
+    gal_type = (rng.random(galaxy_number) < initial_type_ratio).astype(np.int8)
+    return pos, mass, gal_type
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+import batched
+import engine
+import initial_conditions as ic
+
+class InitialConditionsTests(unittest.TestCase):
+    """Tests for initial_conditions.py module."""
+
+    def test_uniform_matches_per_galaxy_draws(self):
+        """Bulk uniform draws equal the per-galaxy draws from the same Generator."""
+        pos, mass, gal_type = ic.sample(1000, 50, 0.3, np.random.default_rng(5))
+
+        rng = np.random.default_rng(5)
+        x_pos = rng.integers(0, 1000, 50)
+        y_pos = rng.integers(0, 1000, 50)
+        masses = rng.integers(1, 100, 50)
+        types = [int(rng.random() < 0.3) for _ in range(50)]
+        np.testing.assert_array_equal(pos, np.column_stack((x_pos, y_pos)))
+        np.testing.assert_array_equal(mass, masses)
+        np.testing.assert_array_equal(gal_type, types)
+
+    def test_plummer_half_mass_radius(self):
+        """Half of a projected Plummer cluster lies within its scale radius."""
+        pos, _, _ = ic.sample(1000, 20000, 0.5, np.random.default_rng(0), positions='plummer')
+        radius = np.linalg.norm(pos - 500, axis=1)
+
+        self.assertAlmostEqual(np.median(radius), ic.PLUMMER_SCALE * 1000, delta=5)
+
+    def test_power_law_masses(self):
+        """Power-law masses stay in range and favour small masses more as alpha grows."""
+        rng = np.random.default_rng(0)
+        shallow = ic.power_law_masses(rng, 10000, alpha=1)
+        steep = ic.power_law_masses(rng, 10000, alpha=2.35)
+
+        self.assertTrue(np.all((steep >= ic.MIN_MASS) & (steep < ic.MAX_MASS)))
+        self.assertLess(np.mean(steep), np.mean(shallow))
+
+    def test_pluggable_distributions(self):
+        """Functions are accepted as distributions and unknown names are rejected."""
+        pos, mass, _ = ic.sample(100, 10, 0.5, 0, positions='clustered',
+                                 masses=lambda rng, n: np.full(n, 7.0))
+
+        self.assertEqual(pos.shape, (10, 2))
+        np.testing.assert_array_equal(mass, 7)
+        with self.assertRaises(ValueError):
+            ic.sample(100, 10, 0.5, 0, positions='spiral_arms')
+
+    def test_universe_and_batch_draw_alike(self):
+        """Universe.random and BatchedUniverse.random give the same galaxies per seed."""
+        universe = engine.Universe.random(1000, 30, 0.4, np.random.default_rng(9),
+                                          masses='power_law')
+        batch = batched.BatchedUniverse.random(1000, 30, [0.4], seeds=[9], masses='power_law')
+
+        np.testing.assert_array_equal(batch.pos[0], universe.pos)
+        np.testing.assert_array_equal(batch.mass[0], universe.mass)
+        np.testing.assert_array_equal(batch.gal_type[0], universe.gal_type)
+
+if __name__ == '__main__':
+    unittest.main()
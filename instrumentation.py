@@ -0,0 +1,261 @@
+"""Instrumentation module.
+
+Opt-in per-phase profiling of the simulation loop. The engine, the Galaxy loop
+and the driver scripts mark their phases (force evaluation, collision detection,
+merging, visibility checks, stats, rendering) and counters (pair interactions,
+collisions) with phase and count. Nothing is recorded until a Recorder is
+enabled; while disabled, phase returns a shared no-op context manager and count
+returns at once, so the hooks cost a function call each.
+
+    recorder = instrumentation.enable()
+    universe.run(10, 0.1)
+    instrumentation.disable()
+    print(recorder.summary())
+    recorder.dump_trace('run.trace.json')  # open in chrome://tracing or Perfetto
+
+Classes:
+    Recorder
+
+Methods:
+    enable: starts recording into a Recorder.
+    disable: stops recording.
+    enabled: whether a Recorder is recording.
+    recording: context manager enabling a Recorder for a block.
+    phase: context manager timing a phase.
+    count: adds to a counter.
+    step: context manager marking one simulation step.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_NULL = nullcontext()
+_recorder = None
+
+class Recorder:
+    """Collects phase timings, counters and per-step records.
+
+    Parameters:
+        phases (dict): phase name to [total seconds, calls].
+        counters (dict): counter name to total.
+        steps (list): one dict per step with keys step, thread, seconds, phases,
+            counters and, when allocations are tracked, allocated (peak bytes
+            allocated during the step).
+        hooks (list): callables called with each step record as the step ends.
+        track_allocations (bool): whether allocations are traced with tracemalloc.
+
+    Methods:
+        __init__: initializes Recorder object.
+        add_hook: registers a callable called with each step record.
+        summary: text table of time and calls per phase, and counter totals.
+        dump_summary: writes totals as JSON.
+        dump_trace: writes every timed phase as a Chrome trace file.
+    """
+
+    def __init__(self, hooks=(), track_allocations=False, keep_events=True):
+        """Initializes Recorder object.
+
+        Args:
+            hooks (iterable): callables called with each step record as the step ends.
+            track_allocations (bool): trace allocations per step with tracemalloc.
+                Slows the run down noticeably.
+            keep_events (bool): keep every timed phase for dump_trace.
+        """
+        self.phases = {}
+        self.counters = {}
+        self.steps = []
+        self.hooks = list(hooks)
+        self.track_allocations = track_allocations
+        self._events = [] if keep_events else None
+        self._start = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def add_hook(self, hook):
+        """Registers a callable called with each step record as the step ends.
+
+        Args:
+            hook (callable): function of one argument, the step record dict.
+        """
+        self.hooks.append(hook)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                total = self.phases.setdefault(name, [0.0, 0])
+                total[0] += end - start
+                total[1] += 1
+                if self._events is not None:
+                    self._events.append((name, start, end, threading.get_ident()))
+            record = getattr(self._local, 'step', None)
+            if record is not None:
+                record['phases'][name] = record['phases'].get(name, 0.0) + end - start
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        record = getattr(self._local, 'step', None)
+        if record is not None:
+            record['counters'][name] = record['counters'].get(name, 0) + value
+
+    @contextmanager
+    def step(self):
+        record = {'step': len(self.steps), 'thread': threading.get_ident(), 'phases': {},
+                  'counters': {}}
+        self._local.step = record
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            with self.phase('step'):
+                yield
+        finally:
+            self._local.step = None
+            record['seconds'] = record['phases'].pop('step')
+            if self.track_allocations:
+                record['allocated'] = tracemalloc.get_traced_memory()[1] - baseline
+            with self._lock:
+                self.steps.append(record)
+            for hook in self.hooks:
+                hook(record)
+
+    def summary(self):
+        """Text table of time and calls per phase, and counter totals.
+
+        Returns:
+            string: the table, slowest phase first.
+        """
+        lines = [f"{'phase':<22}{'seconds':>10}{'calls':>10}{'mean ms':>10}"]
+        for name, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0]):
+            lines.append(f'{name:<22}{seconds:>10.3f}{calls:>10}{1e3 * seconds / calls:>10.3f}')
+        for name, total in sorted(self.counters.items()):
+            lines.append(f'{name:<22}{total:>10}')
+        allocated = [record['allocated'] for record in self.steps if 'allocated' in record]
+        if allocated:
+            lines.append(f"{'peak bytes per step':<22}{max(allocated):>10}")
+        return '\n'.join(lines)
+
+    def dump_summary(self, path):
+        """Writes phase and counter totals and the per-step records as JSON.
+
+        Args:
+            path (string): destination file.
+        """
+        document = {
+            'phases': {name: {'seconds': seconds, 'calls': calls}
+                       for name, (seconds, calls) in self.phases.items()},
+            'counters': self.counters,
+            'steps': self.steps,
+        }
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(document, file)
+
+    def dump_trace(self, path):
+        """Writes every timed phase in the Chrome trace event format.
+
+        Args:
+            path (string): destination file, viewable in chrome://tracing or Perfetto.
+
+        Raises:
+            ValueError: if the recorder was created with keep_events=False.
+        """
+        if self._events is None:
+            raise ValueError('this recorder does not keep events, see keep_events')
+        pid = os.getpid()
+        events = [{'name': name, 'ph': 'X', 'ts': 1e6 * (start - self._start),
+                   'dur': 1e6 * (end - start), 'pid': pid, 'tid': tid}
+                  for name, start, end, tid in self._events]
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+def enable(recorder=None, **options):
+    """Starts recording into a Recorder.
+
+    Args:
+        recorder (Recorder): recorder to use. Defaults to a new Recorder(**options).
+        **options: arguments of Recorder, such as hooks or track_allocations.
+
+    Returns:
+        Recorder: the active recorder.
+    """
+    global _recorder
+    if recorder is None:
+        recorder = Recorder(**options)
+    recorder._started_tracing = recorder.track_allocations and not tracemalloc.is_tracing()
+    if recorder._started_tracing:
+        tracemalloc.start()
+    _recorder = recorder
+    return recorder
+
+def disable():
+    """Stops recording. Returns the recorder that was active, or None."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None and recorder._started_tracing:
+        tracemalloc.stop()
+    return recorder
+
+def enabled():
+    """Whether a Recorder is recording. Guards counters that are costly to compute."""
+    return _recorder is not None
+
+@contextmanager
+def recording(recorder=None, **options):
+    """Context manager enabling a Recorder for the duration of a block.
+
+    Args:
+        recorder (Recorder): recorder to use. Defaults to a new Recorder(**options).
+        **options: arguments of Recorder, such as hooks or track_allocations.
+
+    Yields:
+        Recorder: the active recorder.
+    """
+    recorder = enable(recorder, **options)
+    try:
+        yield recorder
+    finally:
+        disable()
+
+def phase(name):
+    """Context manager timing a phase, e.g. with phase('forces'): ...
+
+    Args:
+        name (string): name of the phase.
+
+    Returns:
+        context manager: a no-op one while recording is disabled.
+    """
+    if _recorder is None:
+        return _NULL
+    return _recorder.phase(name)
+
+def count(name, value=1):
+    """Adds value to a counter, e.g. count('collisions', len(pairs)).
+
+    Args:
+        name (string): name of the counter.
+        value (int): amount to add.
+    """
+    if _recorder is not None:
+        _recorder.count(name, value)
+
+def step():
+    """Context manager marking one simulation step. Phases and counters recorded
+    inside it are also collected into the step's record.
+
+    Returns:
+        context manager: a no-op one while recording is disabled.
+    """
+    if _recorder is None:
+        return _NULL
+    return _recorder.step()
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import galaxy as g
+import engine
+import instrumentation
+
+class InstrumentationTests(unittest.TestCase):
+    """Tests for instrumentation.py module."""
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_disabled_records_nothing(self):
+        """Without an enabled recorder the hooks are no-ops."""
+        recorder = instrumentation.Recorder()
+        universe = engine.Universe.random(300, 10, 0.5, np.random.default_rng(0))
+        universe.run(0.5, 0.1)
+
+        self.assertFalse(instrumentation.enabled())
+        self.assertIs(instrumentation.phase('forces'), instrumentation.step())
+        self.assertEqual(recorder.phases, {})
+
+    def test_engine_phases_counters_and_hooks(self):
+        """Each engine step records its phases, pair interactions and mergers."""
+        universe = engine.Universe(1000, [(100, 100), (100.5, 100), (500, 500)], [5, 1, 3],
+                                   [0, 0, 0])
+        seen = []
+        with instrumentation.recording(hooks=[seen.append], track_allocations=True) as recorder:
+            universe.step(0.01)
+            universe.step(0.01)
+
+        self.assertEqual(len(recorder.steps), 2)
+        self.assertEqual(seen, recorder.steps)
+        self.assertTrue({'forces', 'collision_detection', 'merging', 'visibility',
+                         'step'} <= set(recorder.phases))
+        self.assertEqual(recorder.steps[0]['counters']['pair_interactions'], 9)
+        self.assertEqual(recorder.steps[1]['counters']['pair_interactions'], 4)
+        self.assertEqual(recorder.counters['mergers'], 1)
+        self.assertGreater(recorder.steps[0]['seconds'], 0)
+        self.assertIn('allocated', recorder.steps[0])
+        self.assertIn('forces', recorder.summary())
+
+    def test_legacy_loop_and_trace_dump(self):
+        """Galaxy.time_update is instrumented and phases dump as a Chrome trace."""
+        galaxies = g.simulate_initialize(1000, 5, 0.5, np.random.default_rng(1))
+        with instrumentation.recording() as recorder:
+            for galaxy in galaxies:
+                galaxy.time_update(galaxies, 1000, 0.01)
+
+        self.assertEqual(recorder.phases['interactions'][1], 5)
+        self.assertEqual(recorder.counters['pair_interactions'], 20)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            recorder.dump_trace(path)
+            with open(path, encoding='utf-8') as file:
+                events = json.load(file)['traceEvents']
+        self.assertEqual(len(events), 10)
+        self.assertEqual({event['name'] for event in events}, {'visibility', 'interactions'})
+
+if __name__ == '__main__':
+    unittest.main()
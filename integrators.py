@@ -0,0 +1,242 @@
+"""Integrators module.
+
+Time integration schemes for the simulation engine. Each integrator advances a
+Universe by one step with its backend's kick (velocity) and drift (position)
+kernels, and checks for collisions after every drift.
+
+    euler: semi-implicit Euler, the original scheme. One force evaluation per step.
+    leapfrog: kick-drift-kick leapfrog (velocity Verlet). Symplectic, second order,
+        one force evaluation per step.
+    adaptive: leapfrog whose step shrinks when any galaxy feels a strong pull.
+    block: leapfrog with hierarchical (block) time steps. Each galaxy gets its own
+        step time_step / 2**level from its acceleration, so only galaxies in close
+        encounters are refined and quiet ones keep the large step.
+
+Classes:
+    SemiImplicitEuler
+    Leapfrog
+    AdaptiveLeapfrog
+    BlockLeapfrog
+
+Methods:
+    step_limit: per-galaxy time step limit from the acceleration.
+    get_integrator: returns an integrator by name.
+"""
+
+import numpy as np
+
+# accuracy parameter of the time step criterion, dt = ETA * sqrt(LENGTH_SCALE / |a|)
+ETA = 0.2
+# length over which the acceleration may act in one step; the smallest capture radius
+LENGTH_SCALE = 1.0
+MAX_LEVEL = 8
+
+def step_limit(acc, eta=ETA, length_scale=LENGTH_SCALE):
+    """Per-galaxy time step limit eta * sqrt(length_scale / |a|).
+
+    Args:
+        acc (np.ndarray): (N, 2) array of accelerations.
+        eta (float): accuracy parameter, smaller is more accurate.
+        length_scale (float): length scale of the criterion.
+
+    Returns:
+        np.ndarray: (N,) time step limits, inf where the acceleration is zero.
+    """
+    magnitude = np.linalg.norm(acc, axis=1)
+    with np.errstate(divide='ignore'):
+        return eta * np.sqrt(length_scale / magnitude)
+
+class SemiImplicitEuler:
+    """Semi-implicit Euler: kick with the current force, then drift.
+
+    Methods:
+        advance: advances a universe by one step.
+    """
+
+    name = 'euler'
+
+    def advance(self, universe, time_step):
+        """Advances a universe by one step.
+
+        Args:
+            universe (engine.Universe): universe to advance.
+            time_step (float): size of time step in simulation.
+
+        Returns:
+            float: time advanced.
+        """
+        backend = universe.backend
+        backend.kick(universe.vel, universe.accelerations(), universe.active, time_step)
+        backend.drift(universe.pos, universe.vel, universe.active, time_step)
+        universe.collide()
+        return time_step
+
+class Leapfrog:
+    """Kick-drift-kick leapfrog (velocity Verlet).
+
+    The force at the end of a step is reused for the opening kick of the next one,
+    so each step costs a single force evaluation.
+
+    Methods:
+        advance: advances a universe by one step.
+        kick_drift_kick: one leapfrog step of a given size.
+    """
+
+    name = 'leapfrog'
+
+    def advance(self, universe, time_step):
+        """Advances a universe by one step.
+
+        Args:
+            universe (engine.Universe): universe to advance.
+            time_step (float): size of time step in simulation.
+
+        Returns:
+            float: time advanced.
+        """
+        self.kick_drift_kick(universe, time_step)
+        return time_step
+
+    def kick_drift_kick(self, universe, time_step):
+        """One leapfrog step of size time_step.
+
+        Args:
+            universe (engine.Universe): universe to advance.
+            time_step (float): size of the step.
+        """
+        backend = universe.backend
+        backend.kick(universe.vel, universe.current_accelerations(), universe.active,
+                     time_step / 2)
+        backend.drift(universe.pos, universe.vel, universe.active, time_step)
+        universe.collide()
+        universe.acc = universe.accelerations()
+        backend.kick(universe.vel, universe.acc, universe.active, time_step / 2)
+
+class AdaptiveLeapfrog(Leapfrog):
+    """Leapfrog with a global step chosen from the strongest acceleration.
+
+    Parameters:
+        eta (float): accuracy parameter of the step criterion.
+        length_scale (float): length scale of the step criterion.
+        max_level (int): smallest allowed step is time_step / 2**max_level.
+
+    Methods:
+        __init__: initializes AdaptiveLeapfrog object.
+        advance: advances a universe by one adaptive step.
+    """
+
+    name = 'adaptive'
+
+    def __init__(self, eta=ETA, length_scale=LENGTH_SCALE, max_level=MAX_LEVEL):
+        """Initializes AdaptiveLeapfrog object.
+
+        Args:
+            eta (float): accuracy parameter of the step criterion.
+            length_scale (float): length scale of the step criterion.
+            max_level (int): smallest allowed step is time_step / 2**max_level.
+        """
+        self.eta = eta
+        self.length_scale = length_scale
+        self.max_level = max_level
+
+    def advance(self, universe, time_step):
+        """Advances a universe by one step of at most time_step.
+
+        Args:
+            universe (engine.Universe): universe to advance.
+            time_step (float): largest allowed step.
+
+        Returns:
+            float: time advanced.
+        """
+        limit = step_limit(universe.current_accelerations(), self.eta, self.length_scale)
+        limit = limit[universe.active].min(initial=np.inf)
+        step = float(np.clip(limit, time_step / 2**self.max_level, time_step))
+        self.kick_drift_kick(universe, step)
+        return step
+
+class BlockLeapfrog(AdaptiveLeapfrog):
+    """Leapfrog with hierarchical (block) time steps.
+
+    At the start of each step galaxy i is put on level k_i, the smallest level whose
+    step time_step / 2**k_i is within its limit. The step is split into 2**L
+    substeps, L the deepest level in use. Every galaxy drifts each substep, but a
+    galaxy on level k is only kicked, and only has its force evaluated, every
+    2**(L - k) substeps.
+
+    Methods:
+        levels: time step level of every galaxy.
+        advance: advances a universe by one full step.
+    """
+
+    name = 'block'
+
+    def levels(self, universe, time_step):
+        """Time step level of every galaxy.
+
+        Args:
+            universe (engine.Universe): universe of interest.
+            time_step (float): largest allowed step.
+
+        Returns:
+            np.ndarray: (N,) levels between 0 and max_level.
+        """
+        limit = step_limit(universe.current_accelerations(), self.eta, self.length_scale)
+        with np.errstate(divide='ignore'):
+            levels = np.ceil(np.log2(time_step / limit))
+        return np.clip(levels, 0, self.max_level).astype(np.int64)
+
+    def advance(self, universe, time_step):
+        """Advances a universe by one full step of time_step in block substeps.
+
+        Args:
+            universe (engine.Universe): universe to advance.
+            time_step (float): size of the full step.
+
+        Returns:
+            float: time advanced.
+        """
+        backend = universe.backend
+        levels = self.levels(universe, time_step)
+        deepest = int(levels[universe.active].max(initial=0))
+        levels = np.minimum(levels, deepest)
+        substep = time_step / 2**deepest
+        period = 2**(deepest - levels)
+        acc = universe.current_accelerations()
+        for sub in range(2**deepest):
+            starting = universe.active & (sub % period == 0)
+            for level in np.unique(levels[starting]):
+                backend.kick(universe.vel, acc, starting & (levels == level),
+                             time_step / 2**level / 2)
+            backend.drift(universe.pos, universe.vel, universe.active, substep)
+            universe.collide()
+            ending = universe.active & ((sub + 1) % period == 0)
+            fresh = universe.accelerations(targets=ending)
+            acc[ending] = fresh[ending]
+            for level in np.unique(levels[ending]):
+                backend.kick(universe.vel, acc, ending & (levels == level),
+                             time_step / 2**level / 2)
+        universe.acc = acc
+        return time_step
+
+INTEGRATORS = {integrator.name: integrator
+               for integrator in (SemiImplicitEuler, Leapfrog, AdaptiveLeapfrog, BlockLeapfrog)}
+
+def get_integrator(integrator='euler'):
+    """Returns an integrator by name, or the given integrator object unchanged.
+
+    Args:
+        integrator (string or object): 'euler', 'leapfrog', 'adaptive', 'block' or an
+            integrator instance (e.g. BlockLeapfrog(eta=0.1)).
+
+    Returns:
+        object: integrator instance.
+
+    Raises:
+        ValueError: if integrator is an unknown name.
+    """
+    if not isinstance(integrator, str):
+        return integrator
+    if integrator not in INTEGRATORS:
+        raise ValueError(f'unknown integrator {integrator!r}, expected one of {tuple(INTEGRATORS)}')
+    return INTEGRATORS[integrator]()
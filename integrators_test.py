@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+import engine
+import integrators
+
+def binary(integrator, separation=10.0):
+    """Equal-mass circular binary, period 2 * pi * sqrt(separation**3 / 2)."""
+    speed = np.sqrt(2 / separation) / 2
+    return engine.Universe(1000, [(500 - separation / 2, 500), (500 + separation / 2, 500)],
+                           [1, 1], [0, 0], vel=[(0, -speed), (0, speed)],
+                           integrator=integrator)
+
+def energy(universe):
+    """Total kinetic plus potential energy of the active galaxies."""
+    active = universe.active
+    kinetic = 0.5 * np.sum(universe.mass[active] * np.sum(universe.vel[active]**2, axis=1))
+    pos, mass = universe.pos[active], universe.mass[active]
+    first, second = np.triu_indices(len(pos), k=1)
+    dist = np.linalg.norm(pos[first] - pos[second], axis=1)
+    return kinetic - np.sum(mass[first] * mass[second] / dist)
+
+class IntegratorsTests(unittest.TestCase):
+    """Tests for integrators.py module."""
+
+    def test_get_integrator(self):
+        """Integrators are chosen by name or passed as instances."""
+        self.assertIsInstance(integrators.get_integrator('block'), integrators.BlockLeapfrog)
+        custom = integrators.AdaptiveLeapfrog(eta=0.05)
+        self.assertIs(integrators.get_integrator(custom), custom)
+        with self.assertRaises(ValueError):
+            integrators.get_integrator('rk4')
+
+    def test_leapfrog_conserves_energy(self):
+        """Leapfrog keeps the binary's energy far better than Euler at the same step."""
+        drift = {}
+        for name in ('euler', 'leapfrog'):
+            universe = binary(name)
+            start = energy(universe)
+            universe.run(100, 0.5)
+            drift[name] = abs(energy(universe) / start - 1)
+
+        self.assertLess(drift['leapfrog'], 0.01)
+        self.assertLess(drift['leapfrog'], drift['euler'] / 10)
+
+    def test_adaptive_shrinks_step(self):
+        """Adaptive steps shrink for a close pair and never exceed the requested step."""
+        universe = binary('adaptive', separation=3.0)
+        universe.step(1.0)
+
+        self.assertLess(universe.time, 1.0)
+        self.assertGreaterEqual(universe.time, 1.0 / 2**integrators.MAX_LEVEL)
+
+    def test_block_refines_only_close_pairs(self):
+        """Quiet galaxies stay on level 0 and cost one force evaluation per step."""
+        universe = binary('block', separation=3.0)
+        far = engine.Universe(1000, [(100, 100), (900, 900)], [1, 1], [0, 0])
+        universe = engine.Universe(1000, np.vstack((universe.pos, far.pos)), [1, 1, 1, 1],
+                                   [0, 0, 0, 0], vel=np.vstack((universe.vel, far.vel)),
+                                   integrator='block')
+        levels = universe.integrator.levels(universe, 1.0)
+
+        self.assertTrue(np.all(levels[:2] > 0))
+        self.assertTrue(np.all(levels[2:] == 0))
+
+        evaluations = np.zeros(4, dtype=int)
+        accelerations = universe.accelerations
+
+        def counting(targets=None):
+            evaluations[universe.active if targets is None else targets] += 1
+            return accelerations(targets)
+
+        universe.accelerations = counting
+        start = energy(universe)
+        universe.step(1.0)
+
+        np.testing.assert_array_equal(evaluations[2:], [1, 1])
+        self.assertEqual(evaluations[0], 2**levels[0])
+        self.assertAlmostEqual(universe.time, 1.0)
+        self.assertLess(abs(energy(universe) / start - 1), 0.01)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""Kernels module.
+
+Force kernels of the simulation engine. A kernel gives the pull of a point mass
+m at separation delta (distance r) as a = G * m * weight(r**2) * delta:
+
+    newtonian: weight = 1 / r**3, the original unsoftened force. Diverges as two
+        galaxies approach, which forces small time steps for the whole run.
+    plummer: weight = 1 / (r**2 + eps**2)**1.5, the force of a Plummer sphere of
+        scale eps. Bounded by about 0.38 * G * m / eps**2.
+    spline: the cubic spline softening of Monaghan & Lattanzio as used in GADGET,
+        with the kernel reaching zero at h = 2.8 * eps. Exactly Newtonian beyond h,
+        unlike Plummer softening, and bounded inside it.
+
+Softened kernels cap the acceleration of close encounters, so a run stays stable
+at larger time steps (and the adaptive integrators refine fewer steps) while
+separations above a few eps are unaffected.
+
+G is 1 in the model's dimensionless units, or the gravitational constant of one
+of UNITS when positions, masses and times are given in those units.
+
+Classes:
+    ForceKernel
+
+Methods:
+    get_kernel: returns a kernel by name.
+"""
+
+import numpy as np
+
+KERNELS = ('newtonian', 'plummer', 'spline')
+# gravitational constant in each system of units
+UNITS = {
+    'dimensionless': 1.0,
+    # metres, kilograms, seconds
+    'si': 6.67430e-11,
+    # centimetres, grams, seconds
+    'cgs': 6.67430e-8,
+    # kiloparsecs, solar masses, km/s (so time in units of 0.978 Gyr)
+    'galactic': 4.30091e-6,
+}
+# ratio of the spline kernel's support h to the equivalent Plummer softening
+SPLINE_RATIO = 2.8
+
+class ForceKernel:
+    """Force law between point masses.
+
+    Parameters:
+        name (string): one of KERNELS.
+        softening (float): softening length eps. 0 for the newtonian kernel.
+        units (string): name of the units of G, or 'custom'.
+        G (float): gravitational constant.
+        code (int): index of name in KERNELS, passed to compiled kernels.
+
+    Methods:
+        __init__: initializes ForceKernel object.
+        weight: weight(r**2) of the pull at squared distances.
+        settings: arguments rebuilding the kernel.
+    """
+
+    def __init__(self, name='newtonian', softening=0.0, units='dimensionless'):
+        """Initializes ForceKernel object.
+
+        Args:
+            name (string): 'newtonian', 'plummer' or 'spline'.
+            softening (float): softening length eps, positive for the softened kernels.
+            units (string or float): name in UNITS, or the value of G.
+
+        Raises:
+            ValueError: if name or units is unknown, or softening does not suit name.
+        """
+        if name not in KERNELS:
+            raise ValueError(f'unknown kernel {name!r}, expected one of {KERNELS}')
+        if name == 'newtonian' and softening:
+            raise ValueError('the newtonian kernel takes no softening, use plummer or spline')
+        if name != 'newtonian' and not softening > 0:
+            raise ValueError(f'the {name} kernel needs a positive softening')
+        if isinstance(units, str):
+            if units not in UNITS:
+                raise ValueError(f'unknown units {units!r}, expected one of {tuple(UNITS)}')
+            self.units = units
+            self.G = UNITS[units]
+        else:
+            self.units = 'custom'
+            self.G = float(units)
+        self.name = name
+        self.softening = float(softening)
+        self.code = KERNELS.index(name)
+
+    def __repr__(self):
+        return f'ForceKernel({self.name!r}, softening={self.softening}, G={self.G})'
+
+    def weight(self, dist_sq):
+        """Weight of the pull at squared distances dist_sq, including G.
+
+        Args:
+            dist_sq (np.ndarray): squared separations.
+
+        Returns:
+            np.ndarray: weights; zero at zero separation.
+        """
+        if self.name == 'plummer':
+            weight = (dist_sq + self.softening**2)**-1.5
+        else:
+            with np.errstate(divide='ignore'):
+                weight = np.where(dist_sq > 0, dist_sq**-1.5, 0)
+            if self.name == 'spline':
+                support = SPLINE_RATIO * self.softening
+                u = np.sqrt(dist_sq) / support
+                with np.errstate(divide='ignore'):
+                    inner = 32 / 3 + u**2 * (32 * u - 38.4)
+                    outer = 64 / 3 - 48 * u + 38.4 * u**2 - 32 / 3 * u**3 - 1 / 15 / u**3
+                weight = np.where(u < 1, np.where(u < 0.5, inner, outer) / support**3, weight)
+        if self.G != 1:
+            weight = self.G * weight
+        return weight
+
+    def settings(self):
+        """Arguments rebuilding the kernel, e.g. for a checkpoint.
+
+        Returns:
+            dict: keyword arguments of ForceKernel.
+        """
+        units = self.G if self.units == 'custom' else self.units
+        return {'name': self.name, 'softening': self.softening, 'units': units}
+
+NEWTONIAN = ForceKernel()
+
+def get_kernel(kernel='newtonian', softening=0.0, units='dimensionless'):
+    """Returns a kernel by name, or the given kernel object unchanged.
+
+    Args:
+        kernel (string or ForceKernel): 'newtonian', 'plummer', 'spline' or a kernel.
+        softening (float): softening length of a named kernel.
+        units (string or float): units of a named kernel, see ForceKernel.
+
+    Returns:
+        ForceKernel: kernel instance.
+    """
+    if isinstance(kernel, ForceKernel):
+        return kernel
+    if kernel == 'newtonian' and not softening and units == 'dimensionless':
+        return NEWTONIAN
+    return ForceKernel(kernel, softening, units)
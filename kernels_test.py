@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import backends
+import checkpoint
+import engine
+import kernels
+
+class KernelsTests(unittest.TestCase):
+    """Tests for kernels.py module."""
+
+    def test_far_field_newtonian(self):
+        """Softened kernels match the newtonian one far from the softening length."""
+        dist_sq = np.array([100.0**2, 400.0**2])
+        newtonian = kernels.NEWTONIAN.weight(dist_sq)
+
+        np.testing.assert_array_equal(kernels.ForceKernel('spline', 5).weight(dist_sq), newtonian)
+        np.testing.assert_allclose(kernels.ForceKernel('plummer', 5).weight(dist_sq), newtonian,
+                                   rtol=5e-3)
+
+    def test_softened_bounded(self):
+        """Softened pulls stay finite and below G m / eps**2 at any separation."""
+        dist = np.linspace(0, 10, 1001)
+        for name in ('plummer', 'spline'):
+            force = dist * kernels.ForceKernel(name, 2).weight(dist**2)
+            self.assertTrue(np.all(np.isfinite(force)))
+            self.assertLess(force.max(), 1 / 2**2)
+
+    def test_spline_continuous(self):
+        """The spline kernel joins its pieces and the newtonian force smoothly."""
+        kernel = kernels.ForceKernel('spline', 1)
+        for u in (0.5, 1.0):
+            dist = u * kernels.SPLINE_RATIO + np.array([-1e-9, 1e-9])
+            below, above = kernel.weight(dist**2)
+            self.assertAlmostEqual(below / above, 1, places=6)
+
+    def test_units_scale_g(self):
+        """Units multiply accelerations by their gravitational constant."""
+        pos = np.array([[0.0, 0.0], [3.0, 4.0]])
+        mass = np.array([2.0, 5.0])
+        active = np.ones(2, dtype=bool)
+        plain = engine.pairwise_accelerations(pos, mass, active)
+        galactic = engine.pairwise_accelerations(pos, mass, active,
+                                                 kernel=kernels.ForceKernel(units='galactic'))
+
+        np.testing.assert_allclose(galactic, kernels.UNITS['galactic'] * plain)
+        np.testing.assert_allclose(plain[0], 5 * np.array([3.0, 4.0]) / 125)
+
+    def test_rejects_bad_softening(self):
+        """Softened kernels need a softening length, the newtonian one refuses it."""
+        with self.assertRaises(ValueError):
+            kernels.ForceKernel('plummer')
+        with self.assertRaises(ValueError):
+            kernels.ForceKernel('newtonian', 1)
+        with self.assertRaises(ValueError):
+            kernels.ForceKernel(units='imperial')
+
+    @unittest.skipIf(backends.numba is None, 'numba is not installed')
+    def test_numba_matches_numpy(self):
+        """Compiled kernels agree with the NumPy ones for every force law."""
+        rng = np.random.default_rng(0)
+        pos = rng.uniform(0, 50, (60, 2))
+        pos[1] = pos[0]
+        mass = rng.uniform(1, 100, 60)
+        active = np.ones(60, dtype=bool)
+        for kernel in (kernels.NEWTONIAN, kernels.ForceKernel('plummer', 3, 'galactic'),
+                       kernels.ForceKernel('spline', 3)):
+            expected = backends.NumpyBackend().accelerations(pos, mass, active, kernel=kernel)
+            actual = backends.NumbaBackend().accelerations(pos, mass, active, kernel=kernel)
+            np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-15)
+
+    def test_barnes_hut_matches_direct(self):
+        """Barnes-Hut with theta 0 equals direct summation under a softened kernel."""
+        rng = np.random.default_rng(1)
+        pos = rng.uniform(0, 100, (40, 2))
+        mass = rng.uniform(1, 100, 40)
+        active = np.ones(40, dtype=bool)
+        kernel = kernels.ForceKernel('spline', 10)
+        backend = backends.NumpyBackend()
+
+        np.testing.assert_allclose(
+            backend.accelerations(pos, mass, active, 'barnes_hut', theta=0, kernel=kernel),
+            backend.accelerations(pos, mass, active, kernel=kernel), rtol=1e-9)
+
+    def test_checkpoint_keeps_kernel(self):
+        """Checkpoints restore the force law."""
+        universe = engine.Universe.random(1000, 20, 0.3, 0, kernel='plummer', softening=4,
+                                          units=2.5)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.npz')
+            checkpoint.save_checkpoint(universe, path)
+            restored, _ = checkpoint.load_checkpoint(path)
+
+        self.assertEqual(restored.kernel.settings(), universe.kernel.settings())
+
+if __name__ == '__main__':
+    unittest.main()
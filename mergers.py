@@ -0,0 +1,235 @@
+"""Mergers module.
+
+Event log of galaxy mergers. While a MergerLog is attached to a Universe, every
+merger is recorded with the time, the IDs, masses, types and velocities of both
+galaxies just before they merged. Events are buffered in memory and appended in
+chunks to a column store (see column_store), as trajectories are, so reading back
+maps the columns with np.memmap.
+
+The log is enough to rebuild who merged with whom, so merger-history and
+population studies can run on it instead of on full trajectories:
+
+    with MergerLog('run.mergers') as log:
+        universe.run(120, 0.05, mergers=log)
+    tree = MergerTree(open_mergers('run.mergers'))
+    tree.progenitors(tree.descendant(7))
+
+Classes:
+    MergerLog
+    MergerEvents
+    MergerTree
+
+Methods:
+    open_mergers: memory-maps a recorded merger log.
+"""
+
+from collections import deque
+import numpy as np
+import column_store
+
+HEADER = 'mergers.json'
+# column name: (dtype, shape of one event)
+FIELDS = {
+    'time': ('<f8', ()),
+    'kept_id': ('<i8', ()),
+    'lost_id': ('<i8', ()),
+    'kept_mass': ('<f8', ()),
+    'lost_mass': ('<f8', ()),
+    'kept_type': ('i1', ()),
+    'lost_type': ('i1', ()),
+    'kept_vel': ('<f8', (2,)),
+    'lost_vel': ('<f8', (2,)),
+}
+
+class MergerLog:
+    """Buffers merger events and appends them to disk in chunks.
+
+    Parameters:
+        path (string): directory of the log.
+        chunk_events (int): events buffered in memory before they are appended.
+        events (int): number of events written so far.
+
+    Methods:
+        __init__: creates (or appends to) a merger log.
+        record: buffers the mergers of one collision pass.
+        flush: appends buffered events to disk.
+        close: flushes any buffered events.
+    """
+
+    def __init__(self, path, chunk_events=4096):
+        """Creates a merger log directory, or appends to an existing one.
+
+        Events appended after the last complete chunk, e.g. by a crashed run, are
+        dropped, see column_store.
+
+        Args:
+            path (string): directory of the log.
+            chunk_events (int): events buffered in memory before they are appended.
+        """
+        self.path = path
+        self.chunk_events = chunk_events
+        self._store = column_store.ColumnWriter(path, HEADER, FIELDS, 'events', chunk_events)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def events(self):
+        """int: number of events written so far."""
+        return self._store.rows
+
+    def record(self, time, **columns):
+        """Buffers the mergers of one collision pass, flushing whenever the buffer fills.
+
+        Args:
+            time (float): simulation time of the mergers.
+            **columns: one array per FIELDS entry other than time, one row per merger.
+        """
+        count = len(columns['kept_id'])
+        self._store.append(count, time=np.broadcast_to(time, (count,)), **columns)
+
+    def flush(self):
+        """Appends buffered events to the column files and updates the header."""
+        self._store.flush()
+
+    def close(self):
+        """Flushes any buffered events."""
+        self._store.close()
+
+class MergerEvents:
+    """Read-only, memory-mapped columns of a recorded merger log.
+
+    Parameters:
+        events (int): number of events, in the order they happened.
+        time (np.memmap): (events,) simulation times.
+        kept_id (np.memmap): (events,) IDs of the absorbing galaxies.
+        lost_id (np.memmap): (events,) IDs of the absorbed galaxies.
+        kept_mass (np.memmap): (events,) masses of the absorbing galaxies before merging.
+        lost_mass (np.memmap): (events,) masses of the absorbed galaxies.
+        kept_type (np.memmap): (events,) types of the absorbing galaxies before merging.
+        lost_type (np.memmap): (events,) types of the absorbed galaxies.
+        kept_vel (np.memmap): (events, 2) velocities of the absorbing galaxies before merging.
+        lost_vel (np.memmap): (events, 2) velocities of the absorbed galaxies.
+    """
+
+    def __init__(self, path):
+        """Memory-maps every column of the merger log at path.
+
+        Args:
+            path (string): directory of the log.
+        """
+        self.events = column_store.read_header(path, HEADER)['events']
+        for name, column in column_store.open_columns(path, FIELDS, self.events).items():
+            setattr(self, name, column)
+
+    def __len__(self):
+        return self.events
+
+def open_mergers(path):
+    """Memory-maps a recorded merger log.
+
+    Args:
+        path (string): directory of the log.
+
+    Returns:
+        MergerEvents: read-only views of every column.
+    """
+    return MergerEvents(path)
+
+class MergerTree:
+    """Merger tree queries over a merger log.
+
+    Every galaxy is absorbed at most once, so the events form a forest: each
+    surviving galaxy is the root of the tree of galaxies merged into it.
+
+    Parameters:
+        events (MergerEvents): the merger events.
+
+    Methods:
+        __init__: indexes the events.
+        absorbed_by: galaxies a galaxy absorbed directly.
+        descendant: galaxy that finally holds a galaxy's mass.
+        progenitors: every galaxy merged into a galaxy, directly or not.
+        history: events that built up a galaxy.
+        merger_counts: number of progenitors of every galaxy that absorbed any.
+    """
+
+    def __init__(self, events):
+        """Indexes the events by absorbing and by absorbed galaxy.
+
+        Args:
+            events (MergerEvents): the merger events, e.g. from open_mergers.
+        """
+        self.events = events
+        kept = np.asarray(events.kept_id)
+        lost = np.asarray(events.lost_id)
+        # stable sort keeps each galaxy's mergers in time order
+        order = np.argsort(kept, kind='stable')
+        keys, starts = np.unique(kept[order], return_index=True)
+        stops = np.append(starts[1:], len(order))
+        self._children = {int(key): order[start:stop]
+                          for key, start, stop in zip(keys, starts, stops)}
+        self._parent = dict(zip(lost.tolist(), range(len(lost))))
+
+    def absorbed_by(self, galaxy_id):
+        """Galaxies a galaxy absorbed directly.
+
+        Args:
+            galaxy_id (int): ID of the galaxy.
+
+        Returns:
+            np.ndarray: their IDs, in the order they were absorbed.
+        """
+        return np.asarray(self.events.lost_id)[self._children.get(galaxy_id, [])]
+
+    def descendant(self, galaxy_id):
+        """Galaxy that finally holds a galaxy's mass, following absorptions forward.
+
+        Args:
+            galaxy_id (int): ID of the galaxy.
+
+        Returns:
+            int: ID of the last galaxy in the chain; galaxy_id if it was never absorbed.
+        """
+        while galaxy_id in self._parent:
+            galaxy_id = int(self.events.kept_id[self._parent[galaxy_id]])
+        return galaxy_id
+
+    def history(self, galaxy_id):
+        """Events that built up a galaxy: its own mergers and those of its progenitors.
+
+        Args:
+            galaxy_id (int): ID of the galaxy.
+
+        Returns:
+            np.ndarray: indices of the events, in the order they happened.
+        """
+        found = []
+        queue = deque([galaxy_id])
+        while queue:
+            events = self._children.get(queue.popleft(), ())
+            found.extend(events)
+            queue.extend(int(self.events.lost_id[event]) for event in events)
+        return np.sort(np.asarray(found, dtype=np.intp))
+
+    def progenitors(self, galaxy_id):
+        """Every galaxy merged into a galaxy, directly or through earlier mergers.
+
+        Args:
+            galaxy_id (int): ID of the galaxy.
+
+        Returns:
+            np.ndarray: their IDs, in the order they were absorbed.
+        """
+        return np.asarray(self.events.lost_id)[self.history(galaxy_id)]
+
+    def merger_counts(self):
+        """Number of progenitors of every galaxy that absorbed any.
+
+        Returns:
+            dict: galaxy ID to number of galaxies merged into it, directly or not.
+        """
+        return {galaxy_id: len(self.history(galaxy_id)) for galaxy_id in self._children}
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import engine
+import mergers
+
+class MergersTests(unittest.TestCase):
+    """Tests for mergers.py module."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'run.mergers')
+
+    def test_records_state_before_merge(self):
+        """Events hold both galaxies as they were just before merging."""
+        universe = engine.Universe(1000, [[10, 10], [10.5, 10], [500, 500]], [10, 2, 5],
+                                   [engine.SPIRAL, engine.ELLIPTICAL, engine.SPIRAL],
+                                   vel=[[1, 0], [0, 3], [0, 0]], ids=[7, 8, 9])
+        universe.time = 2.5
+        with mergers.MergerLog(self.path) as log:
+            universe.merger_log = log
+            universe.collide()
+        events = mergers.open_mergers(self.path)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual((events.time[0], events.kept_id[0], events.lost_id[0]), (2.5, 7, 8))
+        self.assertEqual((events.kept_mass[0], events.lost_mass[0]), (10, 2))
+        self.assertEqual((events.kept_type[0], events.lost_type[0]),
+                         (engine.SPIRAL, engine.ELLIPTICAL))
+        np.testing.assert_array_equal(events.kept_vel[0], [1, 0])
+        np.testing.assert_array_equal(events.lost_vel[0], [0, 3])
+
+    def test_chained_mergers(self):
+        """A galaxy absorbed after absorbing another in the same pass is logged as the
+        elliptical it had become, with its grown mass."""
+        universe = engine.Universe(1000, [[0, 0], [0.5, 0], [0.8, 0]], [10, 5, 1],
+                                   [engine.SPIRAL] * 3)
+        with mergers.MergerLog(self.path) as log:
+            universe.merger_log = log
+            universe.collide()
+        events = mergers.open_mergers(self.path)
+
+        self.assertEqual(events.lost_id.tolist(), [2, 1])
+        self.assertEqual(events.lost_type.tolist(), [engine.SPIRAL, engine.ELLIPTICAL])
+        self.assertEqual(events.lost_mass.tolist(), [1, 6])
+
+    def test_run_log_matches_masses(self):
+        """Every merger of a run is logged, and the logged masses add up to the final ones."""
+        universe = engine.Universe.random(200, 60, 0.3, 4)
+        initial = dict(zip(universe.ids.tolist(), universe.mass.tolist()))
+        with mergers.MergerLog(self.path, chunk_events=4) as log:
+            universe.run(5, 0.5, mergers=log)
+        events = mergers.open_mergers(self.path)
+        tree = mergers.MergerTree(events)
+
+        self.assertGreater(universe.merger_count, 4)
+        self.assertEqual(len(events), universe.merger_count)
+        self.assertIsNone(universe.merger_log)
+        for galaxy_id, mass in zip(universe.ids[universe.active], universe.mass[universe.active]):
+            progenitors = tree.progenitors(int(galaxy_id))
+            self.assertAlmostEqual(mass, initial[galaxy_id]
+                                   + sum(initial[int(lost)] for lost in progenitors))
+
+    def test_tree_queries(self):
+        """Merger tree queries follow absorptions through several generations."""
+        with mergers.MergerLog(self.path, chunk_events=2) as log:
+            for time, kept, lost in ((1, 0, 1), (2, 2, 3), (3, 0, 2), (4, 5, 6)):
+                log.record(time, kept_id=[kept], lost_id=[lost], kept_mass=[1], lost_mass=[1],
+                           kept_type=[0], lost_type=[0], kept_vel=[[0, 0]],
+                           lost_vel=[[0, 0]])
+        tree = mergers.MergerTree(mergers.open_mergers(self.path))
+
+        self.assertEqual(tree.descendant(3), 0)
+        self.assertEqual(tree.descendant(4), 4)
+        self.assertEqual(tree.absorbed_by(0).tolist(), [1, 2])
+        self.assertEqual(tree.progenitors(0).tolist(), [1, 3, 2])
+        self.assertEqual(tree.history(0).tolist(), [0, 1, 2])
+        self.assertEqual(tree.merger_counts(), {0: 3, 2: 1, 5: 1})
+
+    def test_append_drops_unflushed(self):
+        """Reopening a log appends to it and drops events written after the last header."""
+        columns = dict(kept_id=[0], lost_id=[1], kept_mass=[1], lost_mass=[1], kept_type=[0],
+                       lost_type=[0], kept_vel=[[0, 0]], lost_vel=[[0, 0]])
+        with mergers.MergerLog(self.path) as log:
+            log.record(1, **columns)
+        with open(os.path.join(self.path, 'time.bin'), 'ab') as file:
+            file.write(b'partial')
+        with mergers.MergerLog(self.path) as log:
+            log.record(2, **columns)
+
+        self.assertEqual(mergers.open_mergers(self.path).time.tolist(), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
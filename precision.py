@@ -0,0 +1,99 @@
+"""Precision module.
+
+Validation harness for the reduced precision modes of the engine. Runs the same
+seeded universes in float64 and in 'single' or 'mixed' precision (see
+engine.PRECISIONS) and checks that elliptical_ratio and merger statistics agree
+within tolerance.
+
+A reduced precision run may drift away from its float64 twin after a close
+encounter, as any rounding difference can in a chaotic N-body system, so the
+checks compare averages over replicates rather than individual runs:
+
+    python precision.py
+
+Methods:
+    precision_report: compares reduced precision runs against float64.
+"""
+
+import time
+import numpy as np
+import engine
+import sweep
+
+# largest allowed difference of the mean final elliptical_ratio
+RATIO_TOLERANCE = 0.02
+# largest allowed relative difference of the mean merger count
+MERGER_TOLERANCE = 0.05
+
+def _run(universe_size, galaxy_number, initial_type_ratio, time_step, time_max, seed,
+         precision, options):
+    universe = engine.Universe.random(universe_size, galaxy_number, initial_type_ratio,
+                                      np.random.default_rng(seed), precision=precision,
+                                      **options)
+    universe.run(time_max, time_step)
+    return universe.elliptical_ratio(), universe.merger_count
+
+def precision_report(universe_size, galaxy_number, initial_type_ratios, time_step, time_max,
+                     replicates=5, seed=0, precisions=('single', 'mixed'),
+                     ratio_tolerance=RATIO_TOLERANCE, merger_tolerance=MERGER_TOLERANCE,
+                     **options):
+    """Compares reduced precision runs against float64 runs of the same universes.
+
+    Args:
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies to simulate.
+        initial_type_ratios (array_like): initial ratios to simulate.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps to take in simulation.
+        replicates (int): seeded runs per initial ratio.
+        seed (int): base seed, as in sweep.
+        precisions (tuple): precisions to check against 'double'.
+        ratio_tolerance (float): largest allowed difference of the mean elliptical_ratio
+            of any initial ratio.
+        merger_tolerance (float): largest allowed relative difference of the mean
+            merger count over all runs.
+        **options: engine options passed on to engine.Universe, such as backend.
+
+    Returns:
+        list: one dict per precision with keys precision, seconds, double_seconds,
+            ratio_error (largest difference of mean elliptical_ratio over the initial
+            ratios), merger_error (relative difference of the mean merger count),
+            identical (fraction of runs with the same ratio and mergers as float64)
+            and passed.
+    """
+    ratios = [float(ratio) for ratio in initial_type_ratios]
+    runs = [(i, ratio, sweep.task_seed(seed, ratio, replicate))
+            for replicate in range(replicates) for i, ratio in enumerate(ratios)]
+
+    def measure(precision):
+        start = time.perf_counter()
+        results = np.array([_run(universe_size, galaxy_number, ratio, time_step, time_max,
+                                 task_seed, precision, options)
+                            for _, ratio, task_seed in runs])
+        return results, time.perf_counter() - start
+
+    index = np.array([i for i, _, _ in runs])
+    reference, double_seconds = measure('double')
+    reference_means = np.bincount(index, reference[:, 0]) / replicates
+    reference_mergers = reference[:, 1].mean()
+
+    rows = []
+    for precision in precisions:
+        results, seconds = measure(precision)
+        ratio_error = float(np.abs(np.bincount(index, results[:, 0]) / replicates
+                                   - reference_means).max())
+        merger_error = float(abs(results[:, 1].mean() - reference_mergers)
+                             / max(reference_mergers, 1))
+        rows.append({'precision': precision, 'seconds': seconds,
+                     'double_seconds': double_seconds, 'ratio_error': ratio_error,
+                     'merger_error': merger_error,
+                     'identical': float(np.all(results == reference, axis=1).mean()),
+                     'passed': ratio_error <= ratio_tolerance
+                               and merger_error <= merger_tolerance})
+    return rows
+
+if __name__ == '__main__':
+    for row in precision_report(1000, 200, np.arange(0, 0.5, 0.1), 0.1, 10, replicates=4):
+        print(f"{row['precision']:>7} {row['seconds']:.2f}s (double {row['double_seconds']:.2f}s) "
+              f"ratio_err={row['ratio_error']:.4f} merger_err={row['merger_error']:.4f} "
+              f"identical={row['identical']:.2f} {'passed' if row['passed'] else 'FAILED'}")
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import checkpoint
+import engine
+import precision
+
+class PrecisionTests(unittest.TestCase):
+    """Tests for precision.py module and the engine's precision modes."""
+
+    def test_state_dtypes(self):
+        """Single and mixed precision store the state in float32, mixed sums forces in float64."""
+        for mode, acc_dtype in (('double', np.float64), ('single', np.float32),
+                                ('mixed', np.float64)):
+            universe = engine.Universe.random(1000, 30, 0.3, np.random.default_rng(1),
+                                              precision=mode, integrator='leapfrog')
+            universe.run(1, 0.5)
+            state_dtype = np.float64 if mode == 'double' else np.float32
+            for array in (universe.pos, universe.vel, universe.mass):
+                self.assertEqual(array.dtype, state_dtype)
+            self.assertEqual(universe.acc.dtype, acc_dtype)
+        with self.assertRaises(ValueError):
+            engine.Universe.random(1000, 30, 0.3, precision='half')
+
+    def test_accelerations_close(self):
+        """float32 accelerations stay within float32 rounding of the float64 ones."""
+        rng = np.random.default_rng(0)
+        pos = rng.uniform(0, 1000, (500, 2))
+        mass = rng.integers(1, 100, 500).astype(np.float64)
+        active = np.ones(500, dtype=bool)
+        exact = engine.pairwise_accelerations(pos, mass, active)
+        for accumulate in (None, np.float64):
+            approx = engine.pairwise_accelerations(pos.astype(np.float32),
+                                                   mass.astype(np.float32), active,
+                                                   accumulate=accumulate)
+            np.testing.assert_allclose(approx, exact, rtol=1e-3, atol=1e-3 * np.abs(exact).max())
+
+    def test_report_passes(self):
+        """Reduced precision sweeps reproduce the float64 statistics."""
+        rows = precision.precision_report(1000, 30, [0.0, 0.3], 0.5, 5, replicates=2)
+
+        self.assertEqual([row['precision'] for row in rows], ['single', 'mixed'])
+        self.assertTrue(all(row['passed'] for row in rows))
+
+    def test_checkpoint_keeps_precision(self):
+        """Checkpoints restore the precision mode and float32 arrays."""
+        universe = engine.Universe.random(1000, 20, 0.3, 0, precision='mixed')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.npz')
+            checkpoint.save_checkpoint(universe, path)
+            restored, _ = checkpoint.load_checkpoint(path)
+
+        self.assertEqual(restored.precision, 'mixed')
+        self.assertEqual(restored.pos.dtype, np.float32)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,291 @@
+"""Render module.
+
+Producer/consumer pipeline for animating a simulation. A background thread
+advances the universe and copies each frame into a preallocated slot of a ring
+buffer; the renderer takes the newest finished frame and writes it into the
+scatter plot's preallocated arrays, so nothing is rebuilt per frame. When the
+renderer falls behind, old frames are dropped instead of stalling the physics.
+An offline mode encodes every frame straight to a video file without a GUI.
+
+Classes:
+    FrameProducer
+    ScatterRenderer
+
+Methods:
+    encode_video: renders a simulation to a video file without opening a window.
+"""
+
+import queue
+import threading
+import time
+import numpy as np
+import instrumentation
+
+# RGBA of spiral ('b') and elliptical ('r') galaxies, indexed by gal_type
+TYPE_COLORS = np.array([[0.0, 0.0, 1.0, 1.0], [1.0, 0.0, 0.0, 1.0]])
+DOT_SCALE = 10
+
+class FrameProducer(threading.Thread):
+    """Background thread stepping a universe and publishing frames.
+
+    Frames live in a ring of preallocated slots. Finished slots are handed to the
+    renderer through a bounded queue; with drop=True the oldest waiting frame is
+    discarded when the queue is full, so the simulation never waits for rendering.
+
+    Parameters:
+        universe (engine.Universe): universe being simulated.
+        time_step (float): size of time step in simulation.
+        frame_count (int): number of frames to produce, None for no limit.
+        steps_per_frame (int): simulation steps between frames.
+        drop (bool): drop the oldest frame instead of waiting when the queue is full.
+        recorder (trajectory.TrajectoryWriter): writer recording every step, or None.
+        dropped (int): number of frames dropped so far.
+        error (Exception): exception that stopped the simulation, or None.
+        time (np.ndarray): (slots,) simulation time of each slot.
+        pos (np.ndarray): (slots, N, 2) positions of each slot.
+        gal_type (np.ndarray): (slots, N) galaxy types of each slot.
+        mass (np.ndarray): (slots, N) masses of each slot.
+        active (np.ndarray): (slots, N) active mask of each slot.
+        ratio (np.ndarray): (slots,) elliptical ratio of each slot.
+
+    Methods:
+        __init__: preallocates the frame slots.
+        run: thread body, produces frames until frame_count or stop.
+        latest: newest finished frame, dropping older ones.
+        next: next frame in order, waiting for it.
+        release: returns a slot to the producer once drawn.
+        stop: asks the thread to finish.
+    """
+
+    def __init__(self, universe, time_step, frame_count=None, steps_per_frame=1, queue_size=4,
+                 drop=True, recorder=None):
+        """Preallocates the frame slots.
+
+        Args:
+            universe (engine.Universe): universe to simulate.
+            time_step (float): size of time step in simulation.
+            frame_count (int): number of frames to produce, None for no limit.
+            steps_per_frame (int): simulation steps between frames.
+            queue_size (int): finished frames waiting for the renderer at most.
+            drop (bool): drop the oldest frame instead of waiting when the queue is full.
+            recorder (trajectory.TrajectoryWriter): writer recording every step, or None.
+        """
+        super().__init__(daemon=True)
+        self.universe = universe
+        self.time_step = time_step
+        self.frame_count = frame_count
+        self.steps_per_frame = steps_per_frame
+        self.drop = drop
+        self.recorder = recorder
+        self.dropped = 0
+        # one slot being drawn and one being filled on top of the queued ones
+        slots = queue_size + 2
+        count = len(universe.pos)
+        self.time = np.zeros(slots)
+        self.pos = np.zeros((slots, count, 2))
+        self.gal_type = np.zeros((slots, count), dtype=np.int8)
+        self.mass = np.zeros((slots, count))
+        self.active = np.zeros((slots, count), dtype=bool)
+        self.ratio = np.zeros(slots)
+        self._ready = queue.Queue(queue_size)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self.error = None
+        self._stopped = threading.Event()
+        self.finished = threading.Event()
+
+    def run(self):
+        """Steps the universe and publishes frames until frame_count or stop."""
+        universe = self.universe
+        produced = 0
+        try:
+            while not self._stopped.is_set() and produced != self.frame_count:
+                for _ in range(self.steps_per_frame):
+                    universe.step(self.time_step)
+                    if self.recorder is not None:
+                        self.recorder.record(universe)
+                slot = self._free.get()
+                with instrumentation.phase('frame_copy'):
+                    self.time[slot] = universe.time
+                    self.pos[slot] = universe.pos
+                    self.gal_type[slot] = universe.gal_type
+                    self.mass[slot] = universe.mass
+                    self.active[slot] = universe.active
+                with instrumentation.phase('stats'):
+                    # nan once no galaxy is visible
+                    self.ratio[slot] = universe.population().ratio
+                self._publish(slot)
+                produced += 1
+        except Exception as error:  # pylint: disable=broad-except
+            # handed to the consumer, which raises it from latest or next
+            self.error = error
+        finally:
+            self.finished.set()
+
+    def _publish(self, slot):
+        while not self._stopped.is_set():
+            try:
+                self._ready.put(slot, block=not self.drop, timeout=None if self.drop else 0.1)
+                return
+            except queue.Full:
+                if self.drop:
+                    try:
+                        self._free.put(self._ready.get_nowait())
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def latest(self):
+        """Newest finished frame, dropping any older waiting ones. Does not wait.
+
+        Returns:
+            int: slot of the frame, None if no new frame is ready. Pass it to release
+                once drawn.
+
+        Raises:
+            Exception: the error that stopped the simulation, once no frame is left.
+        """
+        slot = None
+        while True:
+            try:
+                newer = self._ready.get_nowait()
+            except queue.Empty:
+                if slot is None:
+                    self._raise_error()
+                return slot
+            if slot is not None:
+                self._free.put(slot)
+                self.dropped += 1
+            slot = newer
+
+    def next(self, timeout=None):
+        """Next frame in production order, waiting for it.
+
+        Args:
+            timeout (float): seconds to wait, None to wait until the frame is ready.
+
+        Returns:
+            int: slot of the frame, None if production finished. Pass it to release
+                once drawn.
+
+        Raises:
+            Exception: the error that stopped the simulation, once no frame is left.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._ready.get(timeout=0.1)
+            except queue.Empty:
+                if self.finished.is_set() and self._ready.empty():
+                    self._raise_error()
+                    return None
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+
+    def _raise_error(self):
+        if self.finished.is_set() and self.error is not None:
+            raise self.error
+
+    def release(self, slot):
+        """Returns a drawn frame's slot to the producer.
+
+        Args:
+            slot (int): slot returned by latest or next.
+        """
+        self._free.put(slot)
+
+    def stop(self):
+        """Asks the thread to finish after the current frame."""
+        self._stopped.set()
+
+class ScatterRenderer:
+    """Draws frames into a matplotlib scatter plot through preallocated arrays.
+
+    Inactive galaxies are kept in the arrays with zero size, so the arrays have a
+    fixed length and every frame is a handful of in-place array copies.
+
+    Methods:
+        __init__: creates the plot artists.
+        draw: draws one frame.
+    """
+
+    def __init__(self, ax, universe_size, galaxy_number, dot_scale=DOT_SCALE):
+        """Creates the plot artists.
+
+        Args:
+            ax (matplotlib.axes.Axes): axes to draw into.
+            universe_size (int): size of observable universe.
+            galaxy_number (int): number of galaxies.
+            dot_scale (float): mass per unit of marker area.
+        """
+        self.dot_scale = dot_scale
+        self.offsets = np.zeros((galaxy_number, 2))
+        self.colors = np.zeros((galaxy_number, 4))
+        self.sizes = np.zeros(galaxy_number)
+        self.scatter = ax.scatter(self.offsets[:, 0], self.offsets[:, 1], s=self.sizes)
+        self.time_text = ax.text(0.02, 0.95, '', transform=ax.transAxes)
+        self.fraction_text = ax.text(0.02, 0.90, '', transform=ax.transAxes)
+        ax.set_xlim(0, universe_size)
+        ax.set_ylim(0, universe_size)
+
+    def draw(self, producer, slot):
+        """Draws one frame.
+
+        Args:
+            producer (FrameProducer): producer holding the frame.
+            slot (int): slot of the frame.
+
+        Returns:
+            tuple: artists that changed, for blitting.
+        """
+        with instrumentation.phase('render'):
+            self.offsets[:] = producer.pos[slot]
+            np.take(TYPE_COLORS, producer.gal_type[slot], axis=0, out=self.colors)
+            np.divide(producer.mass[slot], self.dot_scale, out=self.sizes)
+            self.sizes[~producer.active[slot]] = 0
+            self.scatter.set_offsets(self.offsets)
+            self.scatter.set_facecolor(self.colors)
+            self.scatter.set_sizes(self.sizes)
+            self.time_text.set_text(f'Time: {producer.time[slot]:.2f}')
+            self.fraction_text.set_text(f'Elliptical Fraction: {producer.ratio[slot]:.2f}')
+        return self.scatter, self.time_text, self.fraction_text
+
+def encode_video(universe, path, time_step, frame_count, fps=20, dpi=100, steps_per_frame=1,
+                 recorder=None):
+    """Renders a simulation to a video file without opening a window.
+
+    Uses ffmpeg when available (e.g. for .mp4) and Pillow otherwise (.gif).
+    Every frame is encoded; the producer waits for the encoder instead of dropping.
+
+    Args:
+        universe (engine.Universe): universe to simulate.
+        path (string): output file.
+        time_step (float): size of time step in simulation.
+        frame_count (int): number of frames to encode.
+        fps (int): frames per second of the video.
+        dpi (int): resolution of the video.
+        steps_per_frame (int): simulation steps between frames.
+        recorder (trajectory.TrajectoryWriter): writer recording every step, or None.
+    """
+    from matplotlib import animation
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    renderer = ScatterRenderer(fig.add_subplot(), universe.universe_size, len(universe.pos))
+    if animation.FFMpegWriter.isAvailable():
+        writer = animation.FFMpegWriter(fps=fps)
+    else:
+        writer = animation.PillowWriter(fps=fps)
+    producer = FrameProducer(universe, time_step, frame_count, steps_per_frame, drop=False,
+                             recorder=recorder)
+    producer.start()
+    with writer.saving(fig, path, dpi):
+        while (slot := producer.next()) is not None:
+            renderer.draw(producer, slot)
+            with instrumentation.phase('encode'):
+                writer.grab_frame()
+            producer.release(slot)
+    producer.join()
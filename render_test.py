@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import engine
+import render
+import trajectory
+
+class RenderTests(unittest.TestCase):
+    """Tests for render.py module."""
+
+    def test_producer_keeps_every_frame_in_order(self):
+        """Without dropping, every frame arrives in order and matches a plain run."""
+        rng = np.random.default_rng(0)
+        universe = engine.Universe.random(300, 15, 0.5, rng)
+        reference = engine.Universe(300, universe.pos.copy(), universe.mass.copy(),
+                                    universe.gal_type.copy(), vel=universe.vel.copy())
+        producer = render.FrameProducer(universe, 0.1, frame_count=10, steps_per_frame=2,
+                                        queue_size=2, drop=False)
+        producer.start()
+        frames = 0
+        while (slot := producer.next()) is not None:
+            reference.step(0.1)
+            reference.step(0.1)
+            self.assertEqual(producer.time[slot], reference.time)
+            np.testing.assert_array_equal(producer.pos[slot], reference.pos)
+            producer.release(slot)
+            frames += 1
+        producer.join()
+
+        self.assertEqual(frames, 10)
+        self.assertEqual(producer.dropped, 0)
+
+    def test_slow_renderer_drops_frames(self):
+        """A renderer that falls behind sees the newest frame and the rest are dropped."""
+        universe = engine.Universe.random(300, 15, 0.5, np.random.default_rng(1))
+        producer = render.FrameProducer(universe, 0.1, frame_count=20, queue_size=2)
+        producer.start()
+        producer.join(timeout=30)
+        slot = producer.latest()
+
+        self.assertTrue(producer.finished.is_set())
+        self.assertEqual(producer.time[slot], universe.time)
+        self.assertEqual(producer.dropped, 19)
+        self.assertIsNone(producer.latest())
+
+    def test_no_visible_galaxies(self):
+        """Frames of a universe with every galaxy outside the box have a nan ratio."""
+        universe = engine.Universe(100, [(-50, -50), (150, 150)], [1, 1], [0, 1])
+        producer = render.FrameProducer(universe, 0.1, frame_count=3, drop=False)
+        producer.start()
+        ratios = []
+        while (slot := producer.next(timeout=30)) is not None:
+            ratios.append(producer.ratio[slot])
+            producer.release(slot)
+        producer.join()
+
+        self.assertEqual(len(ratios), 3)
+        self.assertTrue(np.isnan(ratios).all())
+
+    def test_simulation_error_reaches_consumer(self):
+        """An error in the simulation thread is raised by next after the earlier frames."""
+        universe = engine.Universe.random(300, 10, 0.5, np.random.default_rng(3))
+        step = universe.step
+
+        def failing_step(time_step):
+            if universe.time >= 0.25:
+                raise ZeroDivisionError('step failed')
+            step(time_step)
+
+        universe.step = failing_step
+        producer = render.FrameProducer(universe, 0.1, frame_count=10, drop=False)
+        producer.start()
+        frames = 0
+        with self.assertRaises(ZeroDivisionError):
+            while (slot := producer.next(timeout=30)) is not None:
+                producer.release(slot)
+                frames += 1
+        producer.join()
+
+        self.assertEqual(frames, 3)
+        self.assertTrue(producer.finished.is_set())
+        with self.assertRaises(ZeroDivisionError):
+            producer.latest()
+
+    def test_renderer_hides_inactive_galaxies(self):
+        """Merged galaxies stay in the fixed-size arrays with zero marker size."""
+        universe = engine.Universe(100, [(10, 10), (10.5, 10), (80, 80)], [20, 10, 30], [0, 0, 1])
+        producer = render.FrameProducer(universe, 0.01, frame_count=1, drop=False)
+        producer.start()
+        slot = producer.next()
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        renderer = render.ScatterRenderer(fig.add_subplot(), 100, 3)
+        renderer.draw(producer, slot)
+        fig.canvas.draw()
+
+        np.testing.assert_array_equal(renderer.sizes, [3, 0, 3])
+        np.testing.assert_array_equal(renderer.colors[:, :3], [[1, 0, 0], [0, 0, 1], [1, 0, 0]])
+        producer.join()
+
+    def test_encode_video(self):
+        """Offline mode writes a video file without a GUI."""
+        universe = engine.Universe.random(300, 10, 0.5, np.random.default_rng(2))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.gif')
+            render.encode_video(universe, path, 0.1, 5, dpi=20)
+            self.assertGreater(os.path.getsize(path), 0)
+
+    def test_encode_video_records_trajectory(self):
+        """A writer handed to encode_video records every simulated step."""
+        universe = engine.Universe.random(300, 10, 0.5, np.random.default_rng(2))
+        with tempfile.TemporaryDirectory() as directory:
+            stored = os.path.join(directory, 'run')
+            with trajectory.TrajectoryWriter(stored, 10) as writer:
+                render.encode_video(universe, os.path.join(directory, 'run.gif'), 0.1, 4,
+                                    dpi=20, steps_per_frame=2, recorder=writer)
+            run = trajectory.open_trajectory(stored)
+
+            self.assertEqual(run.frames, 8)
+            np.testing.assert_array_equal(run.pos[-1], universe.pos)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""Result cache module.
+
+On-disk, content-addressed cache of sweep results. Each entry is a small JSON
+file named by the SHA-256 hash of everything that determines the result: the
+simulation parameters, engine options, seed, engine backend and
+engine.ENGINE_VERSION. Changing any of them, or bumping ENGINE_VERSION after a
+change to the physics, misses the cache instead of returning a stale result.
+
+The cache is bounded in size: a hit refreshes the entry's modification time,
+and once the entries take more than max_bytes the least recently used ones are
+deleted. Pass a cache to sweep.run_sweep to only compute the missing points:
+
+    cache = ResultCache('.sweep_cache')
+    results = sorted(sweep.run_sweep(ratios, 1000, 20, 0.05, 120, seed=0, cache=cache))
+
+Classes:
+    ResultCache
+
+Methods:
+    task_key: key of one sweep task's result.
+"""
+
+import hashlib
+import json
+import os
+import backends
+import engine
+
+MAX_BYTES = 64 * 2**20
+_SUFFIX = '.json'
+
+def task_key(task, universe_size, galaxy_number, time_step, time_max, **options):
+    """Key of the result of one sweep task.
+
+    Args:
+        task (sweep.SweepTask): the task. Its ratio, replicate and seed fix the
+            random stream of the run, see sweep.task_seed; its position in the grid
+            does not, so editing the grid keeps the other points cached.
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies to simulate.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps to take in simulation.
+        **options: engine options passed on to simulate_ratio. Must be JSON
+            serializable.
+
+    Returns:
+        string: hexadecimal SHA-256 hash of the parameters.
+    """
+    document = {
+        'engine_version': engine.ENGINE_VERSION,
+        # the compiled and NumPy kernels agree only to rounding, so they are cached apart
+        'backend': backends.get_backend(options.get('backend')).name,
+        'task': {'initial_type_ratio': float(task.initial_type_ratio),
+                 'replicate': int(task.replicate), 'seed': task.seed},
+        # 120 and 120.0 run the same simulation
+        'universe_size': float(universe_size),
+        'galaxy_number': int(galaxy_number),
+        'time_step': float(time_step),
+        'time_max': float(time_max),
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(document, sort_keys=True).encode()).hexdigest()
+
+class ResultCache:
+    """Size-bounded directory of cached results with least-recently-used eviction.
+
+    Parameters:
+        directory (string): directory holding one file per entry.
+        max_bytes (int): total size of the entries above which the least recently
+            used ones are evicted.
+
+    Methods:
+        __init__: opens or creates a cache.
+        get: cached value of a key.
+        put: stores a value.
+        evict: deletes least recently used entries until the cache fits.
+        clear: deletes every entry.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        """Opens or creates a cache.
+
+        Args:
+            directory (string): directory of the cache, created if missing.
+            max_bytes (int): size bound of the cache.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def __len__(self):
+        return sum(1 for _ in self._entries())
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key, default=None):
+        """Cached value of a key, marking the entry as recently used.
+
+        Args:
+            key (string): the key, e.g. from task_key.
+            default: value returned on a miss.
+
+        Returns:
+            the cached value, or default.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as file:
+                value = json.load(file)
+        except (FileNotFoundError, ValueError):
+            # a missing entry, or one another process is evicting
+            return default
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        """Stores a value, then evicts entries if the cache has outgrown max_bytes.
+
+        Args:
+            key (string): the key.
+            value: JSON serializable value.
+        """
+        path = self._path(key)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(value, file)
+        if os.path.exists(path):
+            self._size -= os.path.getsize(path)
+        os.replace(temporary, path)
+        self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime_ns)
+        self._size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            self._size -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def clear(self):
+        """Deletes every entry."""
+        for entry in self._entries():
+            os.remove(entry.path)
+        self._size = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _entries(self):
+        return (entry for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(_SUFFIX))
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import engine
+import result_cache
+import sweep
+
+ARGS = (1000, 15, 0.5, 5)
+
+class ResultCacheTests(unittest.TestCase):
+    """Tests for result_cache.py module."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_key_covers_parameters(self):
+        """Keys differ with any parameter, the seed or the engine version."""
+        task = sweep.SweepTask(0, 0.1, 0, 3)
+        key = result_cache.task_key(task, *ARGS)
+
+        self.assertEqual(key, result_cache.task_key(task, *ARGS))
+        self.assertNotEqual(key, result_cache.task_key(task._replace(seed=4), *ARGS))
+        self.assertNotEqual(key, result_cache.task_key(task._replace(initial_type_ratio=0.2),
+                                                       *ARGS))
+        self.assertEqual(key, result_cache.task_key(task._replace(ratio_index=5), *ARGS))
+        self.assertNotEqual(key, result_cache.task_key(task, 1000, 16, 0.5, 5))
+        self.assertNotEqual(key, result_cache.task_key(task, *ARGS, solver='barnes_hut'))
+        with mock.patch.object(engine, 'ENGINE_VERSION', engine.ENGINE_VERSION + 1):
+            self.assertNotEqual(key, result_cache.task_key(task, *ARGS))
+
+    def test_lru_eviction(self):
+        """Once over max_bytes, the least recently used entries are evicted."""
+        cache = result_cache.ResultCache(self.directory, max_bytes=3 * len('0.5'))
+        for key in 'abc':
+            cache.put(key, 0.5)
+        for stamp, key in enumerate('abc'):
+            os.utime(os.path.join(self.directory, key + '.json'), ns=(stamp, stamp))
+        cache.get('a')
+        cache.put('d', 0.5)
+
+        self.assertEqual(len(cache), 3)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('a'), 0.5)
+
+    def test_sweep_computes_missing_points(self):
+        """A repeated sweep only runs the tasks that are not cached yet."""
+        cache = result_cache.ResultCache(self.directory)
+        first = sorted(sweep.run_sweep([0.0, 0.5], *ARGS, seed=3, workers=1, cache=cache))
+
+        with mock.patch.object(sweep, 'run_task', wraps=sweep.run_task) as run_task:
+            again = sorted(sweep.run_sweep([0.0, 0.5, 0.25], *ARGS, seed=3, workers=1,
+                                           cache=cache))
+
+        self.assertEqual(run_task.call_count, 1)
+        self.assertEqual(again, sorted(sweep.run_sweep([0.0, 0.5, 0.25], *ARGS, seed=3,
+                                                       workers=1)))
+        self.assertEqual([result for result in again if result.initial_type_ratio != 0.25],
+                         first)
+
+    def test_refined_grid_reuses_cache(self):
+        """Inserting a ratio into the grid only runs the new ratio."""
+        cache = result_cache.ResultCache(self.directory)
+        first = sorted(sweep.run_sweep([0.0, 0.5], *ARGS, seed=3, workers=1, cache=cache))
+
+        with mock.patch.object(sweep, 'run_task', wraps=sweep.run_task) as run_task:
+            refined = sorted(sweep.run_sweep([0.0, 0.25, 0.5], *ARGS, seed=3, workers=1,
+                                             cache=cache))
+
+        self.assertEqual(run_task.call_count, 1)
+        self.assertEqual([result.elliptical_ratio for result in refined
+                          if result.initial_type_ratio != 0.25],
+                         [result.elliptical_ratio for result in first])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+"""Sweep module.
+
+Runs parameter sweeps of simulate_ratio in parallel. The sweep is split into
+(ratio, seed, replicate) tasks that are fanned out over a process pool, each with
+its own reproducible random stream, and results are streamed back as they finish.
+Given a result cache, only the tasks missing from it are run.
+
+Classes:
+    SweepTask
+    SweepResult
+
+Methods:
+    task_seed: independent random stream for one task.
+    sweep_tasks: builds the tasks of a sweep.
+    run_task: runs one task.
+    run_batch: runs a list of tasks as one batched simulation.
+    run_sweep: runs a whole sweep, yielding results as they finish.
+"""
+
+import os
+from collections import namedtuple
+from functools import partial
+import multiprocessing
+import numpy as np
+import result_cache
+
+SweepTask = namedtuple('SweepTask', ['ratio_index', 'initial_type_ratio', 'replicate', 'seed'])
+SweepTask.__doc__ = """One simulation of a sweep: initial_type_ratio number ratio_index,
+run with replicate number replicate of base seed seed."""
+
+SweepResult = namedtuple('SweepResult', ['initial_type_ratio', 'replicate', 'elliptical_ratio',
+                                         'ratio_index', 'seed'])
+SweepResult.__doc__ = """Final elliptical_ratio of one SweepTask. Sorts by ratio, then replicate."""
+
+def task_seed(seed, initial_type_ratio, replicate):
+    """Independent random stream for one task.
+
+    The stream only depends on the base seed, the ratio's value and the replicate,
+    so a task gives the same result whichever worker runs it, in whatever order, and
+    wherever its ratio sits in the grid: refining or reordering a grid keeps the
+    streams, and cached results, of the ratios already run.
+
+    Args:
+        seed (int): base seed of the sweep.
+        initial_type_ratio (float): initial ratio of the task.
+        replicate (int): replicate number.
+
+    Returns:
+        np.random.SeedSequence: seed sequence for the task.
+    """
+    # the bits of the float64 value, with -0.0 folded into 0.0
+    ratio_bits = int(np.float64(float(initial_type_ratio) + 0.0).view(np.uint64))
+    return np.random.SeedSequence(seed, spawn_key=(ratio_bits, replicate))
+
+def sweep_tasks(initial_type_ratios, replicates=1, seed=0):
+    """Builds the tasks of a sweep, replicates tasks per initial ratio.
+
+    Args:
+        initial_type_ratios (array_like): initial ratios to simulate.
+        replicates (int): number of independent runs per ratio.
+        seed (int): base seed of the sweep.
+
+    Returns:
+        list: list of SweepTask.
+    """
+    return [SweepTask(i, float(ratio), replicate, seed)
+            for replicate in range(replicates)
+            for i, ratio in enumerate(initial_type_ratios)]
+
+def run_task(task, universe_size, galaxy_number, time_step, time_max, **options):
+    """Runs one task of a sweep.
+
+    Args:
+        task (SweepTask): task to run.
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies to simulate.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps to take in simulation.
+        **options: engine options passed on to simulate_ratio.
+
+    Returns:
+        SweepResult: result of the task.
+    """
+    from galaxy_collision_statistics import simulate_ratio
+
+    ratio = simulate_ratio(universe_size, galaxy_number, task.initial_type_ratio, time_step,
+                           time_max, seed=task_seed(task.seed, task.initial_type_ratio, task.replicate),
+                           **options)
+    return SweepResult(task.initial_type_ratio, task.replicate, ratio, task.ratio_index, task.seed)
+
+def run_batch(tasks, universe_size, galaxy_number, time_step, time_max):
+    """Runs a list of tasks together with the batched multi-universe engine.
+
+    Args:
+        tasks (list): list of SweepTask to run.
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies to simulate.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps to take in simulation.
+
+    Returns:
+        list: SweepResult of each task, in task order.
+    """
+    from galaxy_collision_statistics import simulate_ratios
+
+    ratios = simulate_ratios(universe_size, galaxy_number,
+                             [task.initial_type_ratio for task in tasks], time_step, time_max,
+                             [task_seed(task.seed, task.initial_type_ratio, task.replicate)
+                              for task in tasks])
+    return [SweepResult(task.initial_type_ratio, task.replicate, float(ratio), task.ratio_index,
+                        task.seed) for task, ratio in zip(tasks, ratios)]
+
+def run_sweep(initial_type_ratios, universe_size, galaxy_number, time_step, time_max,
+              replicates=1, seed=0, workers=None, chunksize=1, tasks=None, batch_size=None,
+              cache=None, **options):
+    """Runs a sweep of simulate_ratio over a process pool, yielding results as they finish.
+
+    Args:
+        initial_type_ratios (array_like): initial ratios to simulate.
+        universe_size (int): size of observable universe.
+        galaxy_number (int): number of galaxies to simulate.
+        time_step (float): size of time steps in simulation.
+        time_max (int): how many time steps to take in simulation.
+        replicates (int): number of independent runs per ratio.
+        seed (int): base seed of the sweep.
+        workers (int): number of worker processes. Defaults to every core; 1 runs
+            the tasks in this process.
+        chunksize (int): number of tasks handed to a worker at a time.
+        tasks (list): SweepTask list to run instead of the full sweep.
+        batch_size (int): if given, each worker steps batch_size tasks together with
+            the batched engine (see run_batch) instead of one task at a time.
+        cache (result_cache.ResultCache): cache of results. Cached tasks are yielded
+            at once without running, and new results are added to it.
+        **options: engine options passed on to simulate_ratio.
+
+    Yields:
+        SweepResult: results in completion order.
+
+    Raises:
+        ValueError: if engine options are given with batch_size, as the batched
+            engine only runs the default engine.
+    """
+    if batch_size is not None and options:
+        raise ValueError(f'batch_size runs the batched engine, which takes no engine options, '
+                         f'got {", ".join(sorted(options))}')
+    if tasks is None:
+        tasks = sweep_tasks(initial_type_ratios, replicates, seed)
+    if cache is not None:
+        keys = {task: result_cache.task_key(task, universe_size, galaxy_number, time_step,
+                                            time_max, **options) for task in tasks}
+        missing = []
+        for task in tasks:
+            ratio = cache.get(keys[task])
+            if ratio is None:
+                missing.append(task)
+            else:
+                yield SweepResult(task.initial_type_ratio, task.replicate, ratio,
+                                  task.ratio_index, task.seed)
+        for result in run_sweep(initial_type_ratios, universe_size, galaxy_number, time_step,
+                                time_max, workers=workers, chunksize=chunksize, tasks=missing,
+                                batch_size=batch_size, **options):
+            cache.put(keys[SweepTask(result.ratio_index, result.initial_type_ratio,
+                                     result.replicate, result.seed)], result.elliptical_ratio)
+            yield result
+        return
+    if not tasks:
+        return
+    if workers is None:
+        workers = os.cpu_count()
+    if batch_size is None:
+        units = tasks
+        run = partial(run_task, universe_size=universe_size, galaxy_number=galaxy_number,
+                      time_step=time_step, time_max=time_max, **options)
+    else:
+        units = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+        run = partial(run_batch, universe_size=universe_size, galaxy_number=galaxy_number,
+                      time_step=time_step, time_max=time_max, **options)
+    pool = None
+    if workers != 1:
+        # spawn, not fork: forking after compiled kernels have started their thread
+        # pools can deadlock the workers
+        pool = multiprocessing.get_context('spawn').Pool(min(workers, len(units)) or 1)
+    try:
+        outputs = map(run, units) if pool is None else pool.imap_unordered(run, units, chunksize)
+        for output in outputs:
+            if batch_size is None:
+                yield output
+            else:
+                yield from output
+    finally:
+        if pool is not None:
+            pool.terminate()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import sweep
+
+class SweepTests(unittest.TestCase):
+    """Tests for sweep.py module."""
+
+    def test_sweep_tasks(self):
+        """One task per ratio and replicate."""
+        tasks = sweep.sweep_tasks([0.1, 0.2, 0.3], replicates=2, seed=5)
+
+        self.assertEqual(len(tasks), 6)
+        self.assertEqual({(task.ratio_index, task.replicate) for task in tasks},
+                         {(i, r) for i in range(3) for r in range(2)})
+
+    def test_task_seeds_independent(self):
+        """Different tasks draw different streams, the same task the same stream."""
+        first = np.random.default_rng(sweep.task_seed(0, 0.25, 0)).random(4)
+        again = np.random.default_rng(sweep.task_seed(0, 0.25, 0)).random(4)
+        other = np.random.default_rng(sweep.task_seed(0, 0.25, 1)).random(4)
+        ratio = np.random.default_rng(sweep.task_seed(0, 0.5, 0)).random(4)
+
+        np.testing.assert_array_equal(first, again)
+        self.assertFalse(np.allclose(first, other))
+        self.assertFalse(np.allclose(first, ratio))
+
+    def test_results_independent_of_grid_position(self):
+        """A ratio gives the same results wherever it sits in the grid."""
+        coarse = sorted(sweep.run_sweep([0.0, 0.5], 1000, 15, 0.5, 5, replicates=2, seed=3,
+                                        workers=1))
+        refined = sorted(sweep.run_sweep([0.5, 0.25, 0.0], 1000, 15, 0.5, 5, replicates=2,
+                                         seed=3, workers=1))
+
+        self.assertEqual([result.elliptical_ratio for result in coarse],
+                         [result.elliptical_ratio for result in refined
+                          if result.initial_type_ratio != 0.25])
+
+    def test_pool_matches_serial(self):
+        """Results do not depend on the number of workers or completion order."""
+        args = ([0.0, 0.25, 0.5], 1000, 15, 0.5, 5)
+
+        serial = sorted(sweep.run_sweep(*args, replicates=2, seed=3, workers=1))
+        pooled = sorted(sweep.run_sweep(*args, replicates=2, seed=3, workers=2))
+
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(serial, pooled)
+
+    def test_batched_matches_single(self):
+        """Batched runs give the same results as one simulation per task."""
+        args = ([0.0, 0.3, 0.6], 1000, 15, 0.5, 5)
+
+        single = sorted(sweep.run_sweep(*args, replicates=2, seed=3, workers=1))
+        batched = sorted(sweep.run_sweep(*args, replicates=2, seed=3, workers=2, batch_size=4))
+
+        self.assertEqual(single, batched)
+
+    def test_batched_rejects_engine_options(self):
+        """Engine options with batch_size raise instead of failing in the workers."""
+        with self.assertRaisesRegex(ValueError, 'integrator'):
+            list(sweep.run_sweep([0.0, 0.3], 1000, 15, 0.5, 5, workers=1, batch_size=2,
+                                 integrator='leapfrog'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""Trajectory module.
+
+Append-only trajectory store. A run is recorded frame by frame into a column
+store (see column_store) with one raw binary file per field (positions,
+velocities, masses, types, active mask, time) plus a small JSON header. Frames
+are buffered in chunks and appended to the files, and reading back maps the
+files with np.memmap, so any slice of a long trajectory can be analysed without
+loading the rest into memory.
+
+Classes:
+    TrajectoryWriter
+    Trajectory
+
+Methods:
+    open_trajectory: memory-maps a recorded trajectory.
+"""
+
+import numpy as np
+import column_store
+
+HEADER = 'trajectory.json'
+# field name: (dtype, shape of one frame as a function of the galaxy count)
+FIELDS = {
+    'time': ('<f8', lambda count: ()),
+    'pos': ('<f8', lambda count: (count, 2)),
+    'vel': ('<f8', lambda count: (count, 2)),
+    'mass': ('<f8', lambda count: (count,)),
+    'gal_type': ('i1', lambda count: (count,)),
+    'active': ('?', lambda count: (count,)),
+}
+# fields stored in the float dtype chosen by the writer
+STATE_FIELDS = ('pos', 'vel', 'mass')
+
+def _fields(float_dtype):
+    return {name: (float_dtype if name in STATE_FIELDS else dtype, shape)
+            for name, (dtype, shape) in FIELDS.items()}
+
+class TrajectoryWriter:
+    """Streams frames of a universe to disk.
+
+    Parameters:
+        path (string): directory of the trajectory.
+        galaxy_number (int): number of galaxies per frame.
+        every (int): decimation, only every every-th recorded step is stored.
+        chunk_frames (int): frames buffered in memory before they are appended.
+        float_dtype (string): dtype of the stored positions, velocities and masses.
+        frames (int): number of frames written so far.
+
+    Methods:
+        __init__: creates (or appends to) a trajectory.
+        record: offers the current state of a universe as a frame.
+        flush: appends buffered frames to disk.
+        close: flushes and finalizes the header.
+    """
+
+    def __init__(self, path, galaxy_number, every=1, chunk_frames=64, float_dtype='<f8'):
+        """Creates a trajectory directory, or appends to an existing one.
+
+        Frames appended after the last complete chunk, e.g. by a crashed run, are
+        dropped, see column_store.
+
+        Args:
+            path (string): directory of the trajectory.
+            galaxy_number (int): number of galaxies per frame.
+            every (int): store one frame every every calls to record.
+            chunk_frames (int): frames buffered in memory before they are appended.
+            float_dtype (string): dtype of the stored positions, velocities and masses;
+                '<f4' halves the size of the files, e.g. for single precision runs.
+
+        Raises:
+            ValueError: if an existing trajectory has a different galaxy count or
+                float_dtype.
+        """
+        self.path = path
+        self.galaxy_number = galaxy_number
+        self.every = every
+        self.chunk_frames = chunk_frames
+        self.float_dtype = np.dtype(float_dtype).str
+        self.fields = _fields(self.float_dtype)
+        self._calls = 0
+        existing = column_store.read_header(path, HEADER)
+        if existing is not None:
+            if existing['galaxy_number'] != galaxy_number:
+                raise ValueError(f"trajectory at {path} holds {existing['galaxy_number']} "
+                                 f'galaxies, not {galaxy_number}')
+            stored = existing['fields']['pos']
+            if stored != self.float_dtype:
+                raise ValueError(f'trajectory at {path} stores {stored}, not {self.float_dtype}')
+        self._store = column_store.ColumnWriter(
+            path, HEADER, {name: (dtype, shape(galaxy_number))
+                           for name, (dtype, shape) in self.fields.items()},
+            'frames', chunk_frames, {'galaxy_number': galaxy_number})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def frames(self):
+        """int: number of frames written so far."""
+        return self._store.rows
+
+    def record(self, universe):
+        """Offers the current state of a universe, stored if due under the decimation.
+
+        Args:
+            universe (engine.Universe): universe to record.
+        """
+        self._calls += 1
+        if (self._calls - 1) % self.every:
+            return
+        self._store.append(1, **{name: np.asarray(getattr(universe, name))[np.newaxis]
+                                 for name in FIELDS})
+
+    def flush(self):
+        """Appends buffered frames to the field files and updates the header."""
+        self._store.flush()
+
+    def close(self):
+        """Flushes any buffered frames."""
+        self._store.close()
+
+class Trajectory:
+    """Read-only, memory-mapped view of a recorded trajectory.
+
+    Each field is an np.memmap of shape (frames, ...) so slicing reads only the
+    frames touched, e.g. trajectory.pos[::10, :, 0].
+
+    Parameters:
+        frames (int): number of frames.
+        galaxy_number (int): number of galaxies per frame.
+        time (np.memmap): (frames,) simulation times.
+        pos (np.memmap): (frames, N, 2) positions.
+        vel (np.memmap): (frames, N, 2) velocities.
+        mass (np.memmap): (frames, N) masses.
+        gal_type (np.memmap): (frames, N) galaxy types.
+        active (np.memmap): (frames, N) active mask.
+    """
+
+    def __init__(self, path):
+        """Memory-maps every field of the trajectory at path.
+
+        Args:
+            path (string): directory of the trajectory.
+        """
+        header = column_store.read_header(path, HEADER)
+        self.frames = header['frames']
+        self.galaxy_number = header['galaxy_number']
+        fields = {name: (dtype, shape(self.galaxy_number))
+                  for name, (dtype, shape) in _fields(header['fields']['pos']).items()}
+        for name, column in column_store.open_columns(path, fields, self.frames).items():
+            setattr(self, name, column)
+
+def open_trajectory(path):
+    """Memory-maps a recorded trajectory.
+
+    Args:
+        path (string): directory of the trajectory.
+
+    Returns:
+        Trajectory: read-only views of every field.
+    """
+    return Trajectory(path)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import engine
+import trajectory
+
+class TrajectoryTests(unittest.TestCase):
+    """Tests for trajectory.py module."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'run')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_with_decimation(self):
+        """Every every-th step is stored and read back through memory maps."""
+        universe = engine.Universe.random(300, 12, 0.5, np.random.default_rng(0))
+        expected = []
+        with trajectory.TrajectoryWriter(self.path, 12, every=3, chunk_frames=4) as writer:
+            for step in range(20):
+                universe.step(0.1)
+                writer.record(universe)
+                if step % 3 == 0:
+                    expected.append((universe.time, universe.pos.copy(), universe.active.copy()))
+
+        stored = trajectory.open_trajectory(self.path)
+
+        self.assertIsInstance(stored.pos, np.memmap)
+        self.assertEqual(stored.frames, len(expected))
+        for frame, (time, pos, active) in enumerate(expected):
+            self.assertEqual(stored.time[frame], time)
+            np.testing.assert_array_equal(stored.pos[frame], pos)
+            np.testing.assert_array_equal(stored.active[frame], active)
+
+    def test_append_and_recover(self):
+        """Reopening appends after the last complete frame, dropping partial writes."""
+        universe = engine.Universe(100, [(10, 10), (90, 90)], [1, 1], [0, 1])
+        with trajectory.TrajectoryWriter(self.path, 2, chunk_frames=2) as writer:
+            universe.run(0.45, 0.1, writer)
+        with open(os.path.join(self.path, 'pos.bin'), 'ab') as file:
+            file.write(b'partial frame')
+
+        writer = trajectory.TrajectoryWriter(self.path, 2)
+        universe.run(0.95, 0.1, writer)
+        writer.close()
+        stored = trajectory.open_trajectory(self.path)
+
+        self.assertEqual(stored.frames, 10)
+        np.testing.assert_allclose(stored.time, np.arange(1, 11) * 0.1)
+        np.testing.assert_array_equal(stored.gal_type[-1], [0, 1])
+        with self.assertRaises(ValueError):
+            trajectory.TrajectoryWriter(self.path, 3)
+
+    def test_float32_storage(self):
+        """Single precision trajectories store state fields in half the space."""
+        universe = engine.Universe(100, [(10, 10), (90, 90)], [1, 1], [0, 1], precision='single')
+        with trajectory.TrajectoryWriter(self.path, 2, float_dtype='<f4') as writer:
+            universe.run(0.25, 0.1, writer)
+        stored = trajectory.open_trajectory(self.path)
+
+        self.assertEqual(stored.pos.dtype, np.float32)
+        self.assertEqual(stored.time.dtype, np.float64)
+        np.testing.assert_array_equal(stored.pos[-1], universe.pos)
+        with self.assertRaises(ValueError):
+            trajectory.TrajectoryWriter(self.path, 2)
+
+if __name__ == '__main__':
+    unittest.main()
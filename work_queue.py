@@ -0,0 +1,398 @@
+"""Work queue module.
+
+Runs sweeps of simulate_ratio through a work queue kept in one SQLite file, so a
+study can be shared by worker processes on any number of machines that can open
+the file (e.g. on a shared filesystem), and run and tested locally as well.
+
+A sweep is split into work units, each a JSON document holding its SweepTask
+list and the simulation settings, so units of different galaxy counts or step
+sizes can share one queue. Units are named by a hash of their content, so
+submitting a sweep again adds nothing, and results are stored per task with the
+task as key, so a unit finished twice is merged only once. Workers lease a unit
+while they run it; if a worker dies, its lease runs out and another worker
+claims the unit, while finished units are never run again.
+
+    python work_queue.py submit study.db --ratios 0 0.1 0.2 --replicates 10 --galaxies 50
+    python work_queue.py work study.db          # on every node, as often as wanted
+    python work_queue.py status study.db
+
+Classes:
+    WorkUnit
+    WorkQueue
+
+Methods:
+    run_worker: claims and runs units until the queue is drained.
+    run_workers: runs several local worker processes on a queue.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+import sweep
+
+# seconds a worker may hold a unit before other workers may claim it
+LEASE = 3600.0
+
+WorkUnit = namedtuple('WorkUnit', ['unit_id', 'tasks', 'settings', 'batched', 'worker'])
+WorkUnit.__doc__ = """Tasks of one work unit, the keyword arguments of run_task or run_batch
+in settings, whether the tasks run together with run_batch, and the worker holding its
+lease."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    unit_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    galaxy_number INTEGER NOT NULL,
+    settings TEXT NOT NULL,
+    ratio_index INTEGER NOT NULL,
+    replicate INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    initial_type_ratio REAL NOT NULL,
+    elliptical_ratio REAL NOT NULL,
+    PRIMARY KEY (settings, ratio_index, replicate, seed)
+);
+"""
+
+def _worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+class WorkQueue:
+    """Sweep work units and their results in one SQLite file.
+
+    Parameters:
+        path (string): the SQLite file.
+
+    Methods:
+        __init__: opens or creates a queue.
+        submit: adds the units of a sweep.
+        claim: leases the next unit to run.
+        complete: stores the results of a unit.
+        fail: records that a unit raised.
+        requeue: returns failed units, or the units of a worker, to the queue.
+        progress: number of units in each state.
+        results: results stored so far.
+        close: closes the connection.
+    """
+
+    def __init__(self, path, timeout=60.0):
+        """Opens or creates a queue.
+
+        Args:
+            path (string): the SQLite file, created if missing.
+            timeout (float): seconds to wait for another process's lock on the file.
+        """
+        self.path = path
+        # autocommit, with explicit transactions where several statements must agree
+        self._connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the connection."""
+        self._connection.close()
+
+    def submit(self, tasks, universe_size, galaxy_number, time_step, time_max, batch_size=None,
+               **options):
+        """Adds the units of a sweep. Units already in the queue are left as they are.
+
+        Args:
+            tasks (list): SweepTask list, e.g. from sweep.sweep_tasks.
+            universe_size (int): size of observable universe.
+            galaxy_number (int): number of galaxies to simulate.
+            time_step (float): size of time steps in simulation.
+            time_max (int): how many time steps to take in simulation.
+            batch_size (int): if given, units of batch_size tasks run together with
+                sweep.run_batch; otherwise each task is a unit of its own.
+            **options: engine options passed on to simulate_ratio. Must be JSON
+                serializable.
+
+        Returns:
+            int: number of units added.
+
+        Raises:
+            ValueError: if engine options are given with batch_size, as the batched
+                engine only runs the default engine.
+        """
+        if batch_size is not None and options:
+            raise ValueError(f'batch_size runs the batched engine, which takes no engine '
+                             f'options, got {", ".join(sorted(options))}')
+        settings = dict(universe_size=universe_size, galaxy_number=galaxy_number,
+                        time_step=time_step, time_max=time_max, **options)
+        size = 1 if batch_size is None else batch_size
+        rows = []
+        for i in range(0, len(tasks), size):
+            payload = json.dumps({'tasks': [list(task) for task in tasks[i:i + size]],
+                                  'settings': settings, 'batched': batch_size is not None},
+                                 sort_keys=True)
+            rows.append((hashlib.sha256(payload.encode()).hexdigest(), payload))
+        with self._transaction():
+            before = self._connection.total_changes
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO units (unit_id, payload) VALUES (?, ?)', rows)
+            return self._connection.total_changes - before
+
+    def claim(self, worker=None, lease=LEASE):
+        """Leases the next pending unit, or a unit whose lease has run out.
+
+        Args:
+            worker (string): name of the claiming worker. Defaults to host:pid.
+            lease (float): seconds the unit is held before other workers may claim it.
+
+        Returns:
+            WorkUnit: the claimed unit, or None if there is nothing to claim.
+        """
+        now = time.time()
+        with self._transaction():
+            row = self._connection.execute(
+                "SELECT unit_id, payload FROM units WHERE state = 'pending' "
+                "OR (state = 'running' AND lease_expires < ?) ORDER BY rowid LIMIT 1",
+                (now,)).fetchone()
+            if row is None:
+                return None
+            worker = worker or _worker_name()
+            self._connection.execute(
+                "UPDATE units SET state = 'running', worker = ?, lease_expires = ?, "
+                'attempts = attempts + 1 WHERE unit_id = ?', (worker, now + lease, row[0]))
+        payload = json.loads(row[1])
+        return WorkUnit(row[0], [sweep.SweepTask(*task) for task in payload['tasks']],
+                        payload['settings'], payload['batched'], worker)
+
+    def complete(self, unit, results):
+        """Stores the results of a unit and marks it done. Storing a result twice,
+        e.g. when a worker thought dead finishes after all, keeps the first copy.
+
+        Args:
+            unit (WorkUnit): the unit.
+            results (list): its SweepResult list.
+        """
+        settings = json.dumps(unit.settings, sort_keys=True)
+        galaxy_number = unit.settings['galaxy_number']
+        rows = [(galaxy_number, settings, result.ratio_index, result.replicate, result.seed,
+                 result.initial_type_ratio, result.elliptical_ratio) for result in results]
+        with self._transaction():
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self._connection.execute(
+                "UPDATE units SET state = 'done', lease_expires = NULL, error = NULL "
+                'WHERE unit_id = ?', (unit.unit_id,))
+
+    def fail(self, unit, error):
+        """Records that a unit raised. Failed units are not claimed again until requeued.
+
+        Only the worker still holding the unit's lease can fail it, so a worker whose
+        lease ran out does not fail a unit another worker has claimed since.
+
+        Args:
+            unit (WorkUnit): the unit, as returned by claim.
+            error (string): description of the error.
+
+        Returns:
+            bool: whether the unit was marked failed.
+        """
+        cursor = self._connection.execute(
+            "UPDATE units SET state = 'failed', lease_expires = NULL, error = ? "
+            "WHERE unit_id = ? AND worker = ? AND state = 'running'",
+            (error, unit.unit_id, unit.worker))
+        return cursor.rowcount == 1
+
+    def requeue(self, worker=None):
+        """Returns units to the queue: the running units of worker, e.g. one known to
+        have crashed, without waiting for their leases to run out, or else every
+        failed unit.
+
+        Args:
+            worker (string): name of the worker whose units to release.
+
+        Returns:
+            int: number of units requeued.
+        """
+        if worker is None:
+            cursor = self._connection.execute(
+                "UPDATE units SET state = 'pending', worker = NULL WHERE state = 'failed'")
+        else:
+            cursor = self._connection.execute(
+                "UPDATE units SET state = 'pending', worker = NULL, lease_expires = NULL "
+                "WHERE state = 'running' AND worker = ?", (worker,))
+        return cursor.rowcount
+
+    def progress(self):
+        """Number of units in each state.
+
+        Returns:
+            dict: counts of pending, running, done and failed units.
+        """
+        counts = dict.fromkeys(('pending', 'running', 'done', 'failed'), 0)
+        counts.update(self._connection.execute(
+            'SELECT state, COUNT(*) FROM units GROUP BY state').fetchall())
+        return counts
+
+    def results(self, galaxy_number=None, settings=None):
+        """Results stored so far.
+
+        Results of submissions with different settings share the queue, so pass
+        settings to tell them apart; see settings for the ones present.
+
+        Args:
+            galaxy_number (int): only return results of runs with this many galaxies.
+            settings (dict): only return results of units submitted with these
+                settings: universe_size, galaxy_number, time_step, time_max and any
+                engine options, with the values passed to submit.
+
+        Returns:
+            list: sorted SweepResult list.
+        """
+        query = ('SELECT initial_type_ratio, replicate, elliptical_ratio, ratio_index, seed '
+                 'FROM results')
+        conditions, parameters = [], []
+        if galaxy_number is not None:
+            conditions.append('galaxy_number = ?')
+            parameters.append(galaxy_number)
+        if settings is not None:
+            conditions.append('settings = ?')
+            parameters.append(json.dumps(settings, sort_keys=True))
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return sorted(sweep.SweepResult(*row)
+                      for row in self._connection.execute(query, parameters))
+
+    def settings(self):
+        """Settings of the submissions that have results.
+
+        Returns:
+            list: one settings dict per distinct submission, to pass to results.
+        """
+        return [json.loads(row[0]) for row in self._connection.execute(
+            'SELECT DISTINCT settings FROM results ORDER BY settings')]
+
+    def _transaction(self):
+        return _Transaction(self._connection)
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers can never read
+    # the same pending unit and both claim it
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __enter__(self):
+        self._connection.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, *exc_info):
+        self._connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+def run_worker(path, worker=None, lease=LEASE, max_units=None):
+    """Claims and runs units until none are left to claim.
+
+    A unit that raises is marked failed and the worker moves on.
+
+    Args:
+        path (string): the queue's SQLite file.
+        worker (string): name of this worker. Defaults to host:pid.
+        lease (float): seconds a unit is held; keep it above the longest unit's run time.
+        max_units (int): stop after this many units.
+
+    Returns:
+        int: number of units completed.
+    """
+    completed = 0
+    with WorkQueue(path) as queue:
+        while max_units is None or completed < max_units:
+            unit = queue.claim(worker, lease)
+            if unit is None:
+                break
+            try:
+                if unit.batched:
+                    results = sweep.run_batch(unit.tasks, **unit.settings)
+                else:
+                    results = [sweep.run_task(task, **unit.settings) for task in unit.tasks]
+            except Exception as error:  # pylint: disable=broad-except
+                queue.fail(unit, repr(error))
+                continue
+            queue.complete(unit, results)
+            completed += 1
+    return completed
+
+def run_workers(path, workers=None, lease=LEASE):
+    """Runs local worker processes on a queue until it is drained.
+
+    Args:
+        path (string): the queue's SQLite file.
+        workers (int): number of worker processes. Defaults to every core; 1 runs
+            the worker in this process.
+        lease (float): seconds a unit is held, see run_worker.
+
+    Returns:
+        int: number of units completed.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    if workers == 1:
+        return run_worker(path, lease=lease)
+    # spawn, not fork, as in sweep.run_sweep
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        return sum(pool.starmap(run_worker, [(path, None, lease)] * workers))
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    submit = commands.add_parser('submit', help='add the units of a sweep')
+    submit.add_argument('path')
+    submit.add_argument('--ratios', nargs='+', type=float, required=True)
+    submit.add_argument('--replicates', type=int, default=1)
+    submit.add_argument('--seed', type=int, default=0)
+    submit.add_argument('--universe-size', type=int, default=1000)
+    submit.add_argument('--galaxies', nargs='+', type=int, default=[20])
+    submit.add_argument('--time-step', type=float, default=0.05)
+    submit.add_argument('--time-max', type=int, default=120)
+    submit.add_argument('--batch-size', type=int)
+    work = commands.add_parser('work', help='run units until the queue is drained')
+    work.add_argument('path')
+    work.add_argument('--workers', type=int)
+    work.add_argument('--lease', type=float, default=LEASE)
+    status = commands.add_parser('status', help='count units and results')
+    status.add_argument('path')
+    requeue = commands.add_parser('requeue', help='retry failed units')
+    requeue.add_argument('path')
+    requeue.add_argument('--worker', help='release the running units of this worker instead')
+    args = parser.parse_args(argv)
+
+    if args.command == 'work':
+        print(f'{run_workers(args.path, args.workers, args.lease)} units completed')
+        return 0
+
+    with WorkQueue(args.path) as queue:
+        if args.command == 'submit':
+            tasks = sweep.sweep_tasks(args.ratios, args.replicates, args.seed)
+            added = sum(queue.submit(tasks, args.universe_size, galaxy_number, args.time_step,
+                                     args.time_max, args.batch_size)
+                        for galaxy_number in args.galaxies)
+            print(f'{added} units added')
+        elif args.command == 'requeue':
+            print(f'{queue.requeue(args.worker)} units requeued')
+        else:
+            for state, count in queue.progress().items():
+                print(f'{state:>8} {count}')
+            print(f'{"results":>8} {len(queue.results())}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+import sweep
+import work_queue
+
+ARGS = (1000, 15, 0.5, 5)
+
+class WorkQueueTests(unittest.TestCase):
+    """Tests for work_queue.py module."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'queue.db')
+        self.tasks = sweep.sweep_tasks([0.0, 0.25, 0.5], replicates=2, seed=3)
+
+    def test_matches_run_sweep(self):
+        """Results through the queue equal those of a serial sweep."""
+        with work_queue.WorkQueue(self.path) as queue:
+            queue.submit(self.tasks, *ARGS)
+        work_queue.run_worker(self.path)
+
+        with work_queue.WorkQueue(self.path) as queue:
+            self.assertEqual(queue.results(),
+                             sorted(sweep.run_sweep(None, *ARGS, tasks=self.tasks, workers=1)))
+            self.assertEqual(queue.progress()['done'], 6)
+
+    def test_submit_idempotent(self):
+        """Submitting a sweep twice adds its units once."""
+        with work_queue.WorkQueue(self.path) as queue:
+            self.assertEqual(queue.submit(self.tasks, *ARGS, batch_size=4), 2)
+            self.assertEqual(queue.submit(self.tasks, *ARGS, batch_size=4), 0)
+            self.assertEqual(queue.submit(self.tasks, 1000, 30, 0.5, 5, batch_size=4), 2)
+            with self.assertRaises(ValueError):
+                queue.submit(self.tasks, *ARGS, batch_size=4, integrator='leapfrog')
+
+    def test_resume_after_crash(self):
+        """A crashed worker's unit is claimed again once its lease runs out, and
+        finished units are not rerun."""
+        with work_queue.WorkQueue(self.path) as queue:
+            queue.submit(self.tasks[:2], *ARGS)
+            lost = queue.claim('crashed', lease=-1)
+        self.assertEqual(work_queue.run_worker(self.path), 2)
+
+        with work_queue.WorkQueue(self.path) as queue:
+            self.assertIsNone(queue.claim())
+            self.assertEqual(len(queue.results()), 2)
+            # the crashed worker finishing late does not duplicate results
+            queue.complete(lost, [sweep.run_task(lost.tasks[0], *ARGS)])
+            self.assertEqual(len(queue.results()), 2)
+
+    def test_requeue_failed(self):
+        """Failed units are skipped until requeued."""
+        with work_queue.WorkQueue(self.path) as queue:
+            queue.submit(self.tasks[:1], *ARGS)
+            queue.fail(queue.claim(), 'RuntimeError()')
+            self.assertIsNone(queue.claim())
+            self.assertEqual(queue.requeue(), 1)
+            self.assertIsNotNone(queue.claim())
+
+    def test_stale_worker_cannot_fail(self):
+        """A worker whose lease ran out cannot fail a unit another worker claimed since."""
+        with work_queue.WorkQueue(self.path) as queue:
+            queue.submit(self.tasks[:1], *ARGS)
+            stale = queue.claim('slow', lease=-1)
+            current = queue.claim('fast')
+
+            self.assertFalse(queue.fail(stale, 'TimeoutError()'))
+            self.assertEqual(queue.progress()['running'], 1)
+            self.assertTrue(queue.fail(current, 'RuntimeError()'))
+            self.assertEqual(queue.progress()['failed'], 1)
+
+    def test_results_by_settings(self):
+        """Results of submissions with different settings are told apart."""
+        with work_queue.WorkQueue(self.path) as queue:
+            queue.submit(self.tasks[:2], *ARGS)
+            queue.submit(self.tasks[:2], 1000, 15, 0.5, 3)
+        work_queue.run_worker(self.path)
+
+        with work_queue.WorkQueue(self.path) as queue:
+            settings = queue.settings()
+            short = dict(universe_size=1000, galaxy_number=15, time_step=0.5, time_max=3)
+
+            self.assertEqual(len(settings), 2)
+            self.assertIn(short, settings)
+            self.assertEqual(len(queue.results()), 4)
+            self.assertEqual(queue.results(settings=short),
+                             sorted(sweep.run_sweep(None, 1000, 15, 0.5, 3, tasks=self.tasks[:2],
+                                                    workers=1)))
+
+if __name__ == '__main__':
+    unittest.main()